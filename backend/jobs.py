@@ -0,0 +1,395 @@
+"""
+Trabajos de optimización en segundo plano.
+
+Cada ejecución del algoritmo es un trabajo con su propia carpeta (EDP_TRABAJOS_DIR/<id>) donde se
+guardan su estado (trabajo.json), la salida del script (salida.log, en disco y no en memoria), el
+progreso que escribe el algoritmo (progreso.json) y las peticiones de parar antes quedándose con el
+frente (detener) o de cancelar (cancelar). Así el
+estado es el mismo lo ejecute un hilo del propio backend o un worker de Celery.
+
+Si está definida la variable EDP_CELERY_BROKER (por ejemplo redis://redis:6379/0) los trabajos se
+envían a Celery y los ejecutan los workers, que se arrancan con:
+
+    celery -A jobs worker --pool=threads --concurrency=2
+
+Si no, se ejecutan en un pool de hilos del backend. En los dos casos como mucho EDP_MAX_TRABAJOS
+(2 por defecto) trabajos a la vez; el resto espera en la cola.
+
+Cada trabajo se ejecuta en uno de los EDP_MAX_TRABAJOS workers calientes (WarmWorkerPool): procesos
+que se arrancan con el backend (o con el worker de Celery, por eso su pool es de hilos),
+cargan las importaciones del modelo una sola vez y guardan la conexión a Mongo y los problemas ya
+construidos por ruta y vehículo. Con EDP_WORKERS_CALIENTES=0 cada trabajo arranca su propio
+intérprete de 000_main_algoritmo.py, como antes. Para cada trabajo se guarda el tipo de arranque
+(frio, caliente o subproceso) y la latencia hasta que el algoritmo empieza, que resume
+estadisticas_arranque.
+"""
+import asyncio
+import contextlib
+import datetime
+import fcntl
+import json
+import os
+import subprocess
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+DIRECTORIO_TRABAJOS = os.environ.get("EDP_TRABAJOS_DIR", "./model/trabajos")
+MAX_TRABAJOS = int(os.environ.get("EDP_MAX_TRABAJOS", 2))
+CELERY_BROKER = os.environ.get("EDP_CELERY_BROKER")
+WORKERS_CALIENTES = os.environ.get("EDP_WORKERS_CALIENTES", "1") != "0"
+
+DIRECTORIO_MODELO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model")
+SCRIPT_ALGORITMO = os.path.join(DIRECTORIO_MODELO, "000_main_algoritmo.py")
+# Los workers calientes importan los módulos del modelo (y se arrancan con spawn, que copia sys.path)
+if DIRECTORIO_MODELO not in sys.path:
+    sys.path.append(DIRECTORIO_MODELO)
+
+# Cada cuánto se comprueba si se ha pedido cancelar un trabajo en ejecución (segundos)
+INTERVALO_CANCELACION = 0.5
+# Segundos que se espera al script tras pedirle que termine antes de matarlo
+ESPERA_TERMINACION = 10
+# Cada cuánto se comprueba el progreso de un trabajo para enviarlo a sus clientes (segundos)
+INTERVALO_EVENTOS = 0.5
+
+EN_COLA = "en_cola"
+EN_EJECUCION = "en_ejecucion"
+COMPLETADO = "completado"
+FALLIDO = "fallido"
+CANCELADO = "cancelado"
+ESTADOS_FINALES = (COMPLETADO, FALLIDO, CANCELADO)
+
+def ruta_trabajo(id_trabajo: str, archivo: str = "") -> str:
+    return os.path.join(DIRECTORIO_TRABAJOS, id_trabajo, archivo)
+
+
+def _ahora() -> str:
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+def _leer_json(path: str):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _escribir_json(path: str, datos: dict):
+    # Se escribe en un temporal y se renombra, quien lee nunca ve el archivo a medias
+    temporal = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporal, "w") as f:
+        json.dump(datos, f)
+    os.replace(temporal, path)
+
+
+@contextlib.contextmanager
+def _bloqueo_trabajo(id_trabajo: str):
+    """
+    Bloqueo del estado de un trabajo entre hilos y procesos (el backend que atiende las peticiones y los
+    workers de Celery que lo ejecutan): un flock sobre el archivo trabajo.lock de su carpeta.
+    """
+    with open(ruta_trabajo(id_trabajo, "trabajo.lock"), "a") as archivo_bloqueo:
+        fcntl.flock(archivo_bloqueo, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(archivo_bloqueo, fcntl.LOCK_UN)
+
+
+def leer_trabajo(id_trabajo: str):
+    """
+    Estado guardado del trabajo, o None si no existe.
+    """
+    return _leer_json(ruta_trabajo(id_trabajo, "trabajo.json"))
+
+
+def actualizar_trabajo(id_trabajo: str, solo_si_no_final: bool = False, **cambios):
+    """
+    Cambia campos del estado guardado del trabajo. Con solo_si_no_final no se toca un trabajo que ya ha
+    terminado (por ejemplo uno cancelado antes de que un worker lo empiece).
+
+    :return: el estado resultante, o None si no se ha cambiado
+    """
+    if not os.path.isdir(ruta_trabajo(id_trabajo)):
+        return None
+    with _bloqueo_trabajo(id_trabajo):
+        trabajo = leer_trabajo(id_trabajo)
+        if trabajo is None or (solo_si_no_final and trabajo["estado"] in ESTADOS_FINALES):
+            return None
+        trabajo.update(cambios)
+        _escribir_json(ruta_trabajo(id_trabajo, "trabajo.json"), trabajo)
+        return trabajo
+
+
+_pool_caliente = None
+_bloqueo_pool = threading.Lock()
+
+
+def pool_caliente():
+    """
+    Pool de workers calientes del proceso, que se crea la primera vez que se pide.
+    """
+    global _pool_caliente
+    with _bloqueo_pool:
+        if _pool_caliente is None:
+            from WarmWorkerPool import WarmWorkerPool
+            _pool_caliente = WarmWorkerPool(MAX_TRABAJOS, DIRECTORIO_MODELO)
+        return _pool_caliente
+
+
+def _ejecutar_subproceso(id_trabajo: str, argumentos: list, cancelado) -> int:
+    entorno = dict(os.environ, EDP_PROGRESS_FILE=os.path.abspath(ruta_trabajo(id_trabajo, "progreso.json")),
+                   EDP_STOP_FILE=os.path.abspath(ruta_trabajo(id_trabajo, "detener")), PYTHONUNBUFFERED="1")
+    with open(ruta_trabajo(id_trabajo, "salida.log"), "w") as salida:
+        proceso = subprocess.Popen(["python", SCRIPT_ALGORITMO] + argumentos, stdout=salida,
+                                   stderr=subprocess.STDOUT, env=entorno)
+        terminando = False
+        while True:
+            try:
+                return proceso.wait(timeout=INTERVALO_CANCELACION)
+            except subprocess.TimeoutExpired:
+                if not terminando and cancelado():
+                    terminando = True
+                    proceso.terminate()
+                    try:
+                        proceso.wait(timeout=ESPERA_TERMINACION)
+                    except subprocess.TimeoutExpired:
+                        proceso.kill()
+
+
+def ejecutar_trabajo(id_trabajo: str, argumentos: list) -> dict:
+    """
+    Ejecuta 000_main_algoritmo.py con los argumentos del trabajo, en un worker caliente o en un intérprete
+    nuevo, con la salida a su salida.log y el progreso a su progreso.json. Mientras se ejecuta, comprueba
+    si se ha pedido cancelar el trabajo y, en ese caso, lo para.
+
+    :return: el estado final del trabajo
+    """
+    if os.path.exists(ruta_trabajo(id_trabajo, "cancelar")) or \
+            actualizar_trabajo(id_trabajo, solo_si_no_final=True, estado=EN_EJECUCION, iniciado=_ahora()) is None:
+        return actualizar_trabajo(id_trabajo, solo_si_no_final=True, estado=CANCELADO, terminado=_ahora()) \
+            or leer_trabajo(id_trabajo)
+
+    def cancelado():
+        return os.path.exists(ruta_trabajo(id_trabajo, "cancelar"))
+
+    inicio = datetime.datetime.now().timestamp()
+    try:
+        if WORKERS_CALIENTES:
+            open(ruta_trabajo(id_trabajo, "salida.log"), "w").close()
+            codigo_salida, frio = pool_caliente().run(
+                id_trabajo, [SCRIPT_ALGORITMO] + argumentos, os.path.abspath(ruta_trabajo(id_trabajo, "salida.log")),
+                os.path.abspath(ruta_trabajo(id_trabajo, "progreso.json")),
+                os.path.abspath(ruta_trabajo(id_trabajo, "detener")), cancelado)
+            arranque = "frio" if frio else "caliente"
+        else:
+            codigo_salida = _ejecutar_subproceso(id_trabajo, argumentos, cancelado)
+            arranque = "subproceso"
+    except Exception as e:
+        print(f"❌ Error ejecutando el trabajo {id_trabajo}: {e}")
+        return actualizar_trabajo(id_trabajo, estado=FALLIDO, terminado=_ahora(), error=str(e))
+
+    # El algoritmo escribe en el progreso cuándo empieza, ya con la ruta y el problema preparados
+    progreso = _leer_json(ruta_trabajo(id_trabajo, "progreso.json")) or {}
+    latencia = round(progreso["inicio"] - inicio, 3) if "inicio" in progreso else None
+    print(f"🔵 Trabajo {id_trabajo}: arranque {arranque}, latencia hasta el algoritmo {latencia} s")
+
+    if codigo_salida != 0 and cancelado():
+        estado = CANCELADO
+    else:
+        estado = COMPLETADO if codigo_salida == 0 else FALLIDO
+    # Solo los algoritmos exactos (MILP) escriben su gap de optimalidad
+    resultado = {"gap_optimalidad": progreso["gap_optimalidad"]} if "gap_optimalidad" in progreso else {}
+    return actualizar_trabajo(id_trabajo, estado=estado, terminado=_ahora(), codigo_salida=codigo_salida,
+                              arranque=arranque, latencia_inicio=latencia, **resultado)
+
+
+class ColaLocal:
+    """
+    Cola de trabajos en el propio proceso del backend: un pool de MAX_TRABAJOS hilos, cada uno de los
+    cuales espera a un script.
+    """
+
+    def __init__(self, max_trabajos: int):
+        self.executor = ThreadPoolExecutor(max_workers=max_trabajos, thread_name_prefix="trabajo")
+        self.futuros = {}
+
+    def encolar(self, id_trabajo: str, argumentos: list):
+        self.futuros[id_trabajo] = self.executor.submit(ejecutar_trabajo, id_trabajo, argumentos)
+        self.futuros[id_trabajo].add_done_callback(lambda _: self.futuros.pop(id_trabajo, None))
+
+    def cancelar(self, id_trabajo: str):
+        futuro = self.futuros.get(id_trabajo)
+        if futuro is not None:
+            futuro.cancel()
+
+
+class ColaCelery:
+    """
+    Cola de trabajos en Celery: el backend solo envía la tarea y los workers (con --concurrency como
+    límite de trabajos a la vez) ejecutan los scripts. Los workers deben ver la misma carpeta de trabajos.
+    """
+
+    def __init__(self, broker: str, max_trabajos: int):
+        from celery import Celery
+
+        self.app = Celery("jobs", broker=broker, backend=os.environ.get("EDP_CELERY_BACKEND", broker))
+        self.app.conf.update(worker_concurrency=max_trabajos, worker_prefetch_multiplier=1, task_acks_late=True,
+                             task_track_started=True)
+        self.tarea = self.app.task(name="jobs.ejecutar_trabajo")(ejecutar_trabajo)
+
+        if WORKERS_CALIENTES:
+            from celery.signals import worker_init
+
+            # Los workers calientes se arrancan con el worker de Celery, no con el backend que envía las tareas
+            worker_init.connect(lambda **_: pool_caliente(), weak=False)
+
+    def encolar(self, id_trabajo: str, argumentos: list):
+        self.tarea.apply_async(args=(id_trabajo, argumentos), task_id=id_trabajo)
+
+    def cancelar(self, id_trabajo: str):
+        # Si aún está en la cola no llega a empezar; si ya se ejecuta lo para el archivo cancelar
+        self.app.control.revoke(id_trabajo)
+
+
+def crear_cola():
+    if CELERY_BROKER:
+        print(f"🔵 Trabajos en Celery ({CELERY_BROKER}), {MAX_TRABAJOS} a la vez por worker")
+        return ColaCelery(CELERY_BROKER, MAX_TRABAJOS)
+    print(f"🔵 Trabajos en el backend, {MAX_TRABAJOS} a la vez")
+    if WORKERS_CALIENTES:
+        pool_caliente()
+    return ColaLocal(MAX_TRABAJOS)
+
+
+cola = crear_cola()
+# Para el worker de Celery (celery -A jobs worker)
+app = cola.app if isinstance(cola, ColaCelery) else None
+
+
+def crear_trabajo(argumentos: list, datos: dict) -> dict:
+    """
+    Registra un trabajo nuevo y lo pone en la cola.
+
+    :param argumentos: argumentos de 000_main_algoritmo.py
+    :param datos: datos de la petición que se guardan con el estado (ruta, vehículo, evaluaciones...)
+    :return: el estado inicial del trabajo
+    """
+    id_trabajo = str(uuid.uuid4())
+    os.makedirs(ruta_trabajo(id_trabajo), exist_ok=True)
+    trabajo = {"id_trabajo": id_trabajo, "estado": EN_COLA, "creado": _ahora(), "iniciado": None, "terminado": None,
+               "codigo_salida": None, **datos}
+    _escribir_json(ruta_trabajo(id_trabajo, "trabajo.json"), trabajo)
+    cola.encolar(id_trabajo, argumentos)
+    return trabajo
+
+
+def progreso_trabajo(id_trabajo: str, con_frente: bool = False):
+    """
+    Último progreso escrito por el algoritmo (evaluaciones, tiempo y tamaño del archivo), con el porcentaje
+    respecto a las evaluaciones máximas del trabajo y, con con_frente, el frente (reducido) del archivo.
+    None si el trabajo no existe.
+    """
+    trabajo = leer_trabajo(id_trabajo)
+    if trabajo is None:
+        return None
+    progreso = _leer_json(ruta_trabajo(id_trabajo, "progreso.json")) or {}
+    evaluaciones = progreso.get("evaluaciones", 0)
+    max_evaluaciones = trabajo.get("max_evaluaciones")
+    porcentaje = None
+    if trabajo["estado"] == COMPLETADO:
+        porcentaje = 100.0
+    elif max_evaluaciones:
+        porcentaje = round(min(100.0, 100.0 * evaluaciones / max_evaluaciones), 1)
+    resultado = {"id_trabajo": id_trabajo, "estado": trabajo["estado"], "evaluaciones": evaluaciones,
+                 "max_evaluaciones": max_evaluaciones, "porcentaje": porcentaje, "tiempo": progreso.get("tiempo"),
+                 "archivo": progreso.get("archivo"), "detenido": trabajo.get("detenido", False)}
+    if con_frente:
+        resultado["frente"] = progreso.get("frente", [])
+    return resultado
+
+
+async def eventos_trabajo(id_trabajo: str, intervalo: float = INTERVALO_EVENTOS):
+    """
+    Progreso del trabajo (con su frente) cada vez que cambia, hasta que el trabajo termina. El algoritmo
+    solo escribe su progreso.json y cada cliente lee la última versión cuando está listo para recibir
+    otra, así las actualizaciones se agrupan solas y un cliente lento no frena al algoritmo.
+    """
+    ultimo = None
+    while True:
+        progreso = progreso_trabajo(id_trabajo, con_frente=True)
+        if progreso is None:
+            return
+        if progreso != ultimo:
+            yield progreso
+            ultimo = progreso
+        if progreso["estado"] in ESTADOS_FINALES:
+            return
+        await asyncio.sleep(intervalo)
+
+
+def cancelar_trabajo(id_trabajo: str):
+    """
+    Pide cancelar un trabajo: si está en la cola se marca como cancelado y no llega a ejecutarse, y si se
+    está ejecutando se termina su script. None si el trabajo no existe.
+    """
+    trabajo = leer_trabajo(id_trabajo)
+    if trabajo is None or trabajo["estado"] in ESTADOS_FINALES:
+        return trabajo
+    open(ruta_trabajo(id_trabajo, "cancelar"), "w").close()
+    cola.cancelar(id_trabajo)
+    return actualizar_trabajo(id_trabajo, solo_si_no_final=True,
+                              **({"estado": CANCELADO, "terminado": _ahora()} if trabajo["estado"] == EN_COLA else {})) \
+        or leer_trabajo(id_trabajo)
+
+
+def detener_trabajo(id_trabajo: str):
+    """
+    Pide a un trabajo en ejecución que pare en la siguiente generación y guarde las soluciones que lleva
+    (solo los algoritmos MOCell; los demás terminan normalmente). Un trabajo en la cola se cancela. None
+    si el trabajo no existe.
+    """
+    trabajo = leer_trabajo(id_trabajo)
+    if trabajo is None or trabajo["estado"] in ESTADOS_FINALES:
+        return trabajo
+    if trabajo["estado"] == EN_COLA:
+        return cancelar_trabajo(id_trabajo)
+    open(ruta_trabajo(id_trabajo, "detener"), "w").close()
+    return actualizar_trabajo(id_trabajo, solo_si_no_final=True, detenido=True) or leer_trabajo(id_trabajo)
+
+
+def salida_trabajo(id_trabajo: str, lineas: int = 200) -> str:
+    """
+    Últimas lineas de la salida del script del trabajo.
+    """
+    try:
+        with open(ruta_trabajo(id_trabajo, "salida.log"), errors="replace") as f:
+            return "".join(f.readlines()[-lineas:])
+    except FileNotFoundError:
+        return ""
+
+
+def estadisticas_arranque(ultimos: int = 200) -> dict:
+    """
+    Latencia hasta que empieza el algoritmo (segundos) de los últimos trabajos terminados, por tipo de
+    arranque: frio (primer trabajo de un worker caliente), caliente o subproceso (un intérprete nuevo).
+    """
+    try:
+        ids = sorted(os.listdir(DIRECTORIO_TRABAJOS),
+                     key=lambda id_trabajo: os.path.getmtime(ruta_trabajo(id_trabajo)))[-ultimos:]
+    except FileNotFoundError:
+        ids = []
+
+    latencias = {}
+    for id_trabajo in ids:
+        trabajo = leer_trabajo(id_trabajo)
+        if trabajo is not None and trabajo.get("latencia_inicio") is not None:
+            latencias.setdefault(trabajo["arranque"], []).append(trabajo["latencia_inicio"])
+
+    return {arranque: {"trabajos": len(valores),
+                       "media": round(sum(valores) / len(valores), 3),
+                       "minima": min(valores),
+                       "maxima": max(valores)}
+            for arranque, valores in latencias.items()}
@@ -1,18 +1,21 @@
 #-----------------------------------------IMPORTS------------------------------------
-from fastapi import FastAPI, HTTPException, Body
+from fastapi import FastAPI, HTTPException, Body, WebSocket, WebSocketDisconnect
 from pymongo import MongoClient
 from pydantic import BaseModel
 from typing import List, Dict
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import requests
 import time
 import pandas as pd
 import os
-import subprocess
+import sys
+import json
 import ast
 import math
 
+import jobs
+
 #-----------------------------------------Conexion con MongoDB------------------------------------
 client = MongoClient("mongodb://mongo:27017")
 db = client["rutas"]
@@ -534,10 +537,8 @@ def ejecutar_algoritmo(config: dict = Body(...)):
         csv_result = generar_csv_para_algoritmo(id_ruta)
         print("✅ CSV generado con mensaje:", csv_result["mensaje"])
 
-        # 2. Preparar comando para ejecutar el script
-        script_path = "./model/000_main_algoritmo.py"
-        command = [
-            "python", script_path,
+        # 2. Preparar los argumentos del script
+        argumentos = [
             str(config["maxEvaluations"]),
             str(config["populationSize"]),
             str(config["offspringSize"]),
@@ -547,42 +548,111 @@ def ejecutar_algoritmo(config: dict = Body(...)):
             str(config["processId"]),
             config["dResults"],
             id_ruta,
-            config["vehiculo_id"]
+            config["vehiculo_id"],
+            str(config.get("algoritmo", "mocell")),
+            json.dumps(config.get("opcionesAlgoritmo", {}))
         ]
 
-        print("🚀 Ejecutando script:", " ".join(command))
-
-        # 3. Ejecutar el script y capturar salida
-        result = subprocess.run(command, capture_output=True, text=True)
-
-        print("📤 STDOUT:")
-        print(result.stdout)
-        print("📥 STDERR:")
-        print(result.stderr)
-
-        if result.returncode != 0:
-            print("❌ Error en la ejecución del script")
-            return {
-                "error": "Fallo al ejecutar el algoritmo",
-                "stdout": result.stdout,
-                "stderr": result.stderr
-            }
-        
-        # ⬇️ AQUÍ VA LO NUEVO
-        stdout = result.stdout
-        print("📦 Procesando resultados del algoritmo...")
-        print(stdout)
+        # 3. Encolar el trabajo, la petición vuelve en cuanto está en la cola
+        print("🚀 Encolando script con argumentos:", " ".join(argumentos))
+        trabajo = jobs.crear_trabajo(argumentos, {"ruta_id": id_ruta,
+                                               "vehiculo_id": config["vehiculo_id"],
+                                               "algoritmo": str(config.get("algoritmo", "mocell")),
+                                               "max_evaluaciones": int(config["maxEvaluations"])})
+        print(f"📥 Trabajo {trabajo['id_trabajo']} en cola")
 
-        
         return {
-            "mensaje": "Algoritmo ejecutado correctamente",
-            "stdout": result.stdout
+            "mensaje": "Algoritmo en cola",
+            "id_trabajo": trabajo["id_trabajo"],
+            "estado": trabajo["estado"]
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         print("❌ Error inesperado en el backend:", str(e))
         raise HTTPException(status_code=500, detail=str(e))
-    
+
+
+# ------------------------- Trabajos de optimización -------------------------
+@app.get("/trabajos/arranque")
+def obtener_estadisticas_arranque():
+    # Latencia de arranque de los últimos trabajos en frío, en caliente y en subproceso
+    return jobs.estadisticas_arranque()
+
+
+@app.get("/trabajos/{id_trabajo}")
+def obtener_trabajo(id_trabajo: str):
+    trabajo = jobs.leer_trabajo(id_trabajo)
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return trabajo
+
+
+@app.get("/trabajos/{id_trabajo}/progreso")
+def obtener_progreso_trabajo(id_trabajo: str):
+    progreso = jobs.progreso_trabajo(id_trabajo)
+    if progreso is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return progreso
+
+
+@app.post("/trabajos/{id_trabajo}/cancelar")
+def cancelar_trabajo(id_trabajo: str):
+    trabajo = jobs.cancelar_trabajo(id_trabajo)
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return trabajo
+
+
+@app.post("/trabajos/{id_trabajo}/detener")
+def detener_trabajo(id_trabajo: str):
+    # A diferencia de cancelar, el algoritmo termina en la siguiente generación y guarda su frente
+    trabajo = jobs.detener_trabajo(id_trabajo)
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return trabajo
+
+
+@app.get("/trabajos/{id_trabajo}/eventos")
+async def eventos_trabajo(id_trabajo: str):
+    # Server-Sent Events con el progreso y el frente de cada generación hasta que el trabajo termina
+    if jobs.leer_trabajo(id_trabajo) is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+
+    async def eventos():
+        async for progreso in jobs.eventos_trabajo(id_trabajo):
+            yield f"data: {json.dumps(progreso)}\n\n"
+
+    return StreamingResponse(eventos(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.websocket("/trabajos/{id_trabajo}/ws")
+async def progreso_trabajo_websocket(websocket: WebSocket, id_trabajo: str):
+    # Lo mismo que /eventos por WebSocket
+    await websocket.accept()
+    if jobs.leer_trabajo(id_trabajo) is None:
+        await websocket.close(code=1008, reason="Trabajo no encontrado")
+        return
+    try:
+        async for progreso in jobs.eventos_trabajo(id_trabajo):
+            await websocket.send_json(progreso)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
+@app.get("/trabajos/{id_trabajo}/resultado")
+def obtener_resultado_trabajo(id_trabajo: str, lineas: int = 200):
+    trabajo = jobs.leer_trabajo(id_trabajo)
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    if trabajo["estado"] not in jobs.ESTADOS_FINALES:
+        raise HTTPException(status_code=409, detail=f"El trabajo aún no ha terminado ({trabajo['estado']})")
+
+    # Las soluciones ya están en la base de datos, aquí se devuelve el final de la salida del script
+    return {**trabajo, "salida": jobs.salida_trabajo(id_trabajo, lineas)}
 
 
 @app.get("/csv_existe/{id_ruta_completa}")
@@ -633,6 +703,65 @@ async def obtener_soluciones_por_ruta(id_ruta_completa: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# ------------------------- Perfil de velocidad/potencia de una solución -------------------------
+@app.get("/perfil_solucion/{id_solucion}")
+def obtener_perfil_solucion(id_solucion: str, take_stops: bool = True):
+    try:
+        solucion = soluciones_collection.find_one({"Id_Solucion": id_solucion}, {"_id": 0})
+        if not solucion:
+            raise HTTPException(status_code=404, detail="Solución no encontrada")
+
+        route_path = f"./model/output_csv/SEG_{solucion['ruta_completa']}.csv"
+        if not os.path.exists(route_path):
+            raise HTTPException(status_code=404, detail="CSV de la ruta no encontrado")
+
+        vehiculo_data = vehiculos_collection.find_one({"Id_Vehiculo": solucion["vehiculo"]}, {"_id": 0})
+        if not vehiculo_data:
+            raise HTTPException(status_code=404, detail="Vehículo no encontrado")
+
+        # Modos de conducción en el orden de la solución
+        tramos = {tramo["Id_TramoSolucion"]: tramo for tramo in tramos_solucion_collection.find(
+            {"Id_TramoSolucion": {"$in": solucion["secuencia_tramos_solucion"]}},
+            {"_id": 0}
+        )}
+        modos = [tramos[id_tramo]["modo_conduccion"] == "eléctrico" for id_tramo in solucion["secuencia_tramos_solucion"]]
+
+        # El modelo solo se importa cuando se pide un perfil
+        model_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model")
+        if model_dir not in sys.path:
+            sys.path.append(model_dir)
+        from ReadRoute import read_route
+        from Truck import Truck
+        from HybridTruckProblem_Demo import HybridTruckProblem
+        from jmetal.core.solution import BinarySolution
+
+        route, _ = read_route(route_path)
+        truck = Truck(
+            identity=1,
+            route=route,
+            ICE_power=vehiculo_data["potencia_max_ice"],
+            EV_power=vehiculo_data["potencia_max_ev"],
+            acc=0.5,
+            charge=vehiculo_data["bateria"],
+            weight=vehiculo_data["peso"],
+            frontal_section=vehiculo_data["seccion_frontal"],
+            fuel_engine_efficiency=vehiculo_data["eficiencia_ice"],
+            electric_engine_efficiency=vehiculo_data["eficiencia_ev"]
+        )
+        problem = HybridTruckProblem(route=route, truck=truck, take_stops=take_stops)
+
+        if len(modos) != problem.number_of_variables:
+            raise HTTPException(status_code=409, detail="La solución no coincide con los tramos de la ruta")
+
+        solution = BinarySolution(number_of_variables=problem.number_of_variables, number_of_objectives=problem.number_of_objectives)
+        solution.variables = modos
+
+        return problem.speed_power_profile(solution)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/detalle_ruta_completa/{id_ruta_completa}")
 async def obtener_detalle_ruta_completa(id_ruta_completa: str):
     try:
@@ -1,160 +1,60 @@
-import ast
 import datetime
+import hashlib
 from Route import Route
 from Truck import Truck
 from ReadRoute import read_route
-from HybridTruckProblem_Demo import HybridTruckProblem
-
-from jmetal.algorithm.multiobjective.mocell import MOCell
+from HybridTruckProblem_Demo import HybridTruckProblem, SectionPowerCache
+from DynamicProgrammingSolver import DynamicProgrammingSolver
+from MilpSolver import MilpSolver
+from DecompositionSolver import DecompositionSolver
+from IslandModel import IslandMOCell
+from OptimizationResult import OptimizationResult
+from RoutePoolEvaluator import RoutePoolEvaluator
+
+from jmetal.algorithm.multiobjective.mocell import MOCell, SynchronousMOCell, AsynchronousMOCell
 from jmetal.util.solution import get_non_dominated_solutions
 from jmetal.util.termination_criterion import StoppingByEvaluations
 from jmetal.operator.selection import BinaryTournamentSelection
 from jmetal.operator.crossover import SBXCrossover, TPXCrossover
 from jmetal.operator.mutation import PolynomialMutation, UniformMutation, BitFlipMutation
-from jmetal.util.archive import CrowdingDistanceArchive
-from jmetal.util.evaluator import MultiprocessEvaluator
+from jmetal.util.archive import BiObjectiveCrowdingDistanceArchive
+from jmetal.util.evaluator import MultiprocessEvaluator, BatchEvaluator
 from jmetal.lab.visualization import Plot
 from jmetal.util.neighborhood import C9
 from jmetal.util.observer import ProgressBarObserver, WriteFrontToFileObserver
 from jmetal.util.constraint_handling import feasibility_ratio
-from CustomObservers import NonDomWriteFrontToFileObserver
+from CustomObservers import NonDomWriteFrontToFileObserver, ProgressFileObserver, StoppingByEvaluationsOrRequest
 
-from random import randint
 from tqdm import tqdm
 from time import time
-import pandas as pd
 import os
-import copy
 import sys
 import logging
 import json
-import uuid
-import os
-import re
 
-from multiprocessing import Process, Manager, Barrier
-from multiprocessing.shared_memory import ShareableList
 from uuid import uuid4
 
 LOGGER = logging.getLogger("jmetal")
 LOGGER.disabled = True
 
-def run_problem(process_id, problem, config_population_size, config_neighborhood,
-                config_archive, config_mutation_operator, config_crossover_operator,
-                config_max_evaluations, barrier, representatives,  
-                config_offspring_population_size):
-    # Create algorithm
-    algorithm = MOCell(problem = problem,
-                population_size = config_population_size,
-                neighborhood = config_neighborhood,
-                archive = config_archive,
-                mutation = config_mutation_operator(1.0 / len(problem.route.sections)),
-                crossover= config_crossover_operator,
-                termination_criterion = StoppingByEvaluations(max_evaluations=config_max_evaluations))
-    print("Algoritmo MOCell creado")
-    algorithm.observable.register(WriteFrontToFileObserver(f"./generation_front_files_process_{process_id}"))
-    #algorithm.observable.register(NonDomWriteFrontToFileObserver(f"./nondom_generation_front_files_process_{process_id}"))
-    
-    # Initialize population
-    algorithm.solutions = algorithm.create_initial_solutions()
-    
-    #################
-    #SYNCHRONIZATION
-    #################
-    
-    repre = algorithm.solutions[randint(0, config_population_size - 1)]
-    for index,_ in enumerate(representatives[process_id]):
-        representatives[process_id][index] = repre.variables[0][index]
-
-    barrier.wait()
-    algorithm.init_step()
-    barrier.wait()
-
-    evaluations = config_population_size
-    epochs = 1
-    print(f"Process {process_id}: EPOCH {epochs}")
-    
-    while evaluations < config_max_evaluations:
-        # Iteration i (t=1)
-        algorithm.run_step()
-        
-        evaluations += config_offspring_population_size
-        
-        if algorithm.current_individual == 0:
-            epochs += 1
-            #################
-            #SYNCHRONIZATION
-            #################
-            barrier.wait()
-
-            actual_front = algorithm.get_result()
-            repre = actual_front[randint(0, len(actual_front) - 1)]
-            for index,_ in enumerate(representatives[process_id]):
-                representatives[process_id][index] = repre.variables[0][index]                                                    
-
-            repres = actual_front
-
-            print(f"Process {process_id}: EPOCH {epochs}")
-            
+_mongo_client = None
 
-if __name__ == '__main__':
-    # # # ------------------------------------------------------------------------------------------ # # #
-    # # # --------------------Los siguientes parámetros son los configurables----------------------- # # #
-    # # # ------------------------------------------------------------------------------------------ # # #
 
-    try:
-        config_max_evaluations = int(sys.argv[1])
-        config_population_size = int(sys.argv[2])
-        config_offspring_population_size = int(sys.argv[3])
-        config_probability_crossover = float(sys.argv[4])
-        config_neighborhood_size = int(sys.argv[5])
-        config_take_stops = sys.argv[6].lower() == 'true'
-        config_process_id = int(sys.argv[7])
-        config_d_results = sys.argv[8]
-        config_ruta = sys.argv[9]
-        config_vehiculo_id = sys.argv[10]
-    except IndexError:
-        print("Faltan argumentos al ejecutar el script.")
-        print("Uso: python 000_main_algoritmo.py max_eval pop_size offspring_size crossover_prob neighborhood_size take_stops process_id output_dir nombre_ruta id_vehiculo")
-        sys.exit(1)
+def mongo_database():
+    """
+    Database of the application. The client is created once per process, so a long-lived worker
+    reuses its connections between runs.
+    """
+    global _mongo_client
+    if _mongo_client is None:
+        from pymongo import MongoClient
+        _mongo_client = MongoClient("mongodb://mongo:27017")
+    return _mongo_client["rutas"]
 
-    # # # ------------------------------------------------------------------------------------------ # # #
-    # # # ------------------------------------------------------------------------------------------ # # #
-    # # # ------------------------------------------------------------------------------------------ # # #
 
-    # AQUI LEO EL CSV DE LA RUTA. ESTO DEBES PARSEARLO
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    route_path = os.path.join(script_dir, "output_csv", f"SEG_{config_ruta}.csv")
+def build_problem(route_path: str, vehiculo_data: dict, take_stops: bool, process_id: int) -> HybridTruckProblem:
     route, _ = read_route(route_path)
 
-
-
-
-
-    config_neighborhood = C9(config_neighborhood_size, config_neighborhood_size)
-    config_crossover_operator = TPXCrossover(config_probability_crossover)
-    config_mutation_operator = BitFlipMutation
-    config_selection_operator = BinaryTournamentSelection()
-    extra = "_stops" if config_take_stops else ""
-    d_name = f"{config_ruta}{extra}"
-    config_archive = CrowdingDistanceArchive(config_population_size)
-
-    # 🔵 Leer el ID de vehículo
-    config_vehiculo_id = sys.argv[10]
-
-    # 🔵 Conectar a MongoDB
-    from pymongo import MongoClient
-    client = MongoClient("mongodb://mongo:27017")
-    db = client["rutas"]
-    vehiculos_collection = db["Vehiculo"]
-
-    # 🔵 Buscar el vehículo
-    vehiculo_data = vehiculos_collection.find_one({"Id_Vehiculo": config_vehiculo_id})
-
-    if not vehiculo_data:
-        print(f"❌ Vehículo con ID {config_vehiculo_id} no encontrado.")
-        sys.exit(1)
-
     # 🔵 Crear Truck con los datos del vehículo
     truck = Truck(
         identity=1,
@@ -169,37 +69,101 @@ if __name__ == '__main__':
         electric_engine_efficiency=vehiculo_data["eficiencia_ev"]
     )
 
-    problem = HybridTruckProblem(route=route, truck=truck, process_id=config_process_id, take_stops=config_take_stops)
-    
-    # Create algorithm
-    algorithm = MOCell(problem = problem,
-                population_size = config_population_size,
-                neighborhood = config_neighborhood,
-                archive = config_archive,
-                mutation = config_mutation_operator(2.0 / len(problem.route.sections)),
-                crossover= config_crossover_operator,
-                termination_criterion = StoppingByEvaluations(max_evaluations=config_max_evaluations))
-    algorithm.observable.register(WriteFrontToFileObserver(f"{config_d_results}/output_results_{d_name}/generation_front_files_process_{config_process_id}"))
-    begin = time()
-    # Initialize population
-
-    print("Ejecutando .run()")
-    algorithm.run()
-    solutions = algorithm.get_result()
-
-    # Ruta al archivo FUN con las métricas por solución
-    fun_path = f"{config_d_results}/output_results_{d_name}/generation_front_files_process_{config_process_id}/FUN.1"
-
-    if not os.path.exists(fun_path):
-        print("Archivo FUN no encontrado:", fun_path)
-        sys.exit(1)
-
-    with open(fun_path, "r") as f:
-        fun_lines = [line.strip() for line in f.readlines() if line.strip()]
-
-    from pymongo import MongoClient
-    client = MongoClient("mongodb://mongo:27017")
-    db = client["rutas"]
+    # Cache de simulaciones de tramos, su tamaño se ajusta por despliegue (0 la desactiva)
+    config_section_cache_size = int(os.environ.get("EDP_SECTION_CACHE_SIZE", 200000))
+    section_cache = SectionPowerCache(max_size=config_section_cache_size) if config_section_cache_size > 0 else None
+
+    # Tabla de energias precalculada por tramo, ancho de los intervalos de velocidad en m/s. Es una aproximación
+    # (ver SectionEnergyTable), por defecto 0: simulación exacta
+    config_energy_table_bucket = float(os.environ.get("EDP_ENERGY_TABLE_BUCKET", 0))
+
+    return HybridTruckProblem(route=route, truck=truck, process_id=process_id, take_stops=take_stops,
+                              section_cache=section_cache, energy_table_bucket=config_energy_table_bucket or None)
+
+
+# Opciones de la petición (opcionesAlgoritmo) de los algoritmos que no son MOCell: nombre -> (argumento, tipo)
+SOLVER_OPTIONS = {
+    "dp": {"intervalosSoc": ("soc_buckets", int),
+           "etiquetasPorEstado": ("labels_per_state", int),
+           "puntosPorTramo": ("leg_front_size", int),
+           "tamanoFrente": ("front_size", int)},
+    "milp": {"puntos": ("points", int),
+             "tiempoLimite": ("time_limit", float),
+             "gapRelativo": ("mip_rel_gap", float)},
+    "decomposition": {"procesos": ("processes", int),
+                      "rejilla": ("grid_size", int),
+                      "evaluacionesPorVariable": ("evaluations_per_variable", int),
+                      "evaluacionesMinimas": ("min_evaluations", int),
+                      "variablesExhaustivo": ("exhaustive_variables", int),
+                      "puntosPorTramo": ("leg_front_size", int),
+                      "tamanoFrente": ("front_size", int)},
+}
+
+
+def solver_arguments(algorithm: str, options: dict) -> dict:
+    """
+    Constructor arguments of the dp, milp or decomposition solver from the options of the request
+    (see SOLVER_OPTIONS). A null value is passed as None.
+
+    :raises ValueError: with the message for the user if an option is unknown or has a wrong value
+    """
+    known = SOLVER_OPTIONS[algorithm]
+    unknown = [name for name in options if name not in known]
+    if unknown:
+        raise ValueError(f"Opciones desconocidas para {algorithm}: {', '.join(unknown)} ({', '.join(known)})")
+
+    arguments = {}
+    for name, value in options.items():
+        argument, value_type = known[name]
+        try:
+            arguments[argument] = None if value is None else value_type(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Valor no válido para la opción {name} de {algorithm}: {value!r}")
+    return arguments
+
+
+VEHICLE_FIELDS = ("potencia_max_ice", "potencia_max_ev", "bateria", "peso", "seccion_frontal", "eficiencia_ice",
+                  "eficiencia_ev")
+
+
+def cached_problem(problem_cache, route_path: str, vehiculo_data: dict, take_stops: bool,
+                   process_id: int) -> HybridTruckProblem:
+    """
+    Problem of the route and the vehicle, taken from problem_cache if it was already built for the
+    same route file (and contents), vehicle data and options, or built and stored in it.
+    A cached problem keeps its energy table, section cache, leg memory and heuristic seeds, and is
+    restarted before being solved again. problem_cache is an OrderedDict, at most
+    EDP_PROBLEM_CACHE_SIZE problems are kept; None builds a new problem.
+    """
+    if problem_cache is None:
+        return build_problem(route_path, vehiculo_data, take_stops, process_id)
+
+    # El backend vuelve a generar el CSV en cada petición, así que se compara su contenido y no su fecha
+    with open(route_path, "rb") as route_file:
+        route_digest = hashlib.sha1(route_file.read()).hexdigest()
+    key = (route_path, route_digest, tuple(vehiculo_data[field] for field in VEHICLE_FIELDS),
+           take_stops, process_id, os.environ.get("EDP_SECTION_CACHE_SIZE"), os.environ.get("EDP_ENERGY_TABLE_BUCKET"))
+    problem = problem_cache.get(key)
+    if problem is not None:
+        print("Problema de la ruta y el vehículo en cache")
+        problem_cache.move_to_end(key)
+        problem.restart()
+        return problem
+
+    problem = build_problem(route_path, vehiculo_data, take_stops, process_id)
+    problem_cache[key] = problem
+    while len(problem_cache) > int(os.environ.get("EDP_PROBLEM_CACHE_SIZE", 8)):
+        problem_cache.popitem(last=False)
+    return problem
+
+
+def store_result(db, result: OptimizationResult, config_ruta: str, config_vehiculo_id: str) -> int:
+    """
+    Stores the solutions of the result in the database: one Tramo_Solucion document per section of
+    every solution and one Solucion document with the sequence of its sections.
+
+    :return: number of solutions stored
+    """
     tramos_solucion_collection = db["Tramo_Solucion"]
     soluciones_collection = db["Solucion"]
     #Posible Quitar
@@ -222,64 +186,54 @@ if __name__ == '__main__':
 
     soluciones_almacenadas = 0
 
-    for i in range(min(len(solutions), len(fun_lines))):
-        sol = solutions[i]
+    for i, sol in enumerate(result.solutions):
         print(f"Solución {i}:")
-        print(sol.variables)  # Accedemos a la lista interna de variables
+        print(sol.variables)
 
-        fun_line = fun_lines[i].strip()
-        
         try:
-            # Extraer listas con regex
-            listas = re.findall(r"\[[^\]]*\]", fun_line)
-            
-            # El formato real parece tener 3 listas: [kgCO2], [kWh], [otros valores]
-            if len(listas) < 3:
-                print(f"Línea {i} no contiene suficientes listas: {listas}")
+            # Trazas por sección de la solución, con el mismo mapeo a los campos que las listas del FUN
+            listas = sol.traces
+            if listas is None or len(listas) < 4:
+                print(f"Solución {i} sin trazas por sección")
                 continue
 
-            # Parsear las listas relevantes (índices ajustados al formato real)
-            lista_emisiones = ast.literal_eval(listas[0])  # Primera lista: emisiones
-            lista_kwh = ast.literal_eval(listas[1])       # Segunda lista: kWh
-            lista_soc = ast.literal_eval(listas[2])           # SOC (State of Charge)
-            lista_regenerados = ast.literal_eval(listas[3])   # kWh regenerados (negativos)
-            
+            lista_emisiones = listas[0]  # Primera lista: emisiones
+            lista_kwh = listas[1]       # Segunda lista: kWh
+            lista_soc = listas[2]           # SOC (State of Charge)
+            lista_regenerados = listas[3]   # kWh regenerados (negativos)
+
             # Verificar consistencia de longitudes
             if len(sol.variables) != len(lista_emisiones) or len(sol.variables) != len(lista_kwh):
                 print(f"Discrepancia en longitudes - Solución {i}: Variables={len(sol.variables)}, Emisiones={len(lista_emisiones)}, KWh={len(lista_kwh)}")
                 continue
 
-            id_solucion = str(uuid4())
-            tramos_solucion_ids = []
-                
-            # Procesar cada tramo de la solución
-            for index, activado in enumerate(sol.variables):
-
-                id_tramo_sol = str(uuid4())
+            print(f"[DEBUG] Len variables: {len(sol.variables)}, Len tramos_ids: {len(tramos_ids)}")
 
-                print(f"[DEBUG] Len variables: {len(sol.variables)}, Len tramos_ids: {len(tramos_ids)}")
+            id_solucion = str(uuid4())
 
-                tramo_sol = {
-                    "Id_TramoSolucion": id_tramo_sol,
-                    "Id_TramoOriginal": tramos_ids[index], 
-                    "modo_conduccion": "eléctrico" if activado else "combustión",
-                    "soc": float(lista_regenerados[index]),  
-                    "recarga": float(lista_soc[index]) * -1, 
-                    "emisiones": float(lista_emisiones[index]),
-                    "energia_consumida": float(lista_kwh[index])
-                }
+            # Un documento por tramo de la solución, insertados de una vez
+            tramos_sol = [{
+                "Id_TramoSolucion": str(uuid4()),
+                "Id_TramoOriginal": tramos_ids[index],
+                "modo_conduccion": "eléctrico" if activado else "combustión",
+                "soc": float(lista_regenerados[index]),
+                "recarga": float(lista_soc[index]) * -1,
+                "emisiones": float(lista_emisiones[index]),
+                "energia_consumida": float(lista_kwh[index])
+            } for index, activado in enumerate(sol.variables)]
 
-                tramos_solucion_collection.insert_one(tramo_sol)
-                tramos_solucion_ids.append(id_tramo_sol)
+            tramos_solucion_collection.insert_many(tramos_sol)
 
             # Crear documento de solución
             solucion = {
                 "Id_Solucion": id_solucion,
-                "secuencia_tramos_solucion": tramos_solucion_ids,
+                "secuencia_tramos_solucion": [tramo_sol["Id_TramoSolucion"] for tramo_sol in tramos_sol],
                 "ruta_completa": config_ruta,
                 "vehiculo": config_vehiculo_id,
                 "fecha_creacion": datetime.datetime.now()
             }
+            if result.optimality_gap is not None:
+                solucion["gap_optimalidad"] = result.optimality_gap
 
             soluciones_collection.insert_one(solucion)
             soluciones_almacenadas += 1
@@ -289,4 +243,197 @@ if __name__ == '__main__':
             print(f"Error al procesar solución {i}: {str(e)}")
             continue
 
-    print(f"Se han almacenado {soluciones_almacenadas} soluciones válidas de {len(solutions)} posibles en la base de datos.")
+    print(f"Se han almacenado {soluciones_almacenadas} soluciones válidas de {len(result)} posibles en la base de datos.")
+    return soluciones_almacenadas
+
+
+def main(argv, problem_cache=None, progress_path: str = None, stop_path: str = None):
+    """
+    Runs the algorithm chosen in argv (the arguments of the script, argv[0] being its name), writes
+    its final front to FUN.final/VAR.final and stores its solutions in the database.
+
+    :param problem_cache: problems already built, see cached_problem (None = no cache)
+    :param progress_path: file where the progress of the MOCell algorithms is written
+    :param stop_path: file whose creation stops the MOCell algorithms early, keeping their result
+    :return: the OptimizationResult of the run
+    """
+    # # # ------------------------------------------------------------------------------------------ # # #
+    # # # --------------------Los siguientes parámetros son los configurables----------------------- # # #
+    # # # ------------------------------------------------------------------------------------------ # # #
+
+    try:
+        config_max_evaluations = int(argv[1])
+        config_population_size = int(argv[2])
+        config_offspring_population_size = int(argv[3])
+        config_probability_crossover = float(argv[4])
+        config_neighborhood_size = int(argv[5])
+        config_take_stops = argv[6].lower() == 'true'
+        config_process_id = int(argv[7])
+        config_d_results = argv[8]
+        config_ruta = argv[9]
+        config_vehiculo_id = argv[10]
+        # Opcionales: algoritmo (mocell, islands, dp, milp o decomposition) y sus opciones en JSON
+        config_algoritmo = argv[11].lower() if len(argv) > 11 else "mocell"
+        config_opciones_algoritmo = json.loads(argv[12]) if len(argv) > 12 else {}
+    except IndexError:
+        print("Faltan argumentos al ejecutar el script.")
+        print("Uso: python 000_main_algoritmo.py max_eval pop_size offspring_size crossover_prob neighborhood_size take_stops process_id output_dir nombre_ruta id_vehiculo [algoritmo] [opciones_json]")
+        sys.exit(1)
+
+    if config_algoritmo not in ("mocell", "islands", "dp", "milp", "decomposition"):
+        print(f"Algoritmo desconocido: {config_algoritmo} (mocell, islands, dp, milp o decomposition)")
+        sys.exit(1)
+    if config_algoritmo in SOLVER_OPTIONS:
+        try:
+            config_argumentos_solver = solver_arguments(config_algoritmo, config_opciones_algoritmo)
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+
+    # # # ------------------------------------------------------------------------------------------ # # #
+    # # # ------------------------------------------------------------------------------------------ # # #
+    # # # ------------------------------------------------------------------------------------------ # # #
+
+    # AQUI LEO EL CSV DE LA RUTA. ESTO DEBES PARSEARLO
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    route_path = os.path.join(script_dir, "output_csv", f"SEG_{config_ruta}.csv")
+
+    config_neighborhood = C9(config_neighborhood_size, config_neighborhood_size)
+    config_crossover_operator = TPXCrossover(config_probability_crossover)
+    config_mutation_operator = BitFlipMutation
+    config_selection_operator = BinaryTournamentSelection()
+    extra = "_stops" if config_take_stops else ""
+    d_name = f"{config_ruta}{extra}"
+    config_archive = BiObjectiveCrowdingDistanceArchive(config_population_size)
+
+    # 🔵 Conectar a MongoDB
+    db = mongo_database()
+    vehiculos_collection = db["Vehiculo"]
+
+    # 🔵 Buscar el vehículo
+    vehiculo_data = vehiculos_collection.find_one({"Id_Vehiculo": config_vehiculo_id})
+
+    if not vehiculo_data:
+        print(f"❌ Vehículo con ID {config_vehiculo_id} no encontrado.")
+        sys.exit(1)
+
+    problem = cached_problem(problem_cache, route_path, vehiculo_data, config_take_stops, config_process_id)
+    section_cache = problem.section_cache
+
+    # Carpeta de los archivos FUN/VAR con el frente final (y los de cada generación, si se piden)
+    front_files_dir = f"{config_d_results}/output_results_{d_name}/generation_front_files_process_{config_process_id}"
+
+    # El backend indica dónde escribir el progreso cuando el algoritmo se ejecuta como trabajo
+    progress_observer = ProgressFileObserver(progress_path) if progress_path else None
+
+    begin = time()
+    if config_algoritmo == "dp":
+        # Frente aproximado por programación dinámica sobre cada tramo entre paradas (SOC discretizado):
+        # "intervalosSoc", "etiquetasPorEstado", "puntosPorTramo" y "tamanoFrente"
+        algorithm = DynamicProgrammingSolver(problem, **config_argumentos_solver)
+        print("Ejecutando programación dinámica")
+        algorithm.run()
+        solutions = algorithm.get_result()
+        print(f"Programación dinámica (heurística, SOC en {algorithm.soc_buckets} intervalos, "
+              f"{algorithm.labels_per_state} etiquetas por estado): {len(solutions)} soluciones en "
+              f"{algorithm.total_computing_time:.2f} s, {len(algorithm.infeasible_legs)} tramos sin solución válida")
+    elif config_algoritmo == "milp":
+        # Barrido epsilon-restricción de un modelo entero mixto resuelto con HiGHS: "puntos", "tiempoLimite" y "gapRelativo"
+        algorithm = MilpSolver(problem, **config_argumentos_solver)
+        print("Ejecutando MILP")
+        algorithm.run()
+        solutions = algorithm.get_result()
+        print(f"MILP: {len(solutions)} soluciones en {algorithm.total_computing_time:.2f} s, "
+              f"{algorithm.solves} resoluciones, gap de optimalidad máximo {algorithm.mip_gap:.2e}")
+    elif config_algoritmo == "islands":
+        # Islas MOCell en procesos separados con migraciones por memoria compartida:
+        # "islas" (una por núcleo por defecto), "generacionesMigracion", "migrantes", "modo" y "semilla"
+        algorithm = IslandMOCell(problem, config_population_size, config_neighborhood_size, config_probability_crossover,
+                                 config_max_evaluations,
+                                 islands=int(config_opciones_algoritmo.get("islas") or 0) or None,
+                                 migration_generations=int(config_opciones_algoritmo.get("generacionesMigracion", 10)),
+                                 migrants=int(config_opciones_algoritmo.get("migrantes", 1)),
+                                 synchronous=config_opciones_algoritmo.get("modo") == "sincrono",
+                                 seed=config_opciones_algoritmo.get("semilla"))
+        print(f"Ejecutando {algorithm.islands} islas MOCell")
+        algorithm.run()
+        solutions = algorithm.get_result()
+        print(f"Islas: {len(solutions)} soluciones en {algorithm.total_computing_time:.2f} s")
+    elif config_algoritmo == "decomposition":
+        # Un MOCell por tramo entre paradas, en paralelo, y unión de los frentes de los tramos: "procesos", "rejilla",
+        # "evaluacionesPorVariable", "evaluacionesMinimas", "variablesExhaustivo", "puntosPorTramo" y "tamanoFrente"
+        algorithm = DecompositionSolver(problem, crossover_probability=config_probability_crossover,
+                                        **config_argumentos_solver)
+        print(f"Ejecutando descomposición por tramos ({len(problem.legs)} tramos, {algorithm.processes} procesos)")
+        algorithm.run()
+        solutions = algorithm.get_result()
+        print(f"Descomposición: {len(solutions)} soluciones en {algorithm.total_computing_time:.2f} s")
+    else:
+        # "modo": "sincrono" evalúa cada generación entera de una vez (la versión estacionaria evalúa de una en una)
+        # y "asincrono" mantiene "evaluacionesEnCurso" hijos evaluándose a la vez en "procesos" procesos
+        config_modo = config_opciones_algoritmo.get("modo", "estacionario")
+        # Con "procesos" > 1 en las opciones las generaciones del modo síncrono se evalúan en un pool de procesos
+        # persistente. El estacionario evalúa un hijo por paso: el pool no le da paralelismo y perdería la evaluación
+        # incremental de los tramos (leg_cache), así que usa el evaluador por defecto
+        config_procesos = int(config_opciones_algoritmo.get("procesos", 1))
+        population_evaluator = RoutePoolEvaluator(config_procesos) if config_procesos > 1 and config_modo == "sincrono" \
+            else BatchEvaluator()
+        if config_modo == "asincrono":
+            # Evalúa en sus propios procesos, sin evaluador de la población
+            algorithm_class = AsynchronousMOCell
+            algorithm_options = {"number_of_workers": config_procesos if "procesos" in config_opciones_algoritmo else None,
+                                 "in_flight": config_opciones_algoritmo.get("evaluacionesEnCurso")}
+        else:
+            algorithm_class = SynchronousMOCell if config_modo == "sincrono" else MOCell
+            algorithm_options = {"population_evaluator": population_evaluator}
+
+        # El backend puede pedir que el algoritmo pare antes, quedándose con el frente que lleva
+        termination_criterion = StoppingByEvaluationsOrRequest(config_max_evaluations, stop_path) if stop_path \
+            else StoppingByEvaluations(max_evaluations=config_max_evaluations)
+
+        # Create algorithm
+        algorithm = algorithm_class(problem = problem,
+                    population_size = config_population_size,
+                    neighborhood = config_neighborhood,
+                    archive = config_archive,
+                    mutation = config_mutation_operator(2.0 / len(problem.route.sections)),
+                    crossover= config_crossover_operator,
+                    termination_criterion = termination_criterion,
+                    **algorithm_options)
+        # Los frentes de cada generación (FUN.x y VAR.x) solo se escriben si se piden con "escribirGeneraciones"
+        if config_opciones_algoritmo.get("escribirGeneraciones", False):
+            algorithm.observable.register(WriteFrontToFileObserver(front_files_dir))
+        if progress_observer is not None:
+            algorithm.observable.register(progress_observer)
+        # Initialize population
+
+        print("Ejecutando .run()")
+        try:
+            algorithm.run()
+        finally:
+            if isinstance(population_evaluator, RoutePoolEvaluator):
+                population_evaluator.close()
+            if progress_observer is not None:
+                progress_observer.flush()
+        if config_modo == "asincrono":
+            # Los procesos solo devuelven los objetivos, las trazas por tramo del frente final se calculan aquí
+            population_evaluator.evaluate(algorithm.get_result(), problem)
+    if section_cache is not None:
+        print(f"Cache de tramos: {section_cache.stats()}")
+    if problem.leg_memo is not None:
+        print(f"Memoria de tramos entre paradas: {problem.leg_memo.stats()}")
+
+    # El frente pasa del archivo del algoritmo a la base de datos en memoria, el FUN/VAR final solo se escribe
+    result = OptimizationResult.from_algorithm(algorithm)
+    result.write_files(front_files_dir)
+    print(f"{result.algorithm}: {len(result)} soluciones en {result.computing_time:.2f} s (total {time() - begin:.2f} s)")
+    if progress_observer is not None and result.optimality_gap is not None:
+        # El gap de optimalidad del MILP pasa al estado del trabajo con el último progreso
+        progress_observer.write(0, result.computing_time, optimality_gap=result.optimality_gap)
+
+    store_result(db, result, config_ruta, config_vehiculo_id)
+    return result
+
+
+if __name__ == '__main__':
+    main(sys.argv, progress_path=os.environ.get("EDP_PROGRESS_FILE"), stop_path=os.environ.get("EDP_STOP_FILE"))
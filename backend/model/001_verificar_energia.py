@@ -0,0 +1,111 @@
+"""
+Verificacion del modelo energetico vectorizado.
+
+Compara con el section_power escalar (simulacion segundo a segundo, la referencia) las dos
+alternativas del modelo: section_power_batch (NumPy) y section_power_closed_form (motor analitico).
+Se prueban todas las secciones de las rutas indicadas, en ambos modos (electrico y combustion) y con
+varias velocidades de entrada.
+
+Tambien informa de la desviacion maxima de la tabla de energias precalculada (SectionEnergyTable)
+respecto a la simulacion exacta para varios anchos de intervalo.
+
+Uso:
+    python 001_verificar_energia.py [ruta1.csv ruta2.csv ...]
+
+Si no se indica ninguna ruta se usan todos los CSV de ./output_csv
+"""
+import glob
+import os
+import sys
+from time import time
+
+import numpy as np
+
+from ReadRoute import read_route
+from Truck import Truck
+from HybridTruckProblem_Demo import section_power, section_power_batch, section_power_closed_form, SectionEnergyTable
+
+TOLERANCIA = 1e-9
+# El motor analitico suma las fases en forma cerrada, se compara con error relativo en la energia
+TOLERANCIA_CLOSED_FORM = 1e-6
+# Anchos de intervalo (m/s) de la tabla de energias que se evaluan
+INTERVALOS_TABLA = (1.0, 0.25, 0.05)
+
+
+def casos_de_prueba(route, truck):
+    # Cada seccion se prueba arrancando parado, a su propia velocidad y a la velocidad de la anterior
+    vo, vf, slope, distance, max_power = [], [], [], [], []
+    previous_speed = 0
+    for section in route.sections:
+        for entry_speed in (0, section.speed, previous_speed):
+            for engine_power in (truck.EV_power, truck.ICE_power):
+                vo.append(entry_speed)
+                vf.append(section.speed)
+                slope.append(section.slope)
+                distance.append(section.distance)
+                max_power.append(engine_power)
+        previous_speed = section.speed
+    return [np.array(l, dtype=float) for l in (vo, vf, slope, distance, max_power)]
+
+
+def verificar_ruta(input_file):
+    route, _ = read_route(input_file)
+    truck = Truck(1, route)
+    vo, vf, slope, distance, max_power = casos_de_prueba(route, truck)
+
+    start = time()
+    scalar = [section_power(vo[i], vf[i], truck.acc, slope[i], distance[i], max_power[i], i,
+                            truck.weight, truck.frontal_section) for i in range(len(vo))]
+    scalar_time = time() - start
+
+    start = time()
+    speed, kwh, regen = section_power_batch(vo, vf, truck.acc, slope, distance, max_power,
+                                            truck.weight, truck.frontal_section)
+    batch_time = time() - start
+
+    start = time()
+    closed_form = [section_power_closed_form(vo[i], vf[i], truck.acc, slope[i], distance[i], max_power[i], i,
+                                             truck.weight, truck.frontal_section) for i in range(len(vo))]
+    closed_form_time = time() - start
+
+    scalar_speed = np.array([r[0] for r in scalar])
+    scalar_kwh = np.array([r[1] for r in scalar])
+    scalar_regen = np.array([r[4] for r in scalar])
+
+    name = os.path.basename(input_file)
+    print(f"{name}: {len(vo)} casos, escalar={scalar_time:.3f}s")
+
+    error_speed = np.max(np.abs(speed - scalar_speed))
+    error_kwh = np.max(np.abs(kwh - scalar_kwh))
+    error_regen = np.max(np.abs(regen - scalar_regen))
+    ok_batch = max(error_speed, error_kwh, error_regen) <= TOLERANCIA
+    print(f"  vectorizado: error velocidad={error_speed:.2e} kWh={error_kwh:.2e} regen={error_regen:.2e} | "
+          f"{batch_time:.3f}s ({scalar_time / max(batch_time, 1e-9):.1f}x) -> {'OK' if ok_batch else 'ERROR'}")
+
+    error_speed = np.max(np.abs(np.array([r[0] for r in closed_form]) - scalar_speed))
+    error_kwh = np.max(np.abs(np.array([r[1] for r in closed_form]) - scalar_kwh) / np.maximum(np.abs(scalar_kwh), 1e-6))
+    error_regen = np.max(np.abs(np.array([r[2] for r in closed_form]) - scalar_regen))
+    ok_closed_form = max(error_speed, error_kwh, error_regen) <= TOLERANCIA_CLOSED_FORM
+    print(f"  closed_form: error velocidad={error_speed:.2e} kWh(rel)={error_kwh:.2e} regen={error_regen:.2e} | "
+          f"{closed_form_time:.3f}s ({scalar_time / max(closed_form_time, 1e-9):.1f}x) -> {'OK' if ok_closed_form else 'ERROR'}")
+
+    for speed_bucket in INTERVALOS_TABLA:
+        start = time()
+        table = SectionEnergyTable(route, truck, speed_bucket)
+        build_time = time() - start
+        deviation = table.max_deviation()
+        print(f"  tabla ({speed_bucket} m/s): construccion={build_time:.3f}s | desviacion maxima "
+              f"velocidad={deviation['exit_speed']:.3f} kWh={deviation['kwh']:.4f} regen={deviation['regen']:.4f} "
+              f"(kWh medio={deviation['kwh_mean']:.2e})")
+
+    return ok_batch and ok_closed_form
+
+
+if __name__ == "__main__":
+    files = sys.argv[1:] or sorted(glob.glob("./output_csv/*.csv"))
+    if not files:
+        print("No hay rutas que verificar")
+        sys.exit(1)
+
+    results = [verificar_ruta(f) for f in files]
+    sys.exit(0 if all(results) else 1)
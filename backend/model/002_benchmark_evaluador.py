@@ -0,0 +1,96 @@
+"""
+Rendimiento del evaluador con pool de procesos persistente (RoutePoolEvaluator).
+
+Evalua poblaciones aleatorias de la ruta con el BatchEvaluator (un solo proceso, la referencia) y
+con el RoutePoolEvaluator de 1 a N procesos, y muestra para cada caso el tiempo de arranque del
+pool, las evaluaciones por segundo y la aceleracion respecto a la referencia. Cada medida usa una
+poblacion nueva, para que la memoria de tramos de los procesos no haga de cache entre medidas.
+
+Uso:
+    python 002_benchmark_evaluador.py ruta.csv [soluciones] [procesos_max] [repeticiones]
+
+Por defecto 200 soluciones, tantos procesos como nucleos y 3 repeticiones.
+"""
+import contextlib
+import copy
+import io
+import os
+import random
+import sys
+from time import time
+
+from ReadRoute import read_route
+from Truck import Truck
+from HybridTruckProblem_Demo import HybridTruckProblem, SectionPowerCache
+from RoutePoolEvaluator import RoutePoolEvaluator
+
+from jmetal.util.evaluator import BatchEvaluator
+
+
+def poblacion(problem, size):
+    solutions = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(size):
+            solution = copy.copy(problem.create_solution())
+            solution.attributes = {}
+            solutions.append(solution)
+    return solutions
+
+
+def medir(evaluator, problem, size, repeticiones):
+    # La salida de la evaluacion (una linea por solucion reparada) se descarta para no medir la consola;
+    # la de los procesos del pool la descartan ellos mismos (quiet)
+    tiempos = []
+    for _ in range(repeticiones):
+        solutions = poblacion(problem, size)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time()
+            evaluator.evaluate(solutions, problem)
+            tiempos.append(time() - start)
+    return min(tiempos)
+
+
+def numero_de_procesos(maximo):
+    procesos = [1]
+    while procesos[-1] * 2 <= maximo:
+        procesos.append(procesos[-1] * 2)
+    if procesos[-1] != maximo:
+        procesos.append(maximo)
+    return procesos
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    input_file = sys.argv[1]
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    procesos_max = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count()
+    repeticiones = int(sys.argv[4]) if len(sys.argv) > 4 else 3
+
+    route, _ = read_route(input_file)
+    truck = Truck(1, route)
+    config_energy_table_bucket = float(os.environ.get("EDP_ENERGY_TABLE_BUCKET", 0))
+    problem = HybridTruckProblem(route=route, truck=truck, take_stops=True, section_cache=SectionPowerCache(),
+                                 energy_table_bucket=config_energy_table_bucket or None)
+    random.seed(1)
+    # La primera poblacion calcula la heuristica (y l_segments_kwh, que usa la reparacion)
+    with contextlib.redirect_stdout(io.StringIO()):
+        problem.create_solution()
+
+    print(f"{os.path.basename(input_file)}: {len(route.sections)} secciones, {problem.number_of_variables} variables, "
+          f"{len(problem.legs)} tramos, {size} soluciones por lote")
+
+    referencia = medir(BatchEvaluator(), problem, size, repeticiones)
+    print(f"  BatchEvaluator: {referencia:.3f}s ({size / referencia:.0f} evaluaciones/s)")
+
+    for procesos in numero_de_procesos(procesos_max):
+        with RoutePoolEvaluator(procesos, quiet=True) as evaluator:
+            start = time()
+            with contextlib.redirect_stdout(io.StringIO()):
+                evaluator.evaluate(poblacion(problem, procesos), problem)
+            arranque = time() - start
+            tiempo = medir(evaluator, problem, size, repeticiones)
+        print(f"  RoutePoolEvaluator({procesos}): arranque={arranque:.3f}s | {tiempo:.3f}s "
+              f"({size / tiempo:.0f} evaluaciones/s, {referencia / tiempo:.2f}x)")
@@ -0,0 +1,82 @@
+from collections import OrderedDict
+import os
+import threading
+
+
+class BoundedLRUCache:
+    """
+    Thread-safe LRU cache of at most max_size entries, the base of the caches of the model (see
+    SectionPowerCache and LegResultMemo, which only differ in the key they build).
+
+    A forked evaluator worker keeps a private copy of the entries with fresh lock and counters, and a
+    pickled cache (spawned workers) travels empty, keeping only the options returned by _options.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._reset()
+
+    def _reset(self, keep_entries: bool = False):
+        if not keep_entries:
+            self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _check_process(self):
+        # Tras un fork el lock podria haberse copiado cerrado: cada proceso usa el suyo
+        if self._pid != os.getpid():
+            self._reset(keep_entries=True)
+
+    def _options(self) -> dict:
+        """
+        Attributes kept when the cache is pickled, subclasses add their own.
+        """
+        return {"max_size": self.max_size}
+
+    def get(self, key, compute):
+        """
+        Returns the value stored for key, calling compute() and storing its result on a miss.
+        """
+        self._check_process()
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        self._check_process()
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        self._check_process()
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "size": len(self._entries), "max_size": self.max_size,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        return self._options()
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._reset()
@@ -1,5 +1,7 @@
+import json
 import logging
 import os
+import time
 from pathlib import Path
 from typing import List, TypeVar
 
@@ -12,6 +14,8 @@ from jmetal.core.quality_indicator import InvertedGenerationalDistance
 from jmetal.lab.visualization import Plot, StreamingPlot
 from jmetal.util.solution import print_function_values_to_file,print_variables_to_file
 from jmetal.util.solution import get_non_dominated_solutions
+from jmetal.util.termination_criterion import StoppingByEvaluations
+from LegFronts import pareto_filter, thin_front
 
 S = TypeVar("S")
 
@@ -104,3 +108,73 @@ class NonDomPlotFrontToFileObserver(Observer):
                         filename=f"{self.directory}/front-{evaluations}",
                     )
                     self.counter += 1
+
+
+class ProgressFileObserver(Observer):
+    def __init__(self, path: str, min_interval: float = 0.5, front_size: int = 50) -> None:
+        """Write the progress of the algorithm into a JSON file, replaced atomically so the backend can read
+        it while the algorithm runs: evaluations, computing time, size of the archive and its front of
+        (green km, emissions) thinned to front_size points. The file is written at most once every
+        min_interval seconds (the notifications in between are coalesced into the next write, see flush),
+        so the observer costs the algorithm almost nothing. It is written for the first time when the
+        observer is created, with the time the run starts at.
+        :param path: Path of the progress file.
+        :param min_interval: Minimum time between two writes, in seconds.
+        :param front_size: Maximum number of points of the front written."""
+        self.path = path
+        self.min_interval = min_interval
+        self.front_size = front_size
+        self.start_time = time.time()
+        self.last_write = 0.0
+        self.pending = None
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.write(0, 0.0)
+
+    def update(self, *args, **kwargs):
+        self.pending = (kwargs["EVALUATIONS"], kwargs["COMPUTING_TIME"], kwargs.get("SOLUTIONS"))
+        if time.time() - self.last_write >= self.min_interval:
+            self.flush()
+
+    def flush(self):
+        """Write the last notification not written yet, if any (e.g. the last one of the run)."""
+        if self.pending is not None:
+            self.write(*self.pending)
+            self.pending = None
+
+    def write(self, evaluations: int, computing_time: float, solutions: List = None, optimality_gap: float = None):
+        progress = {"evaluaciones": evaluations, "tiempo": round(computing_time, 2), "inicio": self.start_time}
+        if optimality_gap is not None:
+            progress["gap_optimalidad"] = optimality_gap
+        if solutions is not None:
+            front = thin_front(pareto_filter((-solution.objectives[0], solution.objectives[1], None)
+                                             for solution in solutions), self.front_size)
+            progress["archivo"] = len(solutions)
+            progress["frente"] = [[round(float(green_km), 4), round(float(emissions), 4)]
+                                  for green_km, emissions, _ in front]
+
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(progress, file)
+        os.replace(temporary_path, self.path)
+        self.last_write = time.time()
+
+
+class StoppingByEvaluationsOrRequest(StoppingByEvaluations):
+    def __init__(self, max_evaluations: int, stop_path: str) -> None:
+        """Stop after max_evaluations evaluations or, earlier, when the file stop_path exists (checked on
+        every notification), e.g. because the user decided the front is good enough. Unlike killing the
+        process, the algorithm ends normally and its result is kept.
+        :param stop_path: Path of the file that requests the stop."""
+        super(StoppingByEvaluationsOrRequest, self).__init__(max_evaluations)
+        self.stop_path = stop_path
+        self.requested = False
+
+    def update(self, *args, **kwargs):
+        super(StoppingByEvaluationsOrRequest, self).update(*args, **kwargs)
+        if not self.requested and os.path.exists(self.stop_path):
+            self.requested = True
+            LOGGER.info("Stop requested after {} evaluations".format(self.evaluations))
+
+    @property
+    def is_met(self):
+        return self.requested or super(StoppingByEvaluationsOrRequest, self).is_met
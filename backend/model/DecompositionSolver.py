@@ -0,0 +1,147 @@
+from HybridTruckProblem_Demo import HybridTruckProblem
+from Route import Route
+from LegFronts import pareto_filter, thin_front, route_solutions
+
+from jmetal.algorithm.multiobjective.mocell import MOCell
+from jmetal.operator.crossover import TPXCrossover
+from jmetal.operator.mutation import BitFlipMutation
+from jmetal.util.archive import BiObjectiveCrowdingDistanceArchive
+from jmetal.util.evaluator import BatchEvaluator
+from jmetal.util.neighborhood import C9
+from jmetal.util.termination_criterion import StoppingByEvaluations
+
+from itertools import product
+from multiprocessing import Pool
+from time import time
+import copy
+import os
+
+
+def optimize_leg(leg_task):
+    """
+    Front of one leg, run in a worker process. The leg is solved as a HybridTruckProblem of its own
+    sub-route: by exhaustive search when it has at most exhaustive_variables variables, or else by
+    MOCell with a number of evaluations proportional to its variables.
+
+    :return: list of (green_km, emissions, modes of the sections of the leg)
+    """
+    sections, truck, problem_options, options = leg_task
+    route = Route(1, sections)
+    # El camión llega sin ruta, se le asigna la del tramo
+    truck = copy.copy(truck)
+    truck.route = route
+    problem = HybridTruckProblem(route=route, truck=truck, **problem_options)
+    variables = [section.slope_percent > problem.slope_percent_limit for section in sections]
+    number_of_variables = sum(variables)
+
+    if number_of_variables <= options["exhaustive_variables"]:
+        candidates = []
+        for assignment in product((False, True), repeat=number_of_variables):
+            assignment = iter(assignment)
+            modes = [next(assignment) if variable else True for variable in variables]
+            l_emisiones, l_greenKm, _, _, _, invalid = problem.evaluate_leg(modes, 0, len(sections))
+            if not invalid:
+                emissions = 0
+                green_km = 0
+                for section_emissions, section_green_km in zip(l_emisiones, l_greenKm):
+                    emissions += section_emissions
+                    green_km += section_green_km
+                candidates.append((green_km, emissions, modes))
+        return thin_front(pareto_filter(candidates), options["leg_front_size"])
+
+    grid_size = options["grid_size"]
+    max_evaluations = max(options["min_evaluations"], options["evaluations_per_variable"] * number_of_variables)
+    algorithm = MOCell(problem=problem,
+                       population_size=grid_size * grid_size,
+                       neighborhood=C9(grid_size, grid_size),
+                       archive=BiObjectiveCrowdingDistanceArchive(options["leg_front_size"]),
+                       mutation=BitFlipMutation(1.0 / number_of_variables),
+                       crossover=TPXCrossover(options["crossover_probability"]),
+                       termination_criterion=StoppingByEvaluations(max_evaluations=max_evaluations),
+                       population_evaluator=BatchEvaluator())
+    algorithm.run()
+
+    front = []
+    for solution in algorithm.get_result():
+        if solution.attributes["traces"][3].min(initial=0) < 0:
+            continue
+        values = iter(solution.variables)
+        modes = [bool(next(values)) if variable else True for variable in variables]
+        front.append((-solution.objectives[0], solution.objectives[1], modes))
+    return thin_front(pareto_filter(front), options["leg_front_size"])
+
+
+class DecompositionSolver:
+    """
+    Pareto front of the route optimizing every leg (the sections between two stops) on its own,
+    in parallel processes, and merging the leg fronts. The legs are independent, so the route
+    front is the pruned Minkowski sum of their fronts and the cost grows linearly with the length
+    of the route instead of running one MOCell over the bits of the whole route.
+
+    The merged solutions are evaluated again with the problem and the route front is bounded with
+    a BiObjectiveCrowdingDistanceArchive.
+
+    :param problem: the HybridTruckProblem to solve
+    :param processes: worker processes (None = one per core)
+    :param grid_size: side of the MOCell grid of every leg, population_size = grid_size ** 2
+    :param evaluations_per_variable: MOCell evaluations of a leg per variable
+    :param min_evaluations: minimum MOCell evaluations of a leg
+    :param crossover_probability: TPX crossover probability
+    :param exhaustive_variables: legs with at most this many variables are solved exhaustively
+    :param leg_front_size: maximum points of the front of every leg
+    :param front_size: maximum solutions of the route front
+    """
+
+    def __init__(self, problem: HybridTruckProblem, processes: int = None, grid_size: int = 5,
+                 evaluations_per_variable: int = 100, min_evaluations: int = 1000, crossover_probability: float = 0.9,
+                 exhaustive_variables: int = 10, leg_front_size: int = 50, front_size: int = 100):
+        self.problem = problem
+        self.processes = processes or os.cpu_count()
+        self.options = {"grid_size": grid_size,
+                        "evaluations_per_variable": evaluations_per_variable,
+                        "min_evaluations": min_evaluations,
+                        "crossover_probability": crossover_probability,
+                        "exhaustive_variables": exhaustive_variables,
+                        "leg_front_size": leg_front_size}
+        self.front_size = front_size
+
+        self.solutions = []
+        self.total_computing_time = 0
+        self.infeasible_legs = []
+
+    def run(self):
+        start_computing_time = time()
+
+        problem_options = self.problem.construction_options()
+        # Truck.route es la ruta entera: cada tarea lleva solo las secciones de su tramo
+        truck = copy.copy(self.problem.truck)
+        truck.route = None
+        leg_tasks = [(self.problem.route.sections[start:end], truck, problem_options, self.options)
+                     for start, end in self.problem.legs]
+        # Los tramos más largos primero, para repartir mejor la carga entre procesos
+        order = sorted(range(len(leg_tasks)), key=lambda leg: -len(leg_tasks[leg][0]))
+        if self.processes > 1 and len(leg_tasks) > 1:
+            with Pool(min(self.processes, len(leg_tasks))) as pool:
+                fronts = pool.map(optimize_leg, [leg_tasks[leg] for leg in order], chunksize=1)
+        else:
+            fronts = [optimize_leg(leg_tasks[leg]) for leg in order]
+        leg_fronts = [None] * len(leg_tasks)
+        for leg, front in zip(order, fronts):
+            leg_fronts[leg] = front
+
+        # Los tramos sin soluciones válidas quedan fuera de la suma y los precia la evaluación de las soluciones
+        self.infeasible_legs = [leg for leg, front in enumerate(leg_fronts) if not front]
+        solutions = route_solutions(self.problem, leg_fronts, self.front_size)
+
+        archive = BiObjectiveCrowdingDistanceArchive(self.front_size)
+        for solution in solutions:
+            archive.add(solution)
+        self.solutions = archive.solution_list
+
+        self.total_computing_time = time() - start_computing_time
+
+    def get_result(self):
+        return self.solutions
+
+    def get_name(self) -> str:
+        return 'Decomposition by legs'
@@ -0,0 +1,161 @@
+from HybridTruckProblem_Demo import HybridTruckProblem, decrease_battery_charge
+from LegFronts import pareto_filter, thin_front, route_solutions
+
+from time import time
+
+
+def non_dominated_labels(labels):
+    """
+    Labels not dominated in green km (maximized), emissions (minimized) and SOC (maximized), without
+    duplicates.
+
+    :param labels: list of (green_km, emissions, soc, ...)
+    :return: the non-dominated labels sorted by descending green km
+    """
+    front = []
+    for label in sorted(labels, key=lambda label: (-label[0], label[1], -label[2])):
+        # Las etiquetas ya guardadas tienen al menos sus green km
+        if not any(kept[1] <= label[1] and kept[2] >= label[2] for kept in front):
+            front.append(label)
+    return front
+
+
+def thin_labels(labels, size: int):
+    """
+    Keeps at most size labels, the ones with the largest crowding distance in green km, emissions and
+    SOC (the extremes of every objective are always kept), in the order they are given.
+    """
+    if size is None or len(labels) <= size:
+        return labels
+
+    crowding = [0.0] * len(labels)
+    for objective in range(3):
+        order = sorted(range(len(labels)), key=lambda position: labels[position][objective])
+        objective_range = (labels[order[-1]][objective] - labels[order[0]][objective]) or 1.0
+        crowding[order[0]] = crowding[order[-1]] = float("inf")
+        for rank in range(1, len(order) - 1):
+            crowding[order[rank]] += (labels[order[rank + 1]][objective] - labels[order[rank - 1]][objective]) / objective_range
+
+    kept = sorted(sorted(range(len(labels)), key=lambda position: -crowding[position])[:size])
+    return [labels[position] for position in kept]
+
+
+class DynamicProgrammingSolver:
+    """
+    Approximation of the Pareto front of the route by dynamic programming over every leg (the
+    sections between two stops), instead of a metaheuristic. Inside a leg the labels are partial mode
+    assignments with their green km, emissions, SOC and exit speed, and a state is the SOC discretized
+    in soc_buckets intervals: every section extends each label in both modes, the labels with negative
+    SOC are dropped and every state only keeps the labels not dominated in green km, emissions and
+    SOC, at most labels_per_state of them. A leg therefore costs O(sections * soc_buckets *
+    labels_per_state) section simulations at most, whatever its length. The fronts of the legs, which
+    are independent, are then merged into the front of the route.
+
+    It is a heuristic, not an exact front: the exit speed is not part of the dominance, labels with
+    different SOC share a state when their SOC falls in the same interval, and the labels of every
+    state and the points of every leg front are thinned to labels_per_state and leg_front_size, so
+    labels that would lead to other Pareto points can be dropped. The SOC and speed of a label
+    themselves are not discretized, so every solution found is feasible, and it is evaluated again
+    with the problem to return its objectives. A leg without any feasible label is recorded in
+    infeasible_legs and left to that evaluation and its repair.
+
+    :param problem: the HybridTruckProblem to solve
+    :param soc_buckets: number of SOC intervals of the states of a leg
+    :param labels_per_state: maximum labels kept per state (None keeps all the non-dominated ones)
+    :param leg_front_size: maximum points of the front of every leg
+    :param front_size: maximum solutions of the route front
+    """
+
+    def __init__(self, problem: HybridTruckProblem, soc_buckets: int = 50, labels_per_state: int = 20,
+                 leg_front_size: int = 100, front_size: int = 100):
+        self.problem = problem
+        self.soc_buckets = soc_buckets
+        self.labels_per_state = labels_per_state
+        self.leg_front_size = leg_front_size
+        self.front_size = front_size
+
+        self.solutions = []
+        self.total_computing_time = 0
+        self.labels = 0
+        self.infeasible_legs = []
+
+    def _bucket(self, soc: float):
+        return int(soc / self.problem.truck.charge * self.soc_buckets) if self.problem.truck.charge > 0 else 0
+
+    def leg_front(self, start: int, end: int):
+        """
+        Front of one leg.
+
+        :return: list of (green_km, emissions, modes of the sections of the leg), empty if no
+                 assignment of the leg is feasible
+        """
+        problem = self.problem
+        truck = problem.truck
+        capacity = truck.charge
+        efficiency = truck.electric_engine_efficiency
+
+        # Intervalo de SOC -> etiquetas (green km, emisiones, SOC, velocidad de salida, bits)
+        states = {self._bucket(capacity): [(0.0, 0.0, capacity, 0, 0)]}
+        for position, index in enumerate(range(start, end)):
+            section = problem.route.sections[index]
+            # Las secciones con bajada pronunciada se hacen siempre en eléctrico
+            modes = (False, True) if section.slope_percent > problem.slope_percent_limit else (True,)
+            section_green_km = section.distance
+            # Muchas etiquetas llegan a la sección con la misma velocidad: se simula una vez por velocidad y modo
+            section_results = {}
+
+            new_states = {}
+            for labels in states.values():
+                for green_km, emissions, remaining_charge, current_speed, bits in labels:
+                    for electric in modes:
+                        result = section_results.get((current_speed, electric))
+                        if result is None:
+                            max_power = truck.EV_power if electric else truck.ICE_power
+                            exit_speed, kWh, bat_regen = problem.compute_section(current_speed, index, max_power)
+                            section_emissions = 0
+                            if kWh >= 0 and not electric:
+                                gasoline_gallon_equivalent = kWh / truck.fuel_engine_efficiency * 0.02635046113 # Conversion factor
+                                section_emissions += gasoline_gallon_equivalent * 10.180 # Kgs of CO2 emissions
+                            result = section_results[(current_speed, electric)] = (exit_speed, kWh, bat_regen, section_emissions)
+                        exit_speed, kWh, bat_regen, section_emissions = result
+
+                        # Misma secuencia de actualizaciones de la bateria que la evaluación
+                        label_charge = remaining_charge
+                        if kWh < 0:
+                            label_charge = decrease_battery_charge(label_charge, kWh / efficiency, capacity)
+                        else:
+                            label_charge = decrease_battery_charge(label_charge, bat_regen / efficiency, capacity)
+                            if electric:
+                                label_charge = decrease_battery_charge(label_charge, kWh / efficiency, capacity)
+                        if label_charge < 0:
+                            continue
+
+                        new_states.setdefault(self._bucket(label_charge), []).append(
+                            (green_km + section_green_km if electric else green_km, emissions + section_emissions,
+                             label_charge, exit_speed, bits | (1 << position) if electric else bits))
+
+            states = {}
+            for key, labels in new_states.items():
+                states[key] = thin_labels(non_dominated_labels(labels), self.labels_per_state)
+                self.labels += len(states[key])
+
+        leg_front = pareto_filter((green_km, emissions, bits)
+                                  for labels in states.values() for green_km, emissions, _, _, bits in labels)
+        return [(green_km, emissions, [bool(bits >> position & 1) for position in range(end - start)])
+                for green_km, emissions, bits in thin_front(leg_front, self.leg_front_size)]
+
+    def run(self):
+        start_computing_time = time()
+
+        leg_fronts = [self.leg_front(start, end) for start, end in self.problem.legs]
+        # Ni en combustión se pueden hacer, quedan para la evaluación y la reparación de las soluciones
+        self.infeasible_legs = [leg for leg, front in enumerate(leg_fronts) if not front]
+        self.solutions = route_solutions(self.problem, leg_fronts, self.front_size)
+
+        self.total_computing_time = time() - start_computing_time
+
+    def get_result(self):
+        return self.solutions
+
+    def get_name(self) -> str:
+        return 'Dynamic Programming'
@@ -2,31 +2,45 @@ from jmetal.core.problem import Problem
 from jmetal.core.solution import FloatSolution, BinarySolution
 from Route import Route
 from Truck import Truck
+from RouteLegs import split_legs, leg_key, LegResultMemo, IncrementalRouteState
+from BoundedLRUCache import BoundedLRUCache
 
 import random
 import math
 import time
 import numpy as np
 import copy
-
-# l_known_sections = []
+import threading
+
+# VSP model constants, shared by the scalar and the vectorized kernels
+VSP_G = 9.80665 # Gravity
+VSP_CR = 0.006 # Rolling resistance coefficient
+VSP_CD = 0.63 # Drag coefficient
+VSP_RO_AIR = 1.225 # Air density
+VSP_AUX_ENERGY = 2 #Auxiliar energy consumption in kW - 3kW with AC off or 12kW with AC on
+#Vehicle efficiencies
+VSP_N_DC = 0.90
+VSP_N_M = 0.95
+VSP_N_T = 0.96
+VSP_N_B = 0.97
+VSP_N_G = 0.90
 
 def vehicle_specific_power(v: float, slope: float, acc: float, m: float = 27000, A: float = 8):
     # print("No conocida")
-    g = 9.80665 # Gravity
-    Cr=0.006 # Rolling resistance coefficient
-    Cd=0.63 # Drag coefficient
-    ro_air=1.225 # Air density
+    g = VSP_G # Gravity
+    Cr = VSP_CR # Rolling resistance coefficient
+    Cd = VSP_CD # Drag coefficient
+    ro_air = VSP_RO_AIR # Air density
     # alpha = math.atan(slope) #Elevation angle in radians
     alpha = slope #Elevation angle in radians
-    aux_energy = 2 #Auxiliar energy consumption in kW - 3kW with AC off or 12kW with AC on
+    aux_energy = VSP_AUX_ENERGY #Auxiliar energy consumption in kW - 3kW with AC off or 12kW with AC on
     # print("alpha: {}".format(alpha))
     #Vehicle efficiencies
-    n_dc = 0.90
-    n_m = 0.95
-    n_t = 0.96
-    n_b = 0.97
-    n_g = 0.90
+    n_dc = VSP_N_DC
+    n_m = VSP_N_M
+    n_t = VSP_N_T
+    n_b = VSP_N_B
+    n_g = VSP_N_G
 
     Frff = g * Cr * m * math.cos(alpha) # Rolling friction force
     Fadf = ro_air * A * Cd * math.pow(v, 2) / 2 # Aerodynamic drag force
@@ -50,16 +64,80 @@ def vehicle_specific_power(v: float, slope: float, acc: float, m: float = 27000,
     # Total power [kW]
     return  total_power
 
+def vehicle_specific_power_array(v, slope, acc, m = 27000, A = 8):
+    """
+    Vectorized version of vehicle_specific_power. Every argument may be a scalar or a NumPy
+    array (broadcast element-wise) and the operations are applied in the same order as in the
+    scalar model, so both return the same numbers.
+
+    :return: array with the total power [kW] of every element
+    """
+    v = np.asarray(v, dtype=float)
+    alpha = np.asarray(slope, dtype=float) #Elevation angle in radians
+
+    Frff = VSP_G * VSP_CR * m * np.cos(alpha) # Rolling friction force
+    Fadf = VSP_RO_AIR * A * VSP_CD * np.power(v, 2) / 2 # Aerodynamic drag force
+    Fhcf = VSP_G * m * np.sin(alpha) # Hill climbing force
+    Farf = m * acc # Acceleration resistance force
+    Fttf = Frff + Fadf + Fhcf + Farf # Total force in Newtons
+    power = (Fttf * v) / 1000 # Total energy in kW
+
+    #Drivetrain model (efficiency)
+    rbf = 1-np.exp(-v*0.36) #Regenerative braking factor
+    regen_n = VSP_N_DC*VSP_N_G*VSP_N_T*VSP_N_B
+    traction_n = VSP_N_DC*VSP_N_M*VSP_N_T*VSP_N_B
+    return np.where(power < 0,
+                    VSP_AUX_ENERGY/VSP_N_B + rbf*power*regen_n,
+                    VSP_AUX_ENERGY/VSP_N_B + power/traction_n)
+
 def decrease_battery_charge(remaining_charge, section_charge, truck_charge):
     if (remaining_charge - section_charge) > truck_charge:
         return truck_charge
     else:
         return remaining_charge - section_charge
 
-dict_sections = {}
-key_set = set()
+# Filas del array de trazas por sección de una solución (solution.attributes["traces"])
+TRACE_ROWS = ("emisiones", "greenKm", "kWh", "SOC", "recarga")
+
+def section_traces(l_emisiones, l_greenKm, l_kWh, l_SOC, l_recarga):
+    """
+    Per-section traces of an evaluated solution as one contiguous float32 array of shape
+    (5, sections), rows in TRACE_ROWS order. They are kept out of the objectives so that the
+    dominance checks and copies of the algorithms only handle the two objective values.
+    """
+    return np.array([l_emisiones, l_greenKm, l_kWh, l_SOC, l_recarga], dtype=np.float32)
 
-def section_power(vo: float, vf: float, acc: float, slope: float, section_distance: float, max_engine_power, index, m: float = 27000, A: float = 8):
+class SectionPowerCache(BoundedLRUCache):
+    """
+    Bounded LRU cache of section simulations. The whole population re-simulates the same
+    (entry speed, target speed, slope, distance, max power, mass, frontal area) tuples over and over,
+    so the results are stored by that key. By default the key holds the exact entry speed, so a hit
+    returns exactly what the simulation would.
+
+    speed_quantum (m/s) makes the cache an approximation, off by default: the entry speed is rounded
+    to it and the section is simulated at the rounded speed, so more lookups hit but the results no
+    longer match the uncached model.
+    """
+
+    def __init__(self, max_size: int = 200000, speed_quantum: float = None):
+        self.speed_quantum = speed_quantum
+        super(SectionPowerCache, self).__init__(max_size)
+
+    def _options(self) -> dict:
+        return dict(super(SectionPowerCache, self)._options(), speed_quantum=self.speed_quantum)
+
+    def quantize(self, speed: float) -> float:
+        if not self.speed_quantum:
+            return speed
+        return round(speed / self.speed_quantum) * self.speed_quantum
+
+def section_power(vo: float, vf: float, acc: float, slope: float, section_distance: float, max_engine_power, index, m: float = 27000, A: float = 8, with_traces: bool = True):
+    """
+    Simulates a section second by second. With with_traces=False the per-second speed/power lists
+    are not built (they are returned empty) and only the scalar outputs are computed.
+
+    :return: (exit speed [m/s], energy [kWh], per-second kW, per-second speeds, regenerated energy [kWh])
+    """
     acc_decay = 0.05    # m/s^2
     v_decay = 0.1
     instant_speed = vo   
@@ -96,6 +174,7 @@ def section_power(vo: float, vf: float, acc: float, slope: float, section_distan
 
     l_speeds = []
     l_kw = []
+    first_kw = last_kw = 0
 
     # print(f"{section_distance:4.1f} | acc={acc:2.1f} | vo= {vo:2.3f} | vf_orig= {vf_original:2.3f} | slope= {slope:2.4f}")
     if vf >= vo:    # Si hay un incremento o es igual
@@ -123,8 +202,9 @@ def section_power(vo: float, vf: float, acc: float, slope: float, section_distan
             instant_speed += acc
             total_power += kW
 
-            l_speeds.append(instant_speed)
-            l_kw.append(kW)
+            if with_traces:
+                l_speeds.append(instant_speed)
+                l_kw.append(kW)
     else:
         if vf < instant_speed -0.1:
             acc = -acc
@@ -145,13 +225,17 @@ def section_power(vo: float, vf: float, acc: float, slope: float, section_distan
             instant_speed += acc
             total_power += kW
 
+            if tot_secs == 0:
+                first_kw = kW
+            last_kw = kW
             tot_secs += 1
 
-            l_speeds.append(instant_speed)
-            l_kw.append(kW)
+            if with_traces:
+                l_speeds.append(instant_speed)
+                l_kw.append(kW)
         #Si la vo > vf_original y ha habido deaceleración, comprobamos
-        if vo > vf  and len(l_kw) > 1 and l_kw[0] - l_kw[-1] < 0:
-            bat_regen = (l_kw[0] - l_kw[-1]) * tot_secs / 3600
+        if vo > vf  and tot_secs > 1 and first_kw - last_kw < 0:
+            bat_regen = (first_kw - last_kw) * tot_secs / 3600
             # print(f"La diferencia es de: {l_kw[0] - l_kw[-1]}")
         
     # Una vez ha terminado el proceso de aceleracion vemos simplemente si queda espacio por recorrer
@@ -160,18 +244,436 @@ def section_power(vo: float, vf: float, acc: float, slope: float, section_distan
         kW = vehicle_specific_power(instant_speed, slope, 0, m, A)      # kWs
         total_power += t_remaining * kW
         tot_secs += t_remaining
-        l_speeds += [instant_speed] * round(t_remaining)
-        l_kw += [kW] * round(t_remaining)
+        if with_traces:
+            l_speeds += [instant_speed] * round(t_remaining)
+            l_kw += [kW] * round(t_remaining)
 
     # bat_regen = bat_regen * tot_secs / 3600
 
-    # dict_sections[(vo, vf, acc, index)] = [instant_speed, total_power/3600, l_kw, l_speeds, bat_regen]
+    return instant_speed, total_power/3600, l_kw, l_speeds, bat_regen
 
-    # key_set = set(dict_sections)
 
-    return instant_speed, total_power/3600, l_kw, l_speeds, bat_regen
+def section_power_batch(vo, vf, acc, slope, section_distance, max_engine_power, m = 27000, A = 8):
+    """
+    Batched version of section_power. All the arguments are broadcast together, so a call can
+    simulate many sections (or the same section for many entry speeds) at once. Every element
+    follows the same per-second stepping, decay loops and regeneration rule as section_power,
+    advancing in lockstep with the others, so the results are the same as the scalar path.
 
+    The per-second speed/power traces are not built.
 
+    :return: (exit speed [m/s], energy [kWh], regenerated energy [kWh]) arrays
+    """
+    acc_decay = 0.05    # m/s^2
+    v_decay = 0.1
+
+    arrays = np.broadcast_arrays(vo, vf, acc, slope, section_distance, max_engine_power, m, A)
+    shape = arrays[0].shape
+    vo, vf, acc, slope, section_distance, max_engine_power, m, A = [np.array(x, dtype=float).ravel() for x in arrays]
+    instant_speed = vo.copy()
+    total_power = np.zeros(vo.shape)
+    remaining_distance = section_distance * 1000
+    tot_secs = np.zeros(vo.shape)
+    bat_regen = np.zeros(vo.shape)
+
+    # Velocidad maxima alcanzable con la potencia disponible
+    kW = vehicle_specific_power_array(vf, slope, acc, m, A)
+    vf_original = vf.copy()
+    over = kW > max_engine_power
+    while over.any():
+        vf[over] -= v_decay
+        kW[over] = vehicle_specific_power_array(vf[over], slope[over], 0, m[over], A[over])
+        over = kW > max_engine_power
+
+    up = vf >= vo
+    acc = np.where(up, np.where(vf-0.1 <= vo, 0.0, acc), np.where(vf < instant_speed - 0.1, -acc, 0.0))
+
+    # Fase de aceleracion
+    active = up & (remaining_distance > 0) & (instant_speed <= vf) & (acc > 0.05)
+    while active.any():
+        idx = np.flatnonzero(active)
+        kW = vehicle_specific_power_array(instant_speed[idx], slope[idx], acc[idx], m[idx], A[idx])
+        over = kW > max_engine_power[idx]
+        while over.any():
+            sub = idx[over]
+            acc[sub] -= acc_decay
+            kW[over] = vehicle_specific_power_array(instant_speed[sub], slope[sub], acc[sub], m[sub], A[sub])
+            over = kW > max_engine_power[idx]
+
+        restore = (kW < max_engine_power[idx]) & (vf[idx] < vf_original[idx]-0.1)
+        while restore.any():
+            sub = idx[restore]
+            vf[sub] = np.minimum(vf[sub] + v_decay*0.5, vf_original[sub])
+            restore = (kW < max_engine_power[idx]) & (vf[idx] < vf_original[idx]-0.1)
+
+        step_acc = acc[idx]
+        speed = instant_speed[idx]
+        remaining_distance[idx] -= (np.power(speed+step_acc, 2) - np.power(speed, 2)) / (2 * step_acc)
+        instant_speed[idx] = speed + step_acc
+        total_power[idx] += kW
+
+        active = up & (remaining_distance > 0) & (instant_speed <= vf) & (acc > 0.05)
+
+    # Fase de deceleracion
+    first_kw = np.zeros(vo.shape)
+    last_kw = np.zeros(vo.shape)
+    active = ~up & (remaining_distance > 0) & (instant_speed >= vf) & (acc < 0)
+    while active.any():
+        idx = np.flatnonzero(active)
+        kW = vehicle_specific_power_array(instant_speed[idx], slope[idx], acc[idx], m[idx], A[idx])
+        over = kW > max_engine_power[idx]
+        while over.any():
+            sub = idx[over]
+            acc[sub] -= acc_decay
+            kW[over] = vehicle_specific_power_array(instant_speed[sub], slope[sub], acc[sub], m[sub], A[sub])
+            over = kW > max_engine_power[idx]
+
+        step_acc = acc[idx]
+        speed = instant_speed[idx]
+        remaining_distance[idx] -= (np.power(speed+step_acc, 2) - np.power(speed, 2)) / (2 * step_acc)
+        instant_speed[idx] = speed + step_acc
+        total_power[idx] += kW
+
+        first_kw[idx] = np.where(tot_secs[idx] == 0, kW, first_kw[idx])
+        last_kw[idx] = kW
+        tot_secs[idx] += 1
+
+        active = ~up & (remaining_distance > 0) & (instant_speed >= vf) & (acc < 0)
+
+    regen = ~up & (vo > vf) & (tot_secs > 1) & (first_kw - last_kw < 0)
+    bat_regen[regen] = (first_kw[regen] - last_kw[regen]) * tot_secs[regen] / 3600
+
+    # Distancia restante a velocidad constante
+    cruise = remaining_distance > 0
+    if cruise.any():
+        t_remaining = remaining_distance[cruise] / instant_speed[cruise]
+        kW = vehicle_specific_power_array(instant_speed[cruise], slope[cruise], 0, m[cruise], A[cruise])
+        total_power[cruise] += t_remaining * kW
+
+    return instant_speed.reshape(shape), (total_power/3600).reshape(shape), bat_regen.reshape(shape)
+
+
+def _power_limited_speed(slope: float, acc: float, max_engine_power: float, m: float = 27000, A: float = 8):
+    """
+    Highest speed at which vehicle_specific_power(v, slope, acc) does not exceed max_engine_power,
+    i.e. the positive root of the VSP cubic  c*v^3 + K*v - Q = 0  (Cardano, polished with Newton).
+    """
+    c = VSP_RO_AIR * A * VSP_CD / 2
+    K = VSP_G * VSP_CR * m * math.cos(slope) + VSP_G * m * math.sin(slope) + m * acc
+    Q = 1000 * (max_engine_power - VSP_AUX_ENERGY/VSP_N_B) * VSP_N_DC*VSP_N_M*VSP_N_T*VSP_N_B
+    if Q <= 0:
+        return 0.0
+
+    p = K / c
+    q = -Q / c
+    discriminant = (q/2)**2 + (p/3)**3
+    if discriminant >= 0:
+        root = math.sqrt(discriminant)
+        v = math.copysign(abs(-q/2 + root)**(1/3), -q/2 + root) + math.copysign(abs(-q/2 - root)**(1/3), -q/2 - root)
+    else:
+        v = 2 * math.sqrt(-p/3) * math.cos(math.acos(3*q/(2*p) * math.sqrt(-3/p)) / 3)
+
+    f = c*v**3 + K*v - Q
+    df = 3*c*v**2 + K
+    if df != 0:
+        v -= f / df
+    return v
+
+def _exp_polynomial_sum(q, r: float, n: int):
+    """
+    sum_{i=0}^{n-1} q(i) * r^i for a cubic q = (q0, q1, q2, q3), using the cubic p that satisfies
+    p(i) - r*p(i+1) = q(i), so the sum telescopes to p(0) - r^n * p(n).
+    """
+    q0, q1, q2, q3 = q
+    p3 = q3 / (1 - r)
+    p2 = (q2 + 3*r*p3) / (1 - r)
+    p1 = (q1 + r*(2*p2 + 3*p3)) / (1 - r)
+    p0 = (q0 + r*(p1 + p2 + p3)) / (1 - r)
+    return p0 - r**n * (p0 + n*(p1 + n*(p2 + n*p3)))
+
+def _phase_energy(v: float, acc: float, n: int, slope: float, m: float = 27000, A: float = 8):
+    """
+    Sum of vehicle_specific_power(v + i*acc, slope, acc) for i = 0..n-1, i.e. the kWs consumed by
+    n one-second steps at constant acceleration, without iterating over the steps.
+    """
+    if n <= 8:
+        return sum(vehicle_specific_power(v + i*acc, slope, acc, m, A) for i in range(n))
+
+    c = VSP_RO_AIR * A * VSP_CD / 2
+    K = VSP_G * VSP_CR * m * math.cos(slope) + VSP_G * m * math.sin(slope) + m * acc
+
+    # The raw power (K + c*u^2)*u is negative (regenerative branch) below u = sqrt(-K/c)
+    if K < 0:
+        threshold = (math.sqrt(-K/c) - v) / acc
+        if acc > 0:
+            n_neg = min(n, max(0, math.ceil(threshold)))
+            ranges = [(0, n_neg, True), (n_neg, n, False)]
+        else:
+            first_neg = min(n, max(0, math.floor(threshold) + 1))
+            ranges = [(0, first_neg, False), (first_neg, n, True)]
+    else:
+        ranges = [(0, n, False)]
+
+    total = n * VSP_AUX_ENERGY/VSP_N_B
+    for start, end, negative in ranges:
+        steps = end - start
+        if steps <= 0:
+            continue
+        u = v + start*acc
+        # Coefficients of the raw power [kW] as a cubic on the step index
+        q = ((K*u + c*u**3) / 1000, (K*acc + 3*c*u**2*acc) / 1000, 3*c*u*acc**2 / 1000, c*acc**3 / 1000)
+        s1 = steps*(steps-1) / 2
+        s2 = (steps-1)*steps*(2*steps-1) / 6
+        raw_sum = q[0]*steps + q[1]*s1 + q[2]*s2 + q[3]*s1**2
+        if negative:
+            regen_n = VSP_N_DC*VSP_N_G*VSP_N_T*VSP_N_B
+            # rbf = 1 - exp(-0.36*u_i), with exp(-0.36*u_i) = exp(-0.36*u) * r^i
+            total += regen_n * (raw_sum - math.exp(-0.36*u) * _exp_polynomial_sum(q, math.exp(-0.36*acc), steps))
+        else:
+            total += raw_sum / (VSP_N_DC*VSP_N_M*VSP_N_T*VSP_N_B)
+    return total
+
+def _phase_steps(v: float, acc: float, remaining_distance: float, limit_speed: float):
+    """
+    Number of one-second steps at constant acceleration that section_power would take from speed v
+    before running out of distance or crossing limit_speed (upper limit when accelerating, lower
+    limit when braking). The first step is always taken.
+    """
+    # Distance after i steps: i*v + acc*i^2/2
+    discriminant = v**2 + 2*acc*remaining_distance
+    if discriminant >= 0:
+        distance_steps = math.ceil((-v + math.sqrt(discriminant)) / acc)
+    else:
+        distance_steps = math.inf
+    speed_steps = (limit_speed - v) / acc
+    if abs(speed_steps - round(speed_steps)) < 1e-9:
+        # Empate exacto con la velocidad limite: se decide como en section_power, sumando acc paso a paso
+        speed, speed_steps = v, 0
+        while speed_steps < distance_steps and (speed <= limit_speed if acc > 0 else speed >= limit_speed):
+            speed += acc
+            speed_steps += 1
+    else:
+        speed_steps = math.floor(speed_steps) + 1
+    return max(1, min(distance_steps, speed_steps))
+
+def _phase_distance(v: float, acc: float, n: int):
+    """
+    Metres covered by n one-second steps at constant acceleration. A single step uses the same
+    expression as section_power, which matters for the residual accelerations close to zero.
+    """
+    if n == 1:
+        return (math.pow(v+acc, 2) - math.pow(v, 2)) / (2 * acc)
+    return n*v + acc*n**2/2
+
+def _raised_speed(vf: float, vf_original: float, step: float):
+    """
+    Speed that section_power reaches adding step to vf (at most up to vf_original) until it is not
+    below vf_original - 0.1, computed directly from the number of additions. It can differ from the
+    repeated additions in the last bits, check the engine with 001_verificar_energia.
+    """
+    steps = math.ceil((vf_original - 0.1 - vf) / step)
+    return min(vf + steps*step, vf_original)
+
+def section_power_closed_form(vo: float, vf: float, acc: float, slope: float, section_distance: float, max_engine_power, index, m: float = 27000, A: float = 8):
+    """
+    Closed-form alternative to section_power. It follows the same driving model (power-limited top
+    speed, acceleration lowered in acc_decay steps when the engine cannot deliver it, regeneration
+    rule and cruise tail), but every constant-acceleration phase is solved at once: the power limit
+    comes from the positive root of the VSP cubic, the number of one-second steps from the
+    kinematics and the energy from closed-form sums over the steps. The phases cost the same
+    whatever the section length or the speed delta, but two parts still follow section_power step
+    by step, so they grow with the speed delta:
+
+    - the reduction of the target speed to the power limit is replayed v_decay by v_decay. That
+      exact float replay is required: the reduced speed is compared with the entry speed plus
+      whole acceleration steps, and subtracting n*v_decay at once differs in the last bits, which
+      changes the exit speed by a whole step (0.5 m/s) in some sections;
+    - a phase that ends exactly on the limit speed replays that tie (see _phase_steps).
+
+    The later raise of the target speed is computed directly (see _raised_speed).
+
+    The per-second traces are not built.
+
+    :return: (exit speed [m/s], energy [kWh], regenerated energy [kWh])
+    """
+    acc_decay = 0.05    # m/s^2
+    v_decay = 0.1
+    instant_speed = vo
+    total_power = 0
+    remaining_distance = section_distance * 1000
+    bat_regen = 0
+
+    # Velocidad maxima alcanzable con la potencia disponible
+    vf_original = vf
+    if vehicle_specific_power(vf, slope, acc, m, A) > max_engine_power:
+        cruise_limit = _power_limited_speed(slope, 0, max_engine_power, m, A)
+        # Se resta v_decay las mismas veces que en section_power para obtener exactamente el mismo vf
+        for _ in range(max(1, math.ceil((vf - cruise_limit) / v_decay - 1e-9))):
+            vf -= v_decay
+
+    if vf >= vo:
+        if vf-0.1 <= vo:
+            acc = 0
+        while remaining_distance > 0 and instant_speed <= vf and acc > 0.05:
+            kW = vehicle_specific_power(instant_speed, slope, acc, m, A)
+            while kW > max_engine_power:
+                acc -= acc_decay
+                kW = vehicle_specific_power(instant_speed, slope, acc, m, A)
+
+            if kW < max_engine_power and vf < vf_original-0.1:
+                vf = _raised_speed(vf, vf_original, v_decay*0.5)
+
+            if acc > 0.05:
+                # Fase de aceleracion constante hasta la velocidad final, el limite de potencia o el final del tramo
+                limit_speed = min(vf, _power_limited_speed(slope, acc, max_engine_power, m, A))
+                steps = _phase_steps(instant_speed, acc, remaining_distance, max(limit_speed, instant_speed))
+            else:
+                steps = 1
+
+            total_power += _phase_energy(instant_speed, acc, steps, slope, m, A)
+            remaining_distance -= _phase_distance(instant_speed, acc, steps)
+            instant_speed += steps*acc
+    else:
+        if vf < instant_speed -0.1:
+            acc = -acc
+        else:
+            acc = 0
+
+        tot_secs = 0
+        first_kw = last_kw = 0
+        while remaining_distance > 0 and instant_speed >= vf and acc < 0:
+            kW = vehicle_specific_power(instant_speed, slope, acc, m, A)
+            while kW > max_engine_power:
+                acc -= acc_decay
+                kW = vehicle_specific_power(instant_speed, slope, acc, m, A)
+            if tot_secs == 0:
+                first_kw = kW
+
+            # Al frenar la potencia no vuelve a superar el limite, la fase dura hasta vf o el final del tramo
+            steps = _phase_steps(instant_speed, acc, remaining_distance, vf)
+            total_power += _phase_energy(instant_speed, acc, steps, slope, m, A)
+            last_kw = vehicle_specific_power(instant_speed + (steps-1)*acc, slope, acc, m, A)
+            remaining_distance -= _phase_distance(instant_speed, acc, steps)
+            instant_speed += steps*acc
+            tot_secs += steps
+
+        if vo > vf and tot_secs > 1 and first_kw - last_kw < 0:
+            bat_regen = (first_kw - last_kw) * tot_secs / 3600
+
+    # Una vez ha terminado el proceso de aceleracion vemos simplemente si queda espacio por recorrer
+    if remaining_distance > 0:
+        t_remaining = remaining_distance / instant_speed
+        total_power += t_remaining * vehicle_specific_power(instant_speed, slope, 0, m, A)
+
+    return instant_speed, total_power/3600, bat_regen
+
+
+class SectionEnergyTable:
+    """
+    Precomputed section energies for a fixed route and truck. For every section and both modes
+    (EV/ICE power cap) the section is simulated once, with section_power_batch, for a grid of entry
+    speeds spaced speed_bucket m/s apart; a lookup interpolates linearly between the two closest
+    entry speeds. The grid starts at 0, so the sections entered after a stop are exact.
+
+    The table is an approximation, off by default: the simulation jumps in steps as the entry speed
+    changes, so interpolating between grid speeds does not converge as speed_bucket shrinks. On a
+    300-section route (001_verificar_energia.py) the worst-case error per section was 0.65 m/s of exit
+    speed and 0.068 kWh with 0.05 m/s buckets, and 1.0 m/s and 0.134 kWh with 1.0 m/s buckets. The
+    exit speed error carries into the next section and can change the SOC feasibility of a solution,
+    so the objectives and the repaired fronts differ from the ones of the exact simulation (see
+    max_deviation for the error on a given route).
+    """
+
+    def __init__(self, route: Route, truck: Truck, speed_bucket: float = 0.25, max_speed: float = None):
+        self.route = route
+        self.truck = truck
+        self.speed_bucket = speed_bucket
+
+        self.section_speeds = np.array([section.speed for section in route.sections], dtype=float)
+        self.section_slopes = np.array([section.slope for section in route.sections], dtype=float)
+        self.section_distances = np.array([section.distance for section in route.sections], dtype=float)
+
+        # La velocidad de salida de un tramo puede superar su velocidad media en un paso de aceleracion
+        if max_speed is None:
+            max_speed = self.section_speeds.max() + 2 * truck.acc
+        self.entry_speeds = np.arange(0, max_speed + speed_bucket, speed_bucket)
+
+        # Tablas [modo, tramo, velocidad de entrada], modo 0 -> ICE, 1 -> EV
+        shape = (2, len(route.sections), len(self.entry_speeds))
+        self.exit_speed = np.zeros(shape)
+        self.kwh = np.zeros(shape)
+        self.regen = np.zeros(shape)
+        for mode, max_power in enumerate((truck.ICE_power, truck.EV_power)):
+            self.exit_speed[mode], self.kwh[mode], self.regen[mode] = self._simulate(self.entry_speeds[np.newaxis, :], max_power)
+
+    def _simulate(self, entry_speeds, max_power):
+        return section_power_batch(entry_speeds, self.section_speeds[:, np.newaxis], self.truck.acc,
+                                   self.section_slopes[:, np.newaxis], self.section_distances[:, np.newaxis],
+                                   max_power, self.truck.weight, self.truck.frontal_section)
+
+    def lookup(self, index: int, entry_speed: float, electric: bool):
+        """
+        :return: (exit speed [m/s], energy [kWh], regenerated energy [kWh]) interpolated from the
+                 table, or None if entry_speed is outside the grid
+        """
+        position = entry_speed / self.speed_bucket
+        bucket = int(position)
+        if entry_speed < 0 or bucket >= len(self.entry_speeds) - 1:
+            return None
+
+        mode = 1 if electric else 0
+        weight = position - bucket
+        values = []
+        for table in (self.exit_speed, self.kwh, self.regen):
+            low, high = table[mode, index, bucket], table[mode, index, bucket + 1]
+            values.append(float(low + (high - low) * weight))
+        return tuple(values)
+
+    def lookup_array(self, indices, entry_speeds, electric):
+        """
+        Vectorized lookup: indices, entry_speeds and electric are broadcast together and the same
+        interpolation as lookup is applied element-wise.
+
+        :return: (exit speeds, kWh, regenerated kWh, valid) arrays, valid is False (and the values
+                 NaN) where the entry speed is outside the grid
+        """
+        indices, entry_speeds, electric = np.broadcast_arrays(np.asarray(indices, dtype=int), np.asarray(entry_speeds, dtype=float),
+                                                              np.asarray(electric, dtype=bool))
+        position = entry_speeds / self.speed_bucket
+        bucket = position.astype(int)
+        valid = (entry_speeds >= 0) & (bucket < len(self.entry_speeds) - 1)
+        bucket = np.where(valid, bucket, 0)
+        weight = position - bucket
+        mode = electric.astype(int)
+
+        values = []
+        for table in (self.exit_speed, self.kwh, self.regen):
+            low, high = table[mode, indices, bucket], table[mode, indices, bucket + 1]
+            values.append(np.where(valid, low + (high - low) * weight, np.nan))
+        return values[0], values[1], values[2], valid
+
+    def max_deviation(self):
+        """
+        Deviation of the interpolated values from the exact simulation, measured in the middle of
+        every bucket (the point furthest from the precomputed speeds), for every section and mode.
+
+        :return: dict with the maximum absolute error of the exit speed [m/s], energy [kWh] and
+                 regenerated energy [kWh], plus the mean absolute energy error [kWh]
+        """
+        middle = (self.entry_speeds[:-1] + self.speed_bucket / 2)[np.newaxis, :]
+        report = {"exit_speed": 0.0, "kwh": 0.0, "regen": 0.0, "kwh_mean": 0.0}
+        for mode, max_power in enumerate((self.truck.ICE_power, self.truck.EV_power)):
+            exact_speed, exact_kwh, exact_regen = self._simulate(middle, max_power)
+            error_kwh = np.abs((self.kwh[mode, :, :-1] + self.kwh[mode, :, 1:]) / 2 - exact_kwh)
+            error_speed = np.abs((self.exit_speed[mode, :, :-1] + self.exit_speed[mode, :, 1:]) / 2 - exact_speed)
+            error_regen = np.abs((self.regen[mode, :, :-1] + self.regen[mode, :, 1:]) / 2 - exact_regen)
+            report["exit_speed"] = max(report["exit_speed"], float(error_speed.max()))
+            report["kwh"] = max(report["kwh"], float(error_kwh.max()))
+            report["regen"] = max(report["regen"], float(error_regen.max()))
+            report["kwh_mean"] += float(error_kwh.mean()) / 2
+        return report
+
+ENERGY_ENGINES = ("stepping", "closed_form")
 
 class HybridTruckProblem(Problem):
 
@@ -179,7 +681,7 @@ class HybridTruckProblem(Problem):
     Hybrid Truck Problem representation
     """
 
-    def __init__(self, route: Route, truck: Truck, slope_percent_limit : float = -800, population_size: int = 100000, process_id: int = 0, take_stops : bool  = True):
+    def __init__(self, route: Route, truck: Truck, slope_percent_limit : float = -800, population_size: int = 100000, process_id: int = 0, take_stops : bool  = True, energy_engine: str = "stepping", section_cache: SectionPowerCache = None, energy_table_bucket: float = None, leg_memo_size: int = 20000):
         super(HybridTruckProblem, self).__init__()
         self.process_id = process_id
         self.route = route
@@ -187,6 +689,11 @@ class HybridTruckProblem(Problem):
         self.population_size = population_size
 
         self.number_of_sections = len(self.route.sections)
+
+        # Parametros de las secciones como arrays, para los calculos vectorizados
+        self.section_speeds = np.array([section.speed for section in self.route.sections], dtype=float)
+        self.section_slopes = np.array([section.slope for section in self.route.sections], dtype=float)
+        self.section_distances = np.array([section.distance for section in self.route.sections], dtype=float)
         
         self.slope_percent_limit = slope_percent_limit
 
@@ -215,22 +722,73 @@ class HybridTruckProblem(Problem):
 
 
         self.initial_solution = True
+        self.pending_seeds = []
+        # Soluciones de la heurística, se calculan una vez por problema
+        self.seeds = None
         self.epochs = 1
         self.evaluations = 0
 
         self.take_stops = take_stops
 
+        # Tramos entre paradas: en cada parada la velocidad vuelve a 0 y la bateria se recarga
+        self.legs = split_legs(self.route, self.take_stops)
+        # Resultados de tramos ya simulados, por patron de bits (0 lo desactiva)
+        self.leg_memo = LegResultMemo(leg_memo_size) if leg_memo_size else None
+
+        # Motor del modelo energetico: "stepping" (simulacion segundo a segundo, referencia) o "closed_form"
+        if energy_engine not in ENERGY_ENGINES:
+            raise ValueError(f"Unknown energy engine '{energy_engine}', expected one of {list(ENERGY_ENGINES)}")
+        self.energy_engine = energy_engine
+        # Cache opcional de simulaciones de tramos (compartible entre problemas de la misma ruta)
+        self.section_cache = section_cache
+        # Tabla opcional y aproximada de energias por tramo y velocidad de entrada (energy_table_bucket = ancho del
+        # intervalo en m/s), None usa la simulacion exacta
+        self.energy_table = SectionEnergyTable(route, truck, energy_table_bucket) if energy_table_bucket else None
+
         self.obj_directions = [self.MINIMIZE, self.MINIMIZE]
         self.obj_labels = ["Green Kms Travelled", "Emitted Gases"]
 
     
+    def count_evaluation(self):
+        """
+        Counts one evaluation in the epoch counters of the problem and in the class-level total_eval.
+        The counters are updated under counter_lock so that the evaluators that run evaluate from
+        several threads do not lose increments; the process pool evaluators count in the main
+        process the evaluations done by their workers.
+        """
+        with HybridTruckProblem.counter_lock:
+            if self.evaluations == self.population_size:
+                self.epochs += 1
+                self.evaluations = 0
+            self.evaluations += 1
+            HybridTruckProblem.total_eval += 1
+
+    def restart(self):
+        """
+        Resets the state of a run (the heuristic seeds already given to the population and the
+        epoch counters), so the same problem can be solved again, e.g. by a long-lived worker. The
+        section cache, the leg memory, the energy table and the heuristic seeds are kept.
+        """
+        self.initial_solution = True
+        self.pending_seeds = []
+        self.epochs = 1
+        self.evaluations = 0
+
+    def construction_options(self):
+        """
+        Keyword arguments (besides route and truck) to build an equivalent problem in another
+        process, e.g. for a sub-route or in the workers of a process pool.
+        """
+        return {"slope_percent_limit": self.slope_percent_limit,
+                "population_size": self.population_size,
+                "take_stops": self.take_stops,
+                "energy_engine": self.energy_engine,
+                "section_cache": self.section_cache,
+                "energy_table_bucket": self.energy_table.speed_bucket if self.energy_table is not None else None}
+
     def evaluate(self, solution: BinarySolution) -> BinarySolution:
 
-        if self.evaluations == self.population_size:
-            self.epochs += 1
-            self.evaluations = 0
-        
-        self.evaluations += 1
+        self.count_evaluation()
         count = 0
         evaluation_array = []
 
@@ -245,12 +803,75 @@ class HybridTruckProblem(Problem):
             else:
                 evaluation_array.append(1.0)
         """ VSP Model application in order to obtain the objectives"""
+        # Cada tramo entre paradas empieza con la bateria llena y parado, asi que solo se simulan los
+        # tramos con algun bit distinto al de la ultima evaluacion de esta solucion (o de su padre)
+        # y que tampoco esten en la memoria de tramos compartida por toda la poblacion
+        leg_cache = solution.attributes.get("leg_cache")
+        legs = []
+        for start, end in self.legs:
+            modes = [bool(mode) for mode in evaluation_array[start:end]]
+            if leg_cache is not None and leg_cache["modes"][start:end] == modes:
+                legs.append(leg_cache["legs"][len(legs)])
+            elif self.leg_memo is not None:
+                legs.append(self.leg_memo.get(leg_key(start, modes), lambda: self.evaluate_leg(evaluation_array, start, end)))
+            else:
+                legs.append(self.evaluate_leg(evaluation_array, start, end))
+
         total_emissions = 0
         green_kms = 0
+        l_emisiones = []
+        l_greenKm = []
+        l_kWh = []
+        l_SOC = []
+        l_recarga = []
+        invalid = False
+        for leg_emisiones, leg_greenKm, leg_kWh, leg_SOC, leg_recarga, leg_invalid in legs:
+            l_emisiones += leg_emisiones
+            l_greenKm += leg_greenKm
+            l_kWh += leg_kWh
+            l_SOC += leg_SOC
+            l_recarga += leg_recarga
+            invalid = invalid or leg_invalid
+        # Mismo orden de suma que la simulacion completa
+        for section_emissions, section_green_kms in zip(l_emisiones, l_greenKm):
+            total_emissions += section_emissions
+            green_kms += section_green_kms
+        remaining_charges = l_SOC
+        
+        # Penalizing invalid solutions
+
+        if invalid:
+            init = time.time()
+            solution, green_kms, total_emissions, l_emisiones, l_greenKm, l_kWh, l_SOC, l_recarga = self.easy_repair_solution(solution, remaining_charges)
+            # solution, green_kms, total_emissions = self.repair_solution(solution, remaining_charges)
+            end = time.time()
+            print(f"Tardo {end-init} s" )
+            # La reparacion cambia las variables, la siguiente evaluacion sera completa
+            solution.attributes.pop("leg_cache", None)
+        else:
+            green_kms *= -1
+            solution.attributes["leg_cache"] = {"modes": [bool(mode) for mode in evaluation_array], "legs": legs}
+            
+                
+        solution.objectives[0] = green_kms
+        solution.objectives[1] = total_emissions
+
+        solution.attributes["traces"] = section_traces(l_emisiones, l_greenKm, l_kWh, l_SOC, l_recarga)
+
+        # solution = self.__evaluate_constraints(solution)
+        print(f"Se le asigna {green_kms} Km {total_emissions} KgCO2")
+        return solution
+
+    def evaluate_leg(self, evaluation_array, start: int, end: int, section_results = None):
+        """
+        Simulates the sections start..end-1 of a leg (stop to stop), which begins with the battery
+        full and the truck stopped. If section_results is given (the (exit speed, kWh, regenerated
+        kWh) of every section of the leg) only the SOC recurrence is run.
+
+        :return: (l_emisiones, l_greenKm, l_kWh, l_SOC, l_recarga, invalid) of the leg
+        """
         remaining_charge = self.truck.charge
-        remaining_charges = []
-        # green_zone_emissions = [0.0, 0.0, 0.0, 0.0]
-        recharge = 0
+        current_speed = 0
         invalid = False
 
         l_emisiones = []
@@ -259,28 +880,18 @@ class HybridTruckProblem(Problem):
         l_SOC = []
         l_recarga = []
 
-        current_speed = 0
-
-        for index,green_percent  in enumerate(evaluation_array):
-            kW_h = 0
+        for index in range(start, end):
             section_emissions = 0
-            section_distance = self.route.sections[index].distance
-            
-            # Si es una parada parte de 0 la velocidad
-            if self.route.sections[index].stop_start == 1 and (self.take_stops or index == 0):
-                current_speed = 0
-
             max_power = self.truck.EV_power if evaluation_array[index] else self.truck.ICE_power
-            
-            current_speed, kWh, _, _, bat_regen = section_power(current_speed, self.route.sections[index].speed, self.truck.acc, 
-                                                                           self.route.sections[index].slope, self.route.sections[index].distance, 
-                                                                           max_power, index, self.truck.weight, self.truck.frontal_section)
-            
-            l_kWh.append(kWh)
 
+            if section_results is None:
+                current_speed, kWh, bat_regen = self.compute_section(current_speed, index, max_power)
+            else:
+                current_speed, kWh, bat_regen = section_results[index - start]
+
+            l_kWh.append(kWh)
 
             if kWh < 0:
-                gasoline_gallon_equivalent = 0
                 remaining_charge = decrease_battery_charge(remaining_charge, kWh / self.truck.electric_engine_efficiency, self.truck.charge)
             else:
                 remaining_charge = decrease_battery_charge(remaining_charge, bat_regen / self.truck.electric_engine_efficiency, self.truck.charge)
@@ -289,13 +900,10 @@ class HybridTruckProblem(Problem):
                 else:
                     gasoline_gallon_equivalent = kWh / self.truck.fuel_engine_efficiency * 0.02635046113 # Conversion factor
                     section_emissions += gasoline_gallon_equivalent * 10.180 # Kgs of CO2 emissions
-                    total_emissions += section_emissions
-            
+
             l_recarga.append(bat_regen)
             l_SOC.append(remaining_charge)
-            remaining_charges.append(remaining_charge)
             if evaluation_array[index]:
-                green_kms += self.route.sections[index].distance
                 l_emisiones.append(0)
                 l_greenKm.append(self.route.sections[index].distance)
             else:
@@ -305,36 +913,240 @@ class HybridTruckProblem(Problem):
             if remaining_charge < 0:
                 invalid = True
 
-            # Si hay una parada, recargar la batería
-            if (index + 1) >= len(self.route.sections) or (self.route.sections[index + 1].stop_start == 1 and self.take_stops):
-                remaining_charge = self.truck.charge
-        
-        # Penalizing invalid solutions
+        return l_emisiones, l_greenKm, l_kWh, l_SOC, l_recarga, invalid
+
+    def compute_section(self, current_speed: float, index: int, max_power: float):
+        """
+        Drives section `index` entering at current_speed with the given engine power cap, using the
+        configured energy engine. The precomputed energy table is used first, if the problem has
+        one, then the section cache.
+
+        :return: (exit speed [m/s], energy [kWh], regenerated energy [kWh])
+        """
+        if self.energy_table is not None:
+            result = self.energy_table.lookup(index, current_speed, max_power == self.truck.EV_power)
+            if result is not None:
+                return result
+
+        if self.section_cache is None:
+            return self.simulate_section(current_speed, index, max_power)
+
+        section = self.route.sections[index]
+        entry_speed = self.section_cache.quantize(current_speed)
+        key = (self.energy_engine, entry_speed, section.speed, self.truck.acc, section.slope, section.distance,
+               max_power, self.truck.weight, self.truck.frontal_section)
+        return self.section_cache.get(key, lambda: self.simulate_section(entry_speed, index, max_power))
+
+    def simulate_section(self, current_speed: float, index: int, max_power: float):
+        """
+        Runs the configured energy engine for one section, without going through the cache.
+        """
+        section = self.route.sections[index]
+        if self.energy_engine == "closed_form":
+            return section_power_closed_form(current_speed, section.speed, self.truck.acc, section.slope, section.distance,
+                                             max_power, index, self.truck.weight, self.truck.frontal_section)
+
+        current_speed, kWh, _, _, bat_regen = section_power(current_speed, section.speed, self.truck.acc, section.slope, section.distance,
+                                                            max_power, index, self.truck.weight, self.truck.frontal_section,
+                                                            with_traces=False)
+        return current_speed, kWh, bat_regen
+
+    def speed_power_profile(self, solution: BinarySolution):
+        """
+        Second-by-second speed and power profile of a solution (e.g. to chart it). The route is driven
+        again with the reference stepping simulation keeping the traces, so this is meant to be called
+        for one chosen solution, not inside the optimization.
+
+        :return: dict with the lists "section", "speed" [m/s] and "power" [kW], one element per second
+        """
+        count = 0
+        evaluation_array = []
+        for section in self.route.sections:
+            if section.slope_percent > self.slope_percent_limit:
+                evaluation_array.append(solution.variables[count])
+                count += 1
+            else:
+                evaluation_array.append(1.0)
 
-        HybridTruckProblem.total_eval += 1
-        if invalid:
-            init = time.time()
-            solution, green_kms, total_emissions, l_emisiones, l_greenKm, l_kWh, l_SOC, l_recarga = self.easy_repair_solution(solution, remaining_charges)
-            # solution, green_kms, total_emissions = self.repair_solution(solution, remaining_charges)
-            end = time.time()
-            print(f"Tardo {end-init} s" )
-        else:
-            green_kms *= -1
-            
-                
-        solution.objectives[0] = green_kms
-        solution.objectives[1] = total_emissions
+        profile = {"section": [], "speed": [], "power": []}
+        current_speed = 0
+        for index, section in enumerate(self.route.sections):
+            # Si es una parada parte de 0 la velocidad
+            if section.stop_start == 1 and (self.take_stops or index == 0):
+                current_speed = 0
 
-        solution.objectives[2] = l_emisiones
-        solution.objectives[3] = l_greenKm  
-        solution.objectives[4] = l_kWh
-        solution.objectives[5] = l_SOC
-        solution.objectives[6] = l_recarga
+            max_power = self.truck.EV_power if evaluation_array[index] else self.truck.ICE_power
+            current_speed, _, l_kw, l_speeds, _ = section_power(current_speed, section.speed, self.truck.acc, section.slope,
+                                                                section.distance, max_power, index, self.truck.weight,
+                                                                self.truck.frontal_section)
+            profile["section"] += [index] * len(l_speeds)
+            profile["speed"] += l_speeds
+            profile["power"] += l_kw
+
+        return profile
+
+    def evaluate_batch(self, modes_matrix):
+        """
+        Evaluates N solutions at once. The SOC/speed recurrence is still sequential inside every leg,
+        but it advances for all the solutions and all the legs (independent between stops) in the same
+        NumPy step, so the loop runs over the positions of the longest leg instead of over the
+        sections of every solution. The section energies come from the energy table, if the problem
+        has one, or from section_power_batch; the results are those of evaluate within floating
+        point rounding (the repair of the infeasible solutions is not applied here).
+
+        :param modes_matrix: (N solutions x sections) boolean matrix, True = electric
+        :return: dict with the per-section (N x sections) matrices "emissions", "green_km", "kwh",
+                 "soc" and "regen", and the per-solution arrays "total_green_km", "total_emissions"
+                 and "invalid"
+        """
+        modes = np.asarray(modes_matrix, dtype=bool)
+        if modes.ndim == 1:
+            modes = modes[np.newaxis, :]
+        n_solutions = modes.shape[0]
+
+        kwh = np.zeros(modes.shape)
+        regen = np.zeros(modes.shape)
+        soc = np.zeros(modes.shape)
+        emissions = np.zeros(modes.shape)
+
+        starts = np.array([start for start, _ in self.legs])
+        lengths = np.array([end - start for start, end in self.legs])
+        speed = np.zeros((n_solutions, len(self.legs)))
+        charge = np.full((n_solutions, len(self.legs)), float(self.truck.charge))
+        efficiency = self.truck.electric_engine_efficiency
+
+        for position in range(lengths.max()):
+            active = np.flatnonzero(lengths > position)
+            sections = starts[active] + position
+            electric = modes[:, sections]
+
+            exit_speed, section_kwh, bat_regen = self.batch_energy(sections[np.newaxis, :], speed[:, active], electric)
+
+            remaining_charge = charge[:, active]
+            regenerating = section_kwh < 0
+            after_regen = np.minimum(remaining_charge - bat_regen / efficiency, self.truck.charge)
+            remaining_charge = np.where(regenerating,
+                                        np.minimum(remaining_charge - section_kwh / efficiency, self.truck.charge),
+                                        np.where(electric, np.minimum(after_regen - section_kwh / efficiency, self.truck.charge), after_regen))
+
+            speed[:, active] = exit_speed
+            charge[:, active] = remaining_charge
+            kwh[:, sections] = section_kwh
+            regen[:, sections] = bat_regen
+            soc[:, sections] = remaining_charge
+            emissions[:, sections] = np.where(electric | regenerating, 0.0,
+                                              section_kwh / self.truck.fuel_engine_efficiency * 0.02635046113 * 10.180)
+
+        green_km = np.where(modes, self.section_distances, 0.0)
+
+        # Totales sumados tramo a tramo (cumsum), en el mismo orden que evaluate, para no añadir el error de la
+        # suma por pares de sum(); las energías de section_power_batch ya pueden diferir en el último bit
+        return {"emissions": emissions, "green_km": green_km, "kwh": kwh, "soc": soc, "regen": regen,
+                "total_green_km": np.cumsum(green_km, axis=1)[:, -1], "total_emissions": np.cumsum(emissions, axis=1)[:, -1],
+                "invalid": (soc < 0).any(axis=1)}
+
+    def evaluate_solution_list(self, solutions):
+        """
+        Evaluates a list of solutions with a single evaluate_batch call and stores the objectives as
+        evaluate does; the infeasible solutions are then repaired one by one. The solutions that carry
+        the leg results of their parents (offspring) go through the incremental evaluate instead.
+        """
+        batch = []
+        for solution in solutions:
+            if "leg_cache" in solution.attributes:
+                self.evaluate(solution)
+            else:
+                batch.append(solution)
+        if batch:
+            self.evaluate_batch_solutions(batch)
+        return solutions
+
+    def evaluate_batch_solutions(self, solutions):
+        """
+        Batch part of evaluate_solution_list: every solution is evaluated with evaluate_batch.
+        """
+        modes = np.ones((len(solutions), self.number_of_sections), dtype=bool)
+        variable_sections = [index for index, section in enumerate(self.route.sections)
+                             if section.slope_percent > self.slope_percent_limit]
+        for row, solution in enumerate(solutions):
+            modes[row, variable_sections] = solution.variables
+
+        results = self.evaluate_batch(modes)
+
+        for row, solution in enumerate(solutions):
+            self.count_evaluation()
+
+            l_emisiones = results["emissions"][row].tolist()
+            l_greenKm = results["green_km"][row].tolist()
+            l_kWh = results["kwh"][row].tolist()
+            l_SOC = results["soc"][row].tolist()
+            l_recarga = results["regen"][row].tolist()
+
+            if results["invalid"][row]:
+                solution, green_kms, total_emissions, l_emisiones, l_greenKm, l_kWh, l_SOC, l_recarga = self.easy_repair_solution(solution, l_SOC)
+                solution.attributes.pop("leg_cache", None)
+            else:
+                green_kms = -float(results["total_green_km"][row])
+                total_emissions = float(results["total_emissions"][row])
+                legs = [(l_emisiones[start:end], l_greenKm[start:end], l_kWh[start:end], l_SOC[start:end],
+                         l_recarga[start:end], False) for start, end in self.legs]
+                solution.attributes["leg_cache"] = {"modes": modes[row].tolist(), "legs": legs}
+
+            solution.objectives[0] = green_kms
+            solution.objectives[1] = total_emissions
+
+            solution.attributes["traces"] = section_traces(l_emisiones, l_greenKm, l_kWh, l_SOC, l_recarga)
+
+        return solutions
+
+    def batch_energy(self, section_indices, entry_speeds, electric_modes):
+        """
+        Vectorized counterpart of compute_section: table lookups where possible and
+        section_power_batch for the rest.
+
+        :return: (exit speeds, kWh, regenerated kWh) arrays
+        """
+        if self.energy_table is None:
+            return self.batch_section_power(section_indices, entry_speeds, electric_modes)
+
+        exit_speed, kwh, regen, valid = self.energy_table.lookup_array(section_indices, entry_speeds, electric_modes)
+        if not valid.all():
+            indices, speeds, electric = np.broadcast_arrays(section_indices, entry_speeds, electric_modes)
+            missing = ~valid
+            exit_speed[missing], kwh[missing], regen[missing] = self.batch_section_power(indices[missing], speeds[missing], electric[missing])
+        return exit_speed, kwh, regen
+
+    def batch_section_power(self, section_indices, entry_speeds, electric_modes):
+        """
+        Simulates several (section, entry speed, mode) combinations in a single call to
+        section_power_batch. The three arguments are broadcast together, so the same section can be
+        evaluated for a whole population of entry speeds, or many sections at once.
+
+        :return: (exit speeds, kWh, regenerated kWh) arrays
+        """
+        section_indices = np.asarray(section_indices, dtype=int)
+        max_power = np.where(np.asarray(electric_modes, dtype=bool), self.truck.EV_power, self.truck.ICE_power)
+
+        return section_power_batch(entry_speeds, self.section_speeds[section_indices], self.truck.acc,
+                                   self.section_slopes[section_indices], self.section_distances[section_indices],
+                                   max_power, self.truck.weight, self.truck.frontal_section)
+
+    def cruise_emissions(self):
+        """
+        KgCO2 emitted by every section when it is driven at its average speed with the ICE.
+        """
+        seconds = np.array([section.seconds for section in self.route.sections], dtype=float)
+        total_energy = self.cruise_power() * seconds / 3600
+        gasoline_gallon_equivalent = total_energy / self.truck.fuel_engine_efficiency * 0.02635046113
+        return gasoline_gallon_equivalent * 10.180
+
+    def cruise_power(self):
+        """
+        Power [kW] needed to keep the average speed of every section (no acceleration).
+        """
+        return vehicle_specific_power_array(self.section_speeds, self.section_slopes, 0,
+                                            self.truck.weight, self.truck.frontal_section)
 
-        # solution = self.__evaluate_constraints(solution)
-        print(f"Se le asigna {green_kms} Km {total_emissions} KgCO2")
-        return solution
-    
     def evaluate_single(self, solution: BinarySolution) -> BinarySolution:
 
         # if self.evaluations == self.population_size:
@@ -377,9 +1189,7 @@ class HybridTruckProblem(Problem):
 
             max_power = self.truck.EV_power if evaluation_array[index] else self.truck.ICE_power
 
-            current_speed, kWh, _, _, bat_regen = section_power(current_speed, self.route.sections[index].speed, self.truck.acc, 
-                                                                           self.route.sections[index].slope, self.route.sections[index].distance, 
-                                                                           max_power, index, self.truck.weight, self.truck.frontal_section)
+            current_speed, kWh, bat_regen = self.compute_section(current_speed, index, max_power)
                 
             if kWh < 0:
                 gasoline_gallon_equivalent = 0
@@ -457,9 +1267,7 @@ class HybridTruckProblem(Problem):
             max_power = self.truck.EV_power if evaluation_array[index] else self.truck.ICE_power
 
             print(f"Variables: {solution.variables[index]} - {self.route.sections[index].speed} - {self.truck.acc} - {self.route.sections[index].slope} - {self.route.sections[index].distance} - {max_power} - {index} - {self.truck.weight} - {self.truck.frontal_section}")
-            current_speed, kWh, _, _, bat_regen = section_power(current_speed, self.route.sections[index].speed, self.truck.acc, 
-                                                                           self.route.sections[index].slope, self.route.sections[index].distance, 
-                                                                           max_power, index, self.truck.weight, self.truck.frontal_section)
+            current_speed, kWh, bat_regen = self.compute_section(current_speed, index, max_power)
             
             print(f"Se ha calculado {kWh} kWh")
             if kWh < 0:
@@ -506,9 +1314,16 @@ class HybridTruckProblem(Problem):
     
     index_g = 0
     total_eval = 0
+    counter_lock = threading.Lock()
 
 
     def easy_repair_solution(self, solution, remaining_charges):
+        """
+        Switches electric sections to ICE, in descending l_segments_kwh order, until no SOC is
+        negative. The flips go through an IncrementalRouteState, so each one only simulates its own
+        leg until the exit speed is the same as before and the lowest SOC of the leg is read from its
+        SocIndex in O(log n), instead of evaluating the whole route after every flip.
+        """
         full_solution = []
         count = 0
 
@@ -520,41 +1335,32 @@ class HybridTruckProblem(Problem):
             else:
                 full_solution.append(True)
         
-        indices = [i for i, value in enumerate(full_solution) if value]
+        # Solo se pasan a combustión los tramos que son variables, los de bajada pronunciada siguen en eléctrico
+        indices = set(i for i, value in enumerate(full_solution)
+                      if value and self.route.sections[i].slope_percent > self.slope_percent_limit)
 
         indices_kwh = np.argsort(self.l_segments_kwh)
 
         indices_kwh = [index for index in indices_kwh if index in indices]
 
-        # print([self.l_segments_kwh[index] for index in indices_kwh])
-                # Miro si remaining charge es negativo -> deshago el cambio
+        state = IncrementalRouteState(self, full_solution)
+
+        # Miro si remaining charge es negativo -> deshago el cambio
         curr_eliminar = len(indices_kwh) - 1
         negativo = True
         while negativo and curr_eliminar >= 0:
-            # random_segment = random.choice(indices)  # Tomar un elemento aleatorio
-            # indices.remove(random_segment)  # Eliminar el elemento del vector
-
-            full_solution[indices_kwh[curr_eliminar]] = False
-            total_emissions, green_kms, remaining_charges, l_emisiones_aux, l_greenKm_aux, l_kWh_aux, l_regen = self.simple_evaluate(full_solution)
+            state.flip(indices_kwh[curr_eliminar], False)
             curr_eliminar -= 1
-            negativo = False
-            for v in remaining_charges:
-                if v < 0:
-                    negativo = True
+            negativo = not state.is_feasible()
+
+        full_solution = state.modes
+        # Las trazas tienen un valor por tramo, también en los que siempre se hacen en eléctrico
+        total_emissions, green_kms, l_SOC, l_emisiones, l_greenKm, l_kWh, l_recarga = state.evaluation()
 
-        l_emisiones = []
-        l_greenKm = []
-        l_kWh = []
-        l_SOC = remaining_charges
-        l_recarga = l_regen
-        
         count = 0
         for i, section in enumerate(self.route.sections):
             if section.slope_percent > self.slope_percent_limit:
                 solution.variables[count] = full_solution[i]
-                l_emisiones.append(l_emisiones_aux[i])
-                l_greenKm.append(l_greenKm_aux[i])
-                l_kWh.append(l_kWh_aux[i])
                 count += 1
 
 
@@ -562,8 +1368,9 @@ class HybridTruckProblem(Problem):
         return solution, -1 * green_kms, total_emissions,  l_emisiones, l_greenKm, l_kWh, l_SOC, l_recarga
 
     def repair_solution(self, solution, remaining_charges):
-        print(f"Hay que reparar {HybridTruckProblem.index_g}/{HybridTruckProblem.total_eval}")
-        HybridTruckProblem.index_g += 1
+        with HybridTruckProblem.counter_lock:
+            print(f"Hay que reparar {HybridTruckProblem.index_g}/{HybridTruckProblem.total_eval}")
+            HybridTruckProblem.index_g += 1
         full_solution = []
         count = 0
 
@@ -649,9 +1456,7 @@ class HybridTruckProblem(Problem):
 
             max_power = self.truck.EV_power if evaluation_array[index] else self.truck.ICE_power
             # print(f"Hola {index} - {current_speed} {self.route.sections[index].speed} - {self.truck.acc} - {self.route.sections[index].slope} - {self.route.sections[index].distance} - {max_power} - {index} - {self.truck.weight} - {self.truck.frontal_section}")
-            current_speed, kWh, _, _, bat_regen = section_power(current_speed, self.route.sections[index].speed, self.truck.acc, 
-                                                                           self.route.sections[index].slope, self.route.sections[index].distance, 
-                                                                           max_power,index, self.truck.weight, self.truck.frontal_section)
+            current_speed, kWh, bat_regen = self.compute_section(current_speed, index, max_power)
             l_regen.append(bat_regen)
             # print("Aja")
             l_kWh.append(kWh)
@@ -688,182 +1493,80 @@ class HybridTruckProblem(Problem):
         return total_emissions, green_kms, remaining_charges,  l_emisiones, l_greenKm, l_kWh, l_regen
 
 
-    def heuristic_individual(self,  modo_kgCO2_distancia : bool = 1):
-        n_variables = 0
-        for i, section in enumerate(self.route.sections):
-            if section.slope_percent > self.slope_percent_limit:
-                n_variables += 1
-
-        reference_solution = BinarySolution(number_of_variables=n_variables, number_of_objectives=self.number_of_objectives)
-        reference_solution.objectives.append([])
-        reference_solution.objectives.append([])
-        reference_solution.objectives.append([])
-        reference_solution.objectives.append([])
-        reference_solution.objectives.append([])
+    def heuristic_seeds(self, modes=(1, 2, 3)):
+        """
+        Greedy heuristic of heuristic_individual for several phase 3 orderings in one pass. Phases 1
+        and 2 are shared, and every tentative change goes through an IncrementalRouteState, so it only
+        simulates the rest of its own leg instead of evaluating the whole route.
 
+        :param modes: phase 3 orderings, 1 -> kgCO2/distance, 2 -> ascending slope, 3 -> descending emissions
+        :return: dict mode -> (valid_solution, final_sol_array, emissions, green_kms, remainingCharge)
+        """
         sections = self.route.sections
 
         a = [section.slope_percent for section in sections]
         indexes = np.argsort(a)
-        emissions = 10000
-        green_kms = 0
         valid_solution = True
         # heurística
         # 0 - Inicializamos las zonas ZE obligatorias
-        sol = [0] * len(sections)
-        evaluation_array = []
-
+        state = IncrementalRouteState(self, [False] * len(sections))
 
         self.l_segments_kwh = []
+        cruise_power = self.cruise_power()
         # 1.- Todos los tramos que tienen potencia negativa se hacne obligatoriamente en eléctrico
         for index in indexes:
-            total_energy = vehicle_specific_power(
-                    sections[index].speed, sections[index].slope,
-                    0, self.truck.weight, self.truck.frontal_section)
-            print(f"Variables: {sections[index].speed}, {sections[index].slope}, {0}, {self.truck.weight}, {self.truck.frontal_section}\n Total: {total_energy}")
+            total_energy = cruise_power[index]
             self.l_segments_kwh.append(total_energy)
             if total_energy < 0:
-                sol[index] = True
-                print("Hace el simple evaluate")
-                emissions, green_kms, remainingCharge, l_emisiones_aux, l_greenKm_aux, l_kWh_aux, l_regen = self.simple_evaluate(sol)
+                state.try_electric(index)
 
-                # Miro si remaining charge es negativo -> deshago el cambio
-                negativo = False
-                for v in remainingCharge:
-                    if v < 0:
-                        negativo = True
-                if negativo:
-                    sol[index] = False
-
-        # print("Solución inicial tras fase 1:", sol)
-        
-        # 2.- todas las cuestas abajo por debajo de un umbral se hacen en eléctrico 
+        # 2.- todas las cuestas abajo por debajo de un umbral se hacen en eléctrico
         for index in indexes:
-            # print(a[index])
-            if a[index] < self.slope_percent_limit and not sol[index]:
-                sol[index] = True
-                # print(config_slope_electric)
-                emissions, green_kms, remainingCharge, l_emisiones_aux, l_greenKm_aux, l_kWh_aux, l_regen = self.simple_evaluate(sol)
+            if a[index] < self.slope_percent_limit and not state.modes[index]:
+                if not state.try_electric(index):
+                    valid_solution = False
+                    print("Pero es falso")
+
+        seeds = {}
+        if not valid_solution:
+            emissions, green_kms, _, _, _, _, _ = state.evaluation()
+            for modo in modes:
+                seeds[modo] = (valid_solution, [], emissions, green_kms, [])
+            return seeds
+
+        # 3.- Dependiendo
+        #     1 -> Por valor KGCO2/Distancia
+        #     2 -> Por orden ascendiente de pendiente
+        #     3 -> De mayor a menor emisiones
+        print("Empieza fase 3: activación por kgCO2/km")
+        cruise_emissions = self.cruise_emissions()
+        orders = {1: np.argsort(cruise_emissions / self.section_distances),
+                  2: [index for index in indexes if a[index] > self.slope_percent_limit],
+                  3: np.argsort(-cruise_emissions)}
+        for modo in modes:
+            mode_state = state.fork()
+            for index in orders[modo if modo in (1, 2) else 3]:
+                if not mode_state.modes[index]:
+                    mode_state.try_electric(index)
 
-                # Miro si remaining charge es negativo -> deshago el cambio
-                negativo = False
-                for v in remainingCharge:
-                    if v < 0:
-                        negativo = True
-                        valid_solution = False
-                        print("Pero es falso")
-                if negativo:
-                    sol[index] = False
-        final_sol_array = []
+            final_sol_array = []
+            for index, section in enumerate(sections):
+                if section.slope_percent >= self.slope_percent_limit:
+                    final_sol_array.append(mode_state.modes[index])
 
-        
+            emissions, green_kms, remainingCharge, _, _, _, _ = mode_state.evaluation()
+            seeds[modo] = (valid_solution, final_sol_array, emissions, green_kms, remainingCharge)
 
-        remainingCharge = []
-        if valid_solution:
-            # 3.- Dependiendo 
-            #     1 -> Por valor KGCO2/Distancia
-            #     2 -> Por orden ascendiente de pendiente
-            #     3 -> De mayor a menor emisiones
-            l_emissions_distance_section = []
-            print("Empieza fase 3: activación por kgCO2/km")
-            if modo_kgCO2_distancia == 1:
-                print("Por aca :D")
-                
-                for index, section in enumerate(sections):
-                    total_energy = vehicle_specific_power(
-                            section.speed, section.slope,
-                            0, self.truck.weight, self.truck.frontal_section) * section.seconds / 3600
-                    gasoline_gallon_equivalent = total_energy / self.truck.fuel_engine_efficiency * 0.02635046113
-                    total_emissions = gasoline_gallon_equivalent * 10.180
-                    l_emissions_distance_section.append(total_emissions/section.distance)
-                
-                indexes_emissions = np.argsort(l_emissions_distance_section)
+        return seeds
 
-                reference_solution.variables = sol
-                
-                print("Se llama a manual inicialmente")
-                self.manual_evaluate(reference_solution)
-                print("Prueba con manual")
-
-                for index in indexes_emissions:
-                    if not sol[index]:
-                        sol[index] = True
-                        emissions, green_kms, remainingCharge, l_emisiones_aux, l_greenKm_aux, l_kWh_aux, l_regen = self.simple_evaluate(sol)
-
-                        # Miro si remaining charge es negativo -> deshago el cambio
-                        negativo = False
-                        for v in remainingCharge:
-                            if v < 0:
-                                negativo = True
-                        if negativo:
-                            sol[index] = False
-                            # print("Revierto")
-                reference_solution.variables = sol
-            elif modo_kgCO2_distancia == 2: # Por orden de pendientes
-                # print("Por aca")
-                for index in indexes:
-                    if a[index]> self.slope_percent_limit and not sol[index] :
-                        # Lo meto
-                        sol[index] = True
-                        emissions, green_kms, remainingCharge, l_emisiones_aux, l_greenKm_aux, l_kWh_aux, l_regen = self.simple_evaluate(sol)
-
-                        # Miro si remaining charge es negativo -> deshago el cambio
-                        negativo = False
-                        for v in remainingCharge:
-                            if v < 0:
-                                negativo = True
-                        if negativo:
-                            sol[index] = False
-                            # emissions, green_kms, remainingCharge, _ = self.simple_evaluate(sol)
-            else: # Por numero de emisiones
-                # print("Emisiones")
-                l_emissions = []
-                for index, section in enumerate(sections):
-
-                    total_energy = vehicle_specific_power(
-                            section.speed, section.slope,
-                            0, self.truck.weight, self.truck.frontal_section) * section.seconds / 3600
-                    gasoline_gallon_equivalent = total_energy / self.truck.fuel_engine_efficiency * 0.02635046113
-                    total_emissions = gasoline_gallon_equivalent * 10.180
-                    l_emissions.append(-total_emissions)
-                
-                indexes_emissions = np.argsort(l_emissions)
-
-                for index in indexes_emissions:
-                    if not sol[index]:
-                        sol[index] = True
-                        emissions, green_kms, remainingCharge, l_emisiones_aux, l_greenKm_aux, l_kWh_aux, l_regen = self.simple_evaluate(sol)
-
-                        # Miro si remaining charge es negativo -> deshago el cambio
-                        negativo = False
-                        for v in remainingCharge:
-                            if v < 0:
-                                negativo = True
-                        if negativo:
-                            sol[index] = False
-                            # print("Revierto")
-            # emissions, green_kms, remainingCharge, _ = self.simple_evaluate(sol)
+    def heuristic_individual(self,  modo_kgCO2_distancia : bool = 1):
+        """
+        Heuristic solution for one phase 3 ordering (see heuristic_seeds).
+
+        :return: (valid_solution, final_sol_array, emissions, green_kms, remainingCharge)
+        """
+        return self.heuristic_seeds((modo_kgCO2_distancia,))[modo_kgCO2_distancia]
 
-            final_sol_array = []
-            for index, section in enumerate(sections):
-                if section.slope_percent >= self.slope_percent_limit:
-                    final_sol_array.append(sol[index])
-            
-            emissions, green_kms, remainingCharge, l_emisiones_aux, l_greenKm_aux, l_kWh_aux, l_regen = self.simple_evaluate(sol)
-
-            negativo = False
-            for v in remainingCharge:
-                if v < 0:
-                    negativo = True
-            # print(final_sol_array)
-            reference_solution.variables = final_sol_array
-
-            print("Se llama a manual finalmente")
-            self.manual_evaluate(reference_solution)
-            print("Prueba con manual")
-        # input("")
-        return valid_solution, final_sol_array, emissions, green_kms, remainingCharge
-    
     i_aux = 0
     def create_solution(self) -> BinarySolution:
         print("Se está creando una nueva solución")
@@ -873,20 +1576,22 @@ class HybridTruckProblem(Problem):
                 n_variables += 1
 
         new_solution = BinarySolution(number_of_variables= n_variables, number_of_objectives=self.number_of_objectives)
-        new_solution.objectives.append([])
-        new_solution.objectives.append([])
-        new_solution.objectives.append([])
-        new_solution.objectives.append([])
-        new_solution.objectives.append([])
         count = 0
         if self.initial_solution:
+            # Las tres ordenaciones de la heurística dan las primeras soluciones, sin repetir
             print("Con {} variables".format(n_variables))
-            _, sample_solution, emissions, green_kms, _ = self.heuristic_individual()
-            print("No termina")
-            new_solution.variables = sample_solution
+            if self.seeds is None:
+                self.seeds = self.heuristic_seeds()
+            for modo in (1, 2, 3):
+                valid_solution, sample_solution, _, _, _ = self.seeds[modo]
+                if valid_solution and sample_solution not in self.pending_seeds:
+                    self.pending_seeds.append(sample_solution)
             self.initial_solution = False
+
+        if self.pending_seeds:
+            new_solution.variables = np.array(self.pending_seeds.pop(0), dtype=bool)
         else:
-            new_solution.variables = [bool(random.randint(0, 1)) for _ in range(self.number_of_sections)]
+            new_solution.variables = np.array([bool(random.randint(0, 1)) for _ in range(n_variables)], dtype=bool)
 
         # print(f"Creo {new_solution}")
         return new_solution
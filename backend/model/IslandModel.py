@@ -0,0 +1,269 @@
+from HybridTruckProblem_Demo import HybridTruckProblem
+
+from jmetal.algorithm.multiobjective.mocell import MOCell, SynchronousMOCell
+from jmetal.core.solution import BinarySolution
+from jmetal.operator.crossover import TPXCrossover
+from jmetal.operator.mutation import BitFlipMutation
+from jmetal.util.archive import BiObjectiveCrowdingDistanceArchive
+from jmetal.util.comparator import DominanceComparator
+from jmetal.util.evaluator import BatchEvaluator
+from jmetal.util.neighborhood import C9
+from jmetal.util.termination_criterion import StoppingByEvaluations
+
+from multiprocessing import Barrier, Process, Queue, parent_process, resource_tracker, shared_memory
+from threading import BrokenBarrierError
+from time import time
+import os
+import queue
+import random
+import signal
+import threading
+import traceback
+
+import numpy as np
+
+
+def migration_views(buffer, islands: int, migrants: int, number_of_variables: int):
+    """
+    NumPy views of the shared migration buffer: the number of migrants every island wrote in its
+    last migration and the packed bits of every migrant, one row per island.
+    """
+    counts = np.ndarray((islands,), dtype=np.int32, buffer=buffer.buf)
+    bits = np.ndarray((islands, migrants, (number_of_variables + 7) // 8), dtype=np.uint8, buffer=buffer.buf,
+                      offset=counts.nbytes)
+    return counts, bits
+
+
+def migration_buffer_size(islands: int, migrants: int, number_of_variables: int) -> int:
+    return islands * 4 + islands * migrants * ((number_of_variables + 7) // 8)
+
+
+def _stop(signum, frame):
+    raise SystemExit(-signum)
+
+
+def run_island(island, problem, options, barrier, buffer_name, results):
+    """
+    Body of the process of one island: a MOCell over its share of the evaluations that, every
+    migration_generations generations, writes up to migrants members of its archive (and how many
+    it wrote) to its row of the shared buffer, waits for the other islands and takes their migrants.
+
+    The final archive is put in results as (island, [(variables, objectives, traces)]), or
+    (island, None, error) if the island fails, in which case the barrier is broken so the other
+    islands stop migrating instead of waiting for it. If the main process dies (a job killed while
+    cancelling it) the island stops without a result.
+    """
+    buffer = None
+    try:
+        # Los procesos heredan el estado del generador aleatorio, cada isla necesita el suyo
+        seed = options["seed"] + island if options["seed"] is not None else None
+        random.seed(seed)
+        np.random.seed(None if seed is None else seed % 2 ** 32)
+
+        buffer = shared_memory.SharedMemory(name=buffer_name)
+        counts, migrants = migration_views(buffer, options["islands"], options["migrants"], problem.number_of_variables)
+
+        population_size = options["population_size"]
+        algorithm_class = SynchronousMOCell if options["synchronous"] else MOCell
+        algorithm = algorithm_class(problem=problem,
+                                    population_size=population_size,
+                                    neighborhood=C9(options["neighborhood_size"], options["neighborhood_size"]),
+                                    archive=BiObjectiveCrowdingDistanceArchive(population_size),
+                                    mutation=BitFlipMutation(2.0 / len(problem.route.sections)),
+                                    crossover=TPXCrossover(options["crossover_probability"]),
+                                    termination_criterion=StoppingByEvaluations(max_evaluations=options["max_evaluations"]),
+                                    population_evaluator=BatchEvaluator())
+
+        algorithm.start_computing_time = time()
+        algorithm.solutions = algorithm.evaluate(algorithm.create_initial_solutions())
+        algorithm.init_progress()
+
+        # Todas las islas hacen el mismo número de generaciones y de migraciones, así ninguna se queda
+        # esperando en la barrera a otra que ya ha terminado
+        steps_per_generation = 1 if options["synchronous"] else population_size
+        dominance_comparator = DominanceComparator()
+        migrating = options["islands"] > 1
+        for generation in range(1, options["generations"] + 1):
+            if not parent_process().is_alive():
+                print(f"Isla {island}: el proceso principal ha terminado, se para la isla")
+                barrier.abort()
+                return
+
+            for _ in range(steps_per_generation):
+                algorithm.step()
+                algorithm.update_progress()
+
+            if migrating and generation % options["migration_generations"] == 0 and generation < options["generations"]:
+                archive = algorithm.archive.solution_list
+                emigrants = random.sample(archive, min(options["migrants"], len(archive)))
+                for row, solution in enumerate(emigrants):
+                    migrants[island, row] = np.packbits(np.asarray(solution.variables, dtype=bool))
+                # Con menos miembros en el archivo que migrantes, el resto de filas es de migraciones anteriores
+                counts[island] = len(emigrants)
+                try:
+                    barrier.wait()
+                    immigrants = []
+                    for other in range(options["islands"]):
+                        if other != island:
+                            for row in range(counts[other]):
+                                solution = BinarySolution(number_of_variables=problem.number_of_variables,
+                                                          number_of_objectives=problem.number_of_objectives)
+                                solution.variables = np.unpackbits(migrants[other, row],
+                                                                   count=problem.number_of_variables).astype(bool)
+                                immigrants.append(solution)
+                    barrier.wait()
+                except BrokenBarrierError:
+                    print(f"Isla {island}: otra isla ha fallado, se sigue sin migraciones")
+                    migrating = False
+                    continue
+
+                # Los inmigrantes se evalúan en esta isla y ocupan una celda al azar si no son peores que ella
+                for solution in algorithm.evaluate(immigrants):
+                    algorithm.archive.add(solution)
+                    cell = random.randrange(population_size)
+                    if dominance_comparator.compare(algorithm.solutions[cell], solution) != -1:
+                        algorithm.solutions[cell] = solution
+                print(f"Isla {island}: generación {generation}, {len(immigrants)} inmigrantes")
+
+        results.put((island, [(np.asarray(solution.variables, dtype=bool), list(solution.objectives),
+                               solution.attributes.get("traces"))
+                              for solution in algorithm.get_result()]))
+    except Exception:
+        barrier.abort()
+        results.put((island, None, traceback.format_exc()))
+    finally:
+        if buffer is not None:
+            counts = migrants = None
+            buffer.close()
+
+
+class IslandMOCell:
+    """
+    Island model of MOCell: islands MOCell runs in separate processes, each one with
+    max_evaluations / islands evaluations, that every migration_generations generations send
+    migrants random members of their archives to all the other islands through a shared memory
+    buffer (packed bits, the immigrants are evaluated by the receiving island). The archives of
+    the islands are merged at the end in a crowding distance archive of population_size solutions.
+    If the run is interrupted (a cancelled job, SIGTERM included) the islands still running are
+    stopped and listed in interrupted_islands.
+
+    :param problem: the HybridTruckProblem to solve
+    :param population_size: population (and archive) size of every island
+    :param neighborhood_size: side of the C9 grid of every island
+    :param crossover_probability: TPX crossover probability
+    :param max_evaluations: evaluations of all the islands together (immigrants not included)
+    :param islands: number of islands and processes (None = one per core)
+    :param migration_generations: generations between migrations
+    :param migrants: solutions every island sends in each migration
+    :param synchronous: islands with SynchronousMOCell instead of the steady-state MOCell
+    :param seed: seed of the random generator of the first island (the i-th one uses seed + i), None for a random one
+    :param poll_interval: seconds between the checks for islands that died without reporting their result
+    :param stop_timeout: seconds an island has to stop after a SIGTERM, when the run is interrupted, before it is killed
+    """
+
+    def __init__(self, problem: HybridTruckProblem, population_size: int, neighborhood_size: int,
+                 crossover_probability: float, max_evaluations: int, islands: int = None,
+                 migration_generations: int = 10, migrants: int = 1, synchronous: bool = False, seed: int = None,
+                 poll_interval: float = 1.0, stop_timeout: float = 10.0):
+        self.problem = problem
+        self.poll_interval = poll_interval
+        self.stop_timeout = stop_timeout
+        self.islands = islands or os.cpu_count()
+        self.population_size = population_size
+        self.options = {"islands": self.islands,
+                        "population_size": population_size,
+                        "neighborhood_size": neighborhood_size,
+                        "crossover_probability": crossover_probability,
+                        "max_evaluations": max_evaluations // self.islands,
+                        "generations": max(0, (max_evaluations // self.islands - population_size) // population_size),
+                        "migration_generations": max(1, migration_generations),
+                        "migrants": max(1, migrants),
+                        "synchronous": synchronous,
+                        "seed": seed}
+
+        self.solutions = []
+        self.total_computing_time = 0
+        self.failed_islands = []
+        self.interrupted_islands = []
+
+    def run(self):
+        start_computing_time = time()
+
+        barrier = Barrier(self.islands)
+        results = Queue()
+        buffer = shared_memory.SharedMemory(
+            create=True, size=migration_buffer_size(self.islands, self.options["migrants"], self.problem.number_of_variables))
+        counts, _ = migration_views(buffer, self.islands, self.options["migrants"], self.problem.number_of_variables)
+        counts[:] = 0
+        counts = None
+        # Las islas heredan el resource tracker del principal, que es el único que libera el buffer
+        resource_tracker.ensure_running()
+        processes = [Process(target=run_island, args=(island, self.problem, self.options, barrier, buffer.name, results))
+                     for island in range(self.islands)]
+        # Un SIGTERM (trabajo cancelado en un subproceso) llega como SystemExit, así el finally para las islas
+        previous_handler = None
+        if threading.current_thread() is threading.main_thread() and signal.getsignal(signal.SIGTERM) == signal.SIG_DFL:
+            previous_handler = signal.signal(signal.SIGTERM, _stop)
+        try:
+            for process in processes:
+                process.start()
+
+            # Se recogen los resultados antes del join, la cola no se vacía sola
+            archives = []
+            pending = set(range(self.islands))
+            while pending:
+                try:
+                    result = results.get(timeout=self.poll_interval)
+                except queue.Empty:
+                    # Una isla que muere sin poder avisar (OOM, segfault...) cuenta como fallida
+                    for island in sorted(pending):
+                        if processes[island].exitcode not in (None, 0):
+                            print(f"Isla {island} ha terminado inesperadamente ({processes[island].exitcode})")
+                            self.failed_islands.append(island)
+                            pending.discard(island)
+                            barrier.abort()
+                    continue
+                pending.discard(result[0])
+                if result[1] is None:
+                    print(f"Isla {result[0]} ha fallado:\n{result[2]}")
+                    self.failed_islands.append(result[0])
+                else:
+                    archives.append(result[1])
+            for process in processes:
+                process.join()
+        finally:
+            # Interrumpido o cancelado: las islas no son daemon y seguirían hasta agotar sus evaluaciones
+            self.interrupted_islands = [island for island, process in enumerate(processes) if process.is_alive()]
+            if self.interrupted_islands:
+                print(f"Se paran las islas {self.interrupted_islands}")
+                barrier.abort()
+            for island in self.interrupted_islands:
+                processes[island].terminate()
+            for island in self.interrupted_islands:
+                processes[island].join(timeout=self.stop_timeout)
+                if processes[island].is_alive():
+                    processes[island].kill()
+                    processes[island].join()
+            if previous_handler is not None:
+                signal.signal(signal.SIGTERM, previous_handler)
+            buffer.close()
+            buffer.unlink()
+
+        archive = BiObjectiveCrowdingDistanceArchive(self.population_size)
+        for island_archive in archives:
+            for variables, objectives, traces in island_archive:
+                solution = BinarySolution(number_of_variables=self.problem.number_of_variables,
+                                          number_of_objectives=self.problem.number_of_objectives)
+                solution.variables = variables
+                solution.objectives = objectives
+                solution.attributes["traces"] = traces
+                archive.add(solution)
+        self.solutions = archive.solution_list
+
+        self.total_computing_time = time() - start_computing_time
+
+    def get_result(self):
+        return self.solutions
+
+    def get_name(self) -> str:
+        return 'Island MOCell'
@@ -0,0 +1,110 @@
+from jmetal.core.solution import BinarySolution
+
+import numpy as np
+
+
+# ****Fronts of (green km, emissions) points, per leg and for the whole route****
+def pareto_filter(points):
+    """
+    Non-dominated points, maximizing the green km and minimizing the emissions.
+
+    :param points: iterable of (green_km, emissions, payload)
+    :return: list of the non-dominated points sorted by descending green km
+    """
+    front = []
+    lowest_emissions = float("inf")
+    for point in sorted(points, key=lambda point: (-point[0], point[1])):
+        if point[1] < lowest_emissions:
+            front.append(point)
+            lowest_emissions = point[1]
+    return front
+
+
+def thin_front(front, size: int):
+    """
+    Keeps at most size points of a front sorted by pareto_filter: the two extremes and the points
+    with the largest crowding distance, as the CrowdingDistanceArchive does with solutions.
+    """
+    if size is None or len(front) <= size:
+        return front
+    if size < 2:
+        return front[:size]
+
+    green_range = (front[0][0] - front[-1][0]) or 1.0
+    emissions_range = (front[-1][1] - front[0][1]) or 1.0
+    crowding = [float("inf")] + [
+        (front[position - 1][0] - front[position + 1][0]) / green_range +
+        (front[position + 1][1] - front[position - 1][1]) / emissions_range
+        for position in range(1, len(front) - 1)] + [float("inf")]
+
+    kept = sorted(sorted(range(len(front)), key=lambda position: -crowding[position])[:size])
+    return [front[position] for position in kept]
+
+
+def merge_leg_fronts(leg_fronts, size: int = None):
+    """
+    Front of the route from the fronts of its legs. The legs are independent, so every combination
+    of one point per leg is a route solution (Minkowski sum of the fronts); after each leg only the
+    non-dominated combinations are kept, thinned to size points.
+
+    :param leg_fronts: one front per leg, of (green_km, emissions, payload)
+    :return: front of (green_km, emissions, tuple with the payload of every leg)
+    """
+    route_front = [(0.0, 0.0, ())]
+    for leg_front in leg_fronts:
+        combinations = [(green_km + leg_green_km, emissions + leg_emissions, payloads + (payload,))
+                        for green_km, emissions, payloads in route_front
+                        for leg_green_km, leg_emissions, payload in leg_front]
+        route_front = thin_front(pareto_filter(combinations), size)
+    return route_front
+
+
+def fallback_leg_modes(problem, start: int, end: int):
+    """
+    Modes of a leg without any feasible point: combustion, except the sections always driven in
+    electric. Its objectives are left to the evaluation (and repair) of the route solutions.
+    """
+    return [section.slope_percent <= problem.slope_percent_limit for section in problem.route.sections[start:end]]
+
+
+def route_solutions(problem, leg_fronts, size: int = None):
+    """
+    Evaluated route solutions of the merged front of the legs (see merge_leg_fronts). A leg whose
+    front is empty (None or []) has no feasible point: it is left out of the merge, so it adds no
+    invented objectives, and takes fallback_leg_modes in every solution.
+
+    :param leg_fronts: one front per leg of problem.legs, of (green_km, emissions, modes of the leg)
+    :return: the non-dominated solutions, with the objectives of the evaluation
+    """
+    feasible_legs = [leg for leg, front in enumerate(leg_fronts) if front]
+    route_front = merge_leg_fronts([leg_fronts[leg] for leg in feasible_legs], size)
+
+    solutions = []
+    for _, _, leg_modes in route_front:
+        modes_of_legs = dict(zip(feasible_legs, leg_modes))
+        modes = []
+        for leg, (start, end) in enumerate(problem.legs):
+            modes += modes_of_legs[leg] if leg in modes_of_legs else fallback_leg_modes(problem, start, end)
+        solutions.append(solution_from_modes(problem, modes))
+    return non_dominated_solutions(solutions)
+
+
+def solution_from_modes(problem, modes) -> BinarySolution:
+    """
+    Evaluated solution of the problem for the modes of every section of the route (the sections
+    always driven in electric are not variables).
+    """
+    variables = np.array([bool(mode) for section, mode in zip(problem.route.sections, modes)
+                          if section.slope_percent > problem.slope_percent_limit], dtype=bool)
+
+    solution = BinarySolution(number_of_variables=len(variables), number_of_objectives=problem.number_of_objectives)
+    solution.variables = variables
+    return problem.evaluate(solution)
+
+
+def non_dominated_solutions(solutions):
+    """
+    Evaluated solutions not dominated in the two objectives (-green km, emissions), without duplicates.
+    """
+    front = pareto_filter((-solution.objectives[0], solution.objectives[1], solution) for solution in solutions)
+    return [solution for _, _, solution in front]
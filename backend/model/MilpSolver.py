@@ -0,0 +1,235 @@
+from HybridTruckProblem_Demo import HybridTruckProblem
+from RouteLegs import soc_step, IncrementalRouteState
+from LegFronts import solution_from_modes, non_dominated_solutions
+
+from time import time
+
+import numpy as np
+from scipy.optimize import milp, LinearConstraint, Bounds
+from scipy.sparse import lil_matrix
+
+
+class MilpSolver:
+    """
+    Pareto front of the route with a mixed-integer model solved by HiGHS (scipy.optimize.milp) and
+    an epsilon-constraint sweep: the emissions are minimized with the green km bounded below by
+    points values between the two extremes of the front.
+
+    The model has a binary mode and a continuous SOC per section. The energy and emissions of a
+    section are precomputed with section_power for every pair (mode of the previous section, mode
+    of the section), which fixes its entry speed, and linearized with the product of both modes;
+    the SOC continuity is the evaluation's s -> min(s - a, b) written as two upper bounds. Longer
+    speed dependencies are not modelled, so the chosen modes are made feasible again on the real
+    simulation (switching to ICE the electric sections with the fewest green km per kWh of the
+    legs that run out of battery) and evaluated with the problem, so the returned objectives are
+    exact.
+
+    :param problem: the HybridTruckProblem to solve
+    :param points: number of epsilon values of the sweep, extremes included
+    :param time_limit: time limit of every MILP solve in seconds (None = no limit)
+    :param mip_rel_gap: relative optimality gap at which HiGHS stops
+    """
+
+    def __init__(self, problem: HybridTruckProblem, points: int = 10, time_limit: float = 10,
+                 mip_rel_gap: float = 1e-3):
+        self.problem = problem
+        self.points = points
+        self.time_limit = time_limit
+        self.mip_rel_gap = mip_rel_gap
+
+        self.solutions = []
+        self.total_computing_time = 0
+        self.mip_gap = 0.0
+        self.solves = 0
+
+    def coefficients(self):
+        """
+        Per-section coefficients of the model for every pair (mode of the previous section, mode of
+        the section). The entry speed of a section is the exit speed of the previous one when the
+        whole leg up to it is driven in the previous section's mode.
+
+        :return: (distance, forced EV, dict (previous, mode) -> (ICE emissions, SOC a, SOC b) arrays)
+        """
+        problem = self.problem
+        truck = problem.truck
+        n = len(problem.route.sections)
+
+        exit_speeds = {}
+        for electric in (False, True):
+            max_power = truck.EV_power if electric else truck.ICE_power
+            exit_speeds[electric] = np.zeros(n)
+            for start, end in problem.legs:
+                current_speed = 0
+                for index in range(start, end):
+                    current_speed, _, _ = problem.compute_section(current_speed, index, max_power)
+                    exit_speeds[electric][index] = current_speed
+
+        leg_starts = set(start for start, _ in problem.legs)
+        pairs = {}
+        for previous in (False, True):
+            for electric in (False, True):
+                max_power = truck.EV_power if electric else truck.ICE_power
+                emissions, a, b = np.zeros(n), np.zeros(n), np.zeros(n)
+                for index in range(n):
+                    entry_speed = 0 if index in leg_starts else exit_speeds[previous][index - 1]
+                    _, kWh, bat_regen = problem.compute_section(entry_speed, index, max_power)
+                    a[index], b[index] = soc_step(kWh, bat_regen, electric, truck.electric_engine_efficiency, truck.charge)
+                    if not electric and kWh >= 0:
+                        gasoline_gallon_equivalent = kWh / truck.fuel_engine_efficiency * 0.02635046113 # Conversion factor
+                        emissions[index] = gasoline_gallon_equivalent * 10.180 # Kgs of CO2 emissions
+                pairs[(previous, electric)] = (emissions, a, np.minimum(b, truck.charge))
+
+        forced = np.array([section.slope_percent <= problem.slope_percent_limit for section in problem.route.sections])
+        return problem.section_distances, forced, pairs
+
+    def _model(self):
+        """
+        Variables: mode x_k (1 = electric), SOC s_k at the end of the section and w_k = x_(k-1) x_k.
+        A coefficient c of a section is c00 + (c10 - c00) x_(k-1) + (c01 - c00) x_k + (c11 - c10 - c01 + c00) w_k.
+
+        :return: (emissions objective, green km row, constraints, bounds, integrality)
+        """
+        distance, forced, pairs = self.coefficients()
+        n = len(distance)
+        capacity = self.problem.truck.charge
+        leg_starts = set(start for start, _ in self.problem.legs)
+
+        def linear(position):
+            c00, c01, c10, c11 = (pairs[key][position] for key in ((False, False), (False, True), (True, False), (True, True)))
+            return c00, c10 - c00, c01 - c00, c11 - c10 - c01 + c00
+
+        x, s, w = 0, n, 2 * n
+        A = lil_matrix((5 * n, 3 * n))
+        lower = np.full(5 * n, -np.inf)
+        upper = np.zeros(5 * n)
+        objective = np.zeros(3 * n)
+        constant = 0.0
+        for index in range(n):
+            first = index in leg_starts
+            row = 5 * index
+            terms = {}
+            for position, name in ((0, "emissions"), (1, "a"), (2, "b")):
+                constant_term, previous_term, mode_term, product_term = linear(position)
+                terms[name] = (constant_term[index], previous_term[index], mode_term[index], product_term[index])
+
+            # Emisiones
+            c, cp, cm, cw = terms["emissions"]
+            constant += c
+            objective[x + index] += cm
+            if not first:
+                objective[x + index - 1] += cp
+                objective[w + index] += cw
+
+            # s_k <= s_(k-1) - a, al empezar un tramo s_(k-1) es la batería llena
+            c, cp, cm, cw = terms["a"]
+            A[row, s + index] = 1
+            A[row, x + index] = cm
+            if first:
+                upper[row] = capacity - c
+            else:
+                A[row, s + index - 1] = -1
+                A[row, x + index - 1] += cp
+                A[row, w + index] = cw
+                upper[row] = -c
+
+            # s_k <= b
+            c, cp, cm, cw = terms["b"]
+            A[row + 1, s + index] = 1
+            A[row + 1, x + index] = -cm
+            if not first:
+                A[row + 1, x + index - 1] += -cp
+                A[row + 1, w + index] = -cw
+            upper[row + 1] = c
+
+            # w_k = x_(k-1) x_k
+            if not first:
+                A[row + 2, w + index] = 1
+                A[row + 2, x + index - 1] = -1
+                A[row + 3, w + index] = 1
+                A[row + 3, x + index] = -1
+                A[row + 4, w + index] = -1
+                A[row + 4, x + index - 1] = 1
+                A[row + 4, x + index] = 1
+                upper[row + 4] = 1
+
+        constraints = LinearConstraint(A.tocsr(), lower, upper)
+        lower_bounds = np.concatenate([forced.astype(float), np.zeros(n), np.zeros(n)])
+        upper_bounds = np.concatenate([np.ones(n), np.full(n, capacity), np.ones(n)])
+        integrality = np.concatenate([np.ones(n), np.zeros(n), np.zeros(n)])
+        green_km_row = np.concatenate([distance, np.zeros(2 * n)])
+        return objective, constant, green_km_row, constraints, Bounds(lower_bounds, upper_bounds), integrality
+
+    def make_feasible(self, modes):
+        """
+        Switches to ICE electric sections of the legs that run out of battery until every leg is
+        feasible, each time the section with the smallest consumption that covers the missing
+        charge (or the largest one if none does), so the fewest green km are lost.
+
+        :return: modes of every section
+        """
+        problem = self.problem
+        truck = problem.truck
+        state = IncrementalRouteState(problem, [bool(mode) for mode in modes])
+        for leg in sorted(state.infeasible_legs):
+            start, end = problem.legs[leg]
+            while leg in state.infeasible_legs:
+                missing_charge = -state.indexes[leg].min_soc(truck.charge)
+                candidates = [(state.results[leg][index - start][1] / truck.electric_engine_efficiency, index)
+                              for index in range(start, end)
+                              if state.modes[index] and problem.route.sections[index].slope_percent > problem.slope_percent_limit
+                              and state.results[leg][index - start][1] > 0]
+                if not candidates:
+                    break
+                covering = [candidate for candidate in candidates if candidate[0] >= missing_charge]
+                _, index = min(covering) if covering else max(candidates)
+                state.flip(index, False)
+        return state.modes
+
+    def _solve(self, objective, constraints, bounds, integrality):
+        options = {"mip_rel_gap": self.mip_rel_gap, "disp": False}
+        if self.time_limit is not None:
+            options["time_limit"] = self.time_limit
+        result = milp(objective, constraints=constraints, bounds=bounds, integrality=integrality, options=options)
+        self.solves += 1
+        if result.x is None:
+            return None
+        gap = getattr(result, "mip_gap", None)
+        if gap is not None and np.isfinite(gap):
+            self.mip_gap = max(self.mip_gap, gap)
+        return result.x
+
+    def run(self):
+        start_computing_time = time()
+        min_emissions, _, green_km_row, constraints, bounds, integrality = self._model()
+        n = len(self.problem.route.sections)
+
+        # Extremos del frente: máximos green km y mínimas emisiones (con los máximos green km posibles)
+        modes = []
+        for objective in (-green_km_row, min_emissions - 1e-6 * green_km_row):
+            solution = self._solve(objective, [constraints], bounds, integrality)
+            if solution is not None:
+                modes.append(solution[:n] > 0.5)
+
+        if len(modes) == 2:
+            lowest, highest = sorted(float(green_km_row[:n] @ mode) for mode in modes)
+            for epsilon in np.linspace(lowest, highest, self.points)[1:-1]:
+                green_km_constraint = LinearConstraint(green_km_row.reshape(1, -1), epsilon, np.inf)
+                solution = self._solve(min_emissions, [constraints, green_km_constraint], bounds, integrality)
+                if solution is not None:
+                    modes.append(solution[:n] > 0.5)
+
+        solutions = []
+        evaluated = set()
+        for mode in modes:
+            if mode.tobytes() not in evaluated:
+                evaluated.add(mode.tobytes())
+                solutions.append(solution_from_modes(self.problem, self.make_feasible(mode)))
+        self.solutions = non_dominated_solutions(solutions)
+
+        self.total_computing_time = time() - start_computing_time
+
+    def get_result(self):
+        return self.solutions
+
+    def get_name(self) -> str:
+        return 'MILP epsilon-constraint'
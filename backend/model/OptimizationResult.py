@@ -0,0 +1,85 @@
+from HybridTruckProblem_Demo import TRACE_ROWS
+
+from typing import List
+import os
+
+import numpy as np
+
+
+class SolutionResult:
+    """
+    One solution of the front found: its variables (driving mode of every variable section, True =
+    electric), its green km and emissions and its per-section traces, a (len(TRACE_ROWS), sections)
+    array (None if the solution was not evaluated with traces).
+    """
+
+    def __init__(self, variables: np.ndarray, green_km: float, emissions: float, traces: np.ndarray = None):
+        self.variables = variables
+        self.green_km = green_km
+        self.emissions = emissions
+        self.traces = traces
+
+    @classmethod
+    def from_solution(cls, solution):
+        """
+        Result of an evaluated HybridTruckProblem solution (objectives -green km and emissions).
+        """
+        return cls(np.asarray(solution.variables, dtype=bool), -float(solution.objectives[0]),
+                   float(solution.objectives[1]), solution.attributes.get("traces"))
+
+    def trace(self, name: str) -> np.ndarray:
+        """
+        Per-section values of one of the TRACE_ROWS (emisiones, greenKm, kWh, SOC or recarga).
+        """
+        return self.traces[TRACE_ROWS.index(name)]
+
+
+class OptimizationResult:
+    """
+    Result of a run of any of the algorithms of 000_main_algoritmo: the solutions of its final
+    front, taken from the archive (or the result) of the algorithm in memory, so nothing has to be
+    read back from the FUN files.
+
+    :param algorithm: name of the algorithm
+    :param solutions: solutions of the front
+    :param computing_time: seconds taken by the algorithm
+    :param evaluations: evaluations done (None for the algorithms that do not count them)
+    :param optimality_gap: largest relative optimality gap of the solves of an exact solver (MILP),
+                           None for the other algorithms
+    """
+
+    def __init__(self, algorithm: str, solutions: List[SolutionResult], computing_time: float, evaluations: int = None,
+                 optimality_gap: float = None):
+        self.algorithm = algorithm
+        self.solutions = solutions
+        self.computing_time = computing_time
+        self.evaluations = evaluations
+        self.optimality_gap = optimality_gap
+
+    @classmethod
+    def from_algorithm(cls, algorithm):
+        """
+        Result of an algorithm that has already run (get_result, get_name and total_computing_time).
+        """
+        return cls(algorithm.get_name(), [SolutionResult.from_solution(solution) for solution in algorithm.get_result()],
+                   algorithm.total_computing_time, getattr(algorithm, "evaluations", None),
+                   getattr(algorithm, "mip_gap", None))
+
+    def write_files(self, directory: str):
+        """
+        Writes the front to directory once, in the format of the FUN/VAR files of jmetal: FUN.final
+        with the objectives (-green km, emissions) and the traces of every solution, and VAR.final
+        with its variables.
+        """
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "FUN.final"), "w") as fun_file, \
+                open(os.path.join(directory, "VAR.final"), "w") as var_file:
+            for solution in self.solutions:
+                fun_file.write(f"{-solution.green_km} {solution.emissions} ")
+                for trace in (solution.traces if solution.traces is not None else ()):
+                    fun_file.write(str(trace.tolist()) + " ")
+                fun_file.write("\n")
+                var_file.write(" ".join(str(variable) for variable in solution.variables) + " \n")
+
+    def __len__(self):
+        return len(self.solutions)
@@ -0,0 +1,255 @@
+from Route import Route
+from BoundedLRUCache import BoundedLRUCache
+
+import math
+
+
+# ****Splits the route in legs, the sections between two stops****
+def split_legs(route: Route, take_stops: bool = True):
+    """
+    At every stop (when the stops are taken) the truck starts again from 0 m/s with the battery
+    recharged, so the result of a leg only depends on the modes of its own sections.
+
+    :return: list of (start, end) section ranges, end excluded
+    """
+    legs = []
+    leg_start = 0
+    for index in range(1, len(route.sections)):
+        if route.sections[index].stop_start == 1 and take_stops:
+            legs.append((leg_start, index))
+            leg_start = index
+    legs.append((leg_start, len(route.sections)))
+
+    return legs
+
+
+def leg_key(start: int, modes):
+    """
+    Memo key of a leg: its first section and its bit pattern.
+    """
+    return start, bytes(bytearray(bool(mode) for mode in modes))
+
+
+class LegResultMemo(BoundedLRUCache):
+    """
+    Bounded LRU memo of leg results (per-section emissions, green km, kWh, SOC, regeneration and
+    feasibility) keyed by leg_key. Offspring share most of their legs with earlier solutions, so most
+    legs are found here and only the new bit patterns are simulated.
+    """
+
+    def __init__(self, max_size: int = 20000):
+        super(LegResultMemo, self).__init__(max_size)
+
+
+def soc_step(kWh: float, bat_regen: float, electric: bool, efficiency: float, capacity: float):
+    """
+    SOC update of one section as the pair (a, b) of the function s -> min(s - a, b), i.e. the
+    decrease_battery_charge calls of the evaluation (regeneration, then the electric consumption)
+    composed into one.
+    """
+    if kWh < 0:
+        return kWh / efficiency, capacity
+    if electric:
+        consumption = kWh / efficiency
+        return bat_regen / efficiency + consumption, min(capacity - consumption, capacity)
+    return bat_regen / efficiency, capacity
+
+
+class SocIndex:
+    """
+    Segment tree over the SOC updates of a leg. Every node stores the composition s -> min(s - a, b)
+    of its sections and the minimum of the SOC after each of them, s -> min(s - ma, mb), so changing
+    a section costs O(log n) and the lowest SOC of the leg is read at the root in O(1).
+
+    The values are exact up to the floating point reassociation of the sums, so a minimum very close
+    to 0 has to be confirmed with the sequential recurrence.
+    """
+
+    IDENTITY = (0.0, math.inf, -math.inf, math.inf)
+
+    def __init__(self, steps):
+        self.size = 1
+        while self.size < max(len(steps), 1):
+            self.size *= 2
+        self.nodes = [SocIndex.IDENTITY] * (2 * self.size)
+        for position, (a, b) in enumerate(steps):
+            self.nodes[self.size + position] = (a, b, a, b)
+        for node in range(self.size - 1, 0, -1):
+            self.nodes[node] = SocIndex.combine(self.nodes[2 * node], self.nodes[2 * node + 1])
+
+    @staticmethod
+    def combine(left, right):
+        a_left, b_left, ma_left, mb_left = left
+        a_right, b_right, ma_right, mb_right = right
+        return (a_left + a_right,
+                min(b_left - a_right, b_right),
+                max(ma_left, a_left + ma_right),
+                min(mb_left, b_left - ma_right, mb_right))
+
+    def update(self, position: int, a: float, b: float):
+        node = self.size + position
+        self.nodes[node] = (a, b, a, b)
+        node //= 2
+        while node:
+            self.nodes[node] = SocIndex.combine(self.nodes[2 * node], self.nodes[2 * node + 1])
+            node //= 2
+
+    def min_soc(self, initial_charge: float):
+        """
+        Lowest SOC reached in the leg starting with initial_charge.
+        """
+        _, _, ma, mb = self.nodes[1]
+        return min(initial_charge - ma, mb)
+
+
+class IncrementalRouteState:
+    """
+    Modes of the whole route together with the (exit speed, kWh, regenerated kWh) of every section
+    and a SocIndex per leg. Changing the mode of a section only simulates again its own leg from that
+    section until the exit speed is the same as before, and the feasibility of the leg is read from
+    its SocIndex, so greedy searches (repair, heuristic seeding) can try a flip without evaluating the
+    whole route.
+
+    :param problem: the HybridTruckProblem (legs, truck, compute_section and evaluate_leg are used)
+    :param modes: one mode per section, True = electric
+    """
+
+    def __init__(self, problem, modes):
+        self.problem = problem
+        self.modes = list(modes)
+        self.leg_of_section = [0] * len(self.modes)
+        self.results = []
+        self.indexes = []
+        self.infeasible_legs = set()
+
+        for leg, (start, end) in enumerate(problem.legs):
+            results = []
+            current_speed = 0
+            for index in range(start, end):
+                self.leg_of_section[index] = leg
+                current_speed, kWh, bat_regen = problem.compute_section(current_speed, index, self._max_power(index))
+                results.append((current_speed, kWh, bat_regen))
+            self.results.append(results)
+            self.indexes.append(SocIndex([self._soc_step(start + position, result) for position, result in enumerate(results)]))
+            if self.leg_is_infeasible(leg):
+                self.infeasible_legs.add(leg)
+
+    def _max_power(self, index: int):
+        return self.problem.truck.EV_power if self.modes[index] else self.problem.truck.ICE_power
+
+    def _soc_step(self, index: int, result):
+        _, kWh, bat_regen = result
+        return soc_step(kWh, bat_regen, self.modes[index], self.problem.truck.electric_engine_efficiency, self.problem.truck.charge)
+
+    def leg_is_infeasible(self, leg: int):
+        """
+        True if the SOC goes below 0 somewhere in the leg. The SocIndex answers directly unless its
+        minimum is too close to 0 to trust the reassociated sums, then the sequential recurrence decides.
+        """
+        charge = self.problem.truck.charge
+        lowest = self.indexes[leg].min_soc(charge)
+        if abs(lowest) > 1e-9 * max(1.0, abs(charge)):
+            return lowest < 0
+        start, end = self.problem.legs[leg]
+        return self.problem.evaluate_leg(self.modes, start, end, self.results[leg])[5]
+
+    def is_feasible(self):
+        return not self.infeasible_legs
+
+    def fork(self):
+        """
+        Independent copy of the state, to continue a search in several ways from the same point.
+        """
+        state = IncrementalRouteState.__new__(IncrementalRouteState)
+        state.problem = self.problem
+        state.modes = list(self.modes)
+        state.leg_of_section = self.leg_of_section
+        state.results = [list(results) for results in self.results]
+        state.indexes = []
+        for index in self.indexes:
+            copy = SocIndex.__new__(SocIndex)
+            copy.size = index.size
+            copy.nodes = list(index.nodes)
+            state.indexes.append(copy)
+        state.infeasible_legs = set(self.infeasible_legs)
+        return state
+
+    def try_electric(self, index: int):
+        """
+        Switches a section to electric and keeps the change only if the whole route stays feasible.
+
+        :return: True if the change was kept
+        """
+        record = self.flip(index, True)
+        if self.is_feasible():
+            return True
+        self.undo(record)
+        return False
+
+    def flip(self, index: int, electric: bool):
+        """
+        Sets the mode of a section and updates its leg.
+
+        :return: record to pass to undo
+        """
+        leg = self.leg_of_section[index]
+        start, end = self.problem.legs[leg]
+        results = self.results[leg]
+        record = (index, self.modes[index], leg, leg in self.infeasible_legs, [])
+
+        self.modes[index] = electric
+        current_speed = results[index - start - 1][0] if index > start else 0
+        # Solo cambian las secciones hasta que la velocidad de salida vuelve a ser la misma
+        for position in range(index - start, end - start):
+            current_speed, kWh, bat_regen = self.problem.compute_section(current_speed, start + position, self._max_power(start + position))
+            same_exit = current_speed == results[position][0]
+            record[4].append((position, results[position]))
+            results[position] = (current_speed, kWh, bat_regen)
+            self.indexes[leg].update(position, *self._soc_step(start + position, results[position]))
+            if same_exit:
+                break
+
+        if self.leg_is_infeasible(leg):
+            self.infeasible_legs.add(leg)
+        else:
+            self.infeasible_legs.discard(leg)
+        return record
+
+    def undo(self, record):
+        index, mode, leg, was_infeasible, changed = record
+        start, _ = self.problem.legs[leg]
+        self.modes[index] = mode
+        for position, result in changed:
+            self.results[leg][position] = result
+            self.indexes[leg].update(position, *self._soc_step(start + position, result))
+        if was_infeasible:
+            self.infeasible_legs.add(leg)
+        else:
+            self.infeasible_legs.discard(leg)
+
+    def evaluation(self):
+        """
+        Exact per-section results of the current modes, as simple_evaluate returns them.
+
+        :return: (total_emissions, green_kms, remaining_charges, l_emisiones, l_greenKm, l_kWh, l_regen)
+        """
+        l_emisiones = []
+        l_greenKm = []
+        l_kWh = []
+        remaining_charges = []
+        l_regen = []
+        for leg, (start, end) in enumerate(self.problem.legs):
+            leg_emisiones, leg_greenKm, leg_kWh, leg_SOC, leg_recarga, _ = self.problem.evaluate_leg(self.modes, start, end, self.results[leg])
+            l_emisiones += leg_emisiones
+            l_greenKm += leg_greenKm
+            l_kWh += leg_kWh
+            remaining_charges += leg_SOC
+            l_regen += leg_recarga
+
+        total_emissions = 0
+        green_kms = 0
+        for section_emissions, section_green_kms in zip(l_emisiones, l_greenKm):
+            total_emissions += section_emissions
+            green_kms += section_green_kms
+
+        return total_emissions, green_kms, remaining_charges, l_emisiones, l_greenKm, l_kWh, l_regen
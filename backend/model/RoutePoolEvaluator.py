@@ -0,0 +1,199 @@
+from HybridTruckProblem_Demo import HybridTruckProblem, TRACE_ROWS
+
+from jmetal.core.solution import BinarySolution
+from jmetal.util.evaluator import Evaluator
+
+from multiprocessing import Pool, resource_tracker, shared_memory
+from typing import List
+import os
+import sys
+
+import numpy as np
+
+
+# ****Estado de cada proceso del pool: el problema y los buffers compartidos a los que está conectado****
+_worker = {}
+
+
+def _init_worker(route, truck, problem_options, energy_table, l_segments_kwh, quiet):
+    """
+    Initializer of the pool: builds the HybridTruckProblem of the worker once, so the route and the
+    truck are only sent when the pool starts. The energy table of the main problem is reused instead
+    of building it again, and l_segments_kwh (computed by the heuristic when the population is
+    created) is copied as well, since the repair of the solutions depends on it. With quiet the
+    output of the evaluations of the worker is discarded.
+    """
+    if quiet:
+        # Los procesos heredan la salida del principal, no su redirección de sys.stdout
+        sys.stdout = open(os.devnull, "w")
+    problem = HybridTruckProblem(route=route, truck=truck, **dict(problem_options, energy_table_bucket=None))
+    problem.energy_table = energy_table
+    problem.l_segments_kwh = l_segments_kwh
+    _worker["problem"] = problem
+    _worker["names"] = None
+    _worker["buffers"] = []
+
+
+def _buffer_views(buffers, capacity: int, number_of_variables: int, number_of_objectives: int, number_of_sections: int):
+    """
+    NumPy views of the shared buffers: the packed bits of every solution, its objectives and its
+    per-section traces (one row per solution).
+    """
+    bits_buffer, results_buffer = buffers
+    bits = np.ndarray((capacity, (number_of_variables + 7) // 8), dtype=np.uint8, buffer=bits_buffer.buf)
+    objectives = np.ndarray((capacity, number_of_objectives), dtype=np.float64, buffer=results_buffer.buf)
+    traces = np.ndarray((capacity, len(TRACE_ROWS), number_of_sections), dtype=np.float32, buffer=results_buffer.buf,
+                        offset=objectives.nbytes)
+    return bits, objectives, traces
+
+
+def _evaluate_rows(task):
+    """
+    Evaluates the solutions start..stop-1 of the shared buffers with the problem of the worker and
+    writes back their objectives and traces, and their bits if the repair changed them.
+
+    :return: rows of the repaired solutions
+    """
+    names, capacity, start, stop = task
+    problem = _worker["problem"]
+    if _worker["names"] != names:
+        # El proceso principal ha agrandado los buffers, se cambia a los nuevos
+        _worker["views"] = None
+        for buffer in _worker["buffers"]:
+            buffer.close()
+        _worker["buffers"] = [shared_memory.SharedMemory(name=name) for name in names]
+        _worker["views"] = _buffer_views(_worker["buffers"], capacity, problem.number_of_variables,
+                                         problem.number_of_objectives, problem.number_of_sections)
+        _worker["names"] = names
+    bits, objectives, traces = _worker["views"]
+
+    solutions = []
+    for row in range(start, stop):
+        solution = BinarySolution(number_of_variables=problem.number_of_variables,
+                                  number_of_objectives=problem.number_of_objectives)
+        solution.variables = np.unpackbits(bits[row], count=problem.number_of_variables).astype(bool)
+        solutions.append(solution)
+    problem.evaluate_solution_list(solutions)
+
+    repaired = []
+    for row, solution in zip(range(start, stop), solutions):
+        objectives[row] = solution.objectives
+        traces[row] = solution.attributes["traces"]
+        packed_bits = np.packbits(solution.variables)
+        if not np.array_equal(packed_bits, bits[row]):
+            bits[row] = packed_bits
+            repaired.append(row)
+    return repaired
+
+
+class RoutePoolEvaluator(Evaluator[BinarySolution]):
+    """
+    Evaluator of HybridTruckProblem solutions on a persistent pool of processes. Every worker
+    receives the route, the truck and the options of the problem once, in the initializer of the
+    pool, and keeps its own problem (with its section cache and leg memory) between calls.
+
+    The solutions travel through two shared memory buffers: the main process writes the packed bits
+    of every solution and the workers write back its objectives and traces (and its bits, if the
+    repair changed them), so only the row ranges of every chunk and the rows of the repaired
+    solutions go through the pipes of the pool. The evaluations are counted in the problem of the
+    main process.
+
+    Every call pays a round trip to the pool and the copies to and from the buffers, and the leg
+    results of the parents (leg_cache) do not travel, so the solutions are evaluated from scratch: it
+    pays off with whole generations (SynchronousMOCell), not with the one offspring per step of the
+    steady-state MOCell.
+
+    The pool is started with the first problem evaluated and started again if another problem is
+    given; close() stops it and frees the buffers.
+
+    :param processes: worker processes (None = one per core)
+    :param chunks_per_process: number of chunks a list of solutions is split in per process
+    :param quiet: discard the output of the evaluations in the workers (the repair prints a line per solution)
+    """
+
+    def __init__(self, processes: int = None, chunks_per_process: int = 1, quiet: bool = False):
+        super().__init__()
+        self.processes = processes or os.cpu_count()
+        self.chunks_per_process = chunks_per_process
+        self.quiet = quiet
+
+        self.pool = None
+        self.problem = None
+        self.capacity = 0
+        self.buffers = []
+        self.views = None
+
+    def start(self, problem: HybridTruckProblem):
+        self.close()
+        # Los procesos heredan el resource tracker del principal, que es el único que libera los buffers
+        resource_tracker.ensure_running()
+        self.pool = Pool(self.processes, initializer=_init_worker,
+                         initargs=(problem.route, problem.truck, problem.construction_options(),
+                                   problem.energy_table, problem.l_segments_kwh, self.quiet))
+        self.problem = problem
+
+    def _reserve(self, size: int):
+        if size <= self.capacity:
+            return
+        self.views = None
+        for buffer in self.buffers:
+            buffer.close()
+            buffer.unlink()
+        problem = self.problem
+        capacity = max(size, 2 * self.capacity)
+        bits_size = capacity * ((problem.number_of_variables + 7) // 8)
+        results_size = capacity * (problem.number_of_objectives * 8 + len(TRACE_ROWS) * problem.number_of_sections * 4)
+        self.buffers = [shared_memory.SharedMemory(create=True, size=max(bits_size, 1)),
+                        shared_memory.SharedMemory(create=True, size=max(results_size, 1))]
+        self.capacity = capacity
+        self.views = _buffer_views(self.buffers, capacity, problem.number_of_variables,
+                                   problem.number_of_objectives, problem.number_of_sections)
+
+    def evaluate(self, solution_list: List[BinarySolution], problem: HybridTruckProblem) -> List[BinarySolution]:
+        if len(solution_list) == 0:
+            return solution_list
+        if problem is not self.problem or self.pool is None:
+            self.start(problem)
+        self._reserve(len(solution_list))
+        bits, objectives, traces = self.views
+
+        for row, solution in enumerate(solution_list):
+            bits[row] = np.packbits(np.asarray(solution.variables, dtype=bool))
+
+        names = tuple(buffer.name for buffer in self.buffers)
+        number_of_chunks = min(len(solution_list), self.processes * self.chunks_per_process)
+        limits = np.linspace(0, len(solution_list), number_of_chunks + 1).astype(int)
+        tasks = [(names, self.capacity, int(start), int(stop)) for start, stop in zip(limits[:-1], limits[1:])]
+        repaired = set()
+        for rows in self.pool.map(_evaluate_rows, tasks, chunksize=1):
+            repaired.update(rows)
+
+        for row, solution in enumerate(solution_list):
+            problem.count_evaluation()
+            solution.objectives = objectives[row].tolist()
+            solution.attributes["traces"] = traces[row].copy()
+            # Los resultados por tramo de la evaluación del padre ya no corresponden a esta solución
+            solution.attributes.pop("leg_cache", None)
+            if row in repaired:
+                solution.variables = np.unpackbits(bits[row], count=problem.number_of_variables).astype(bool)
+
+        return solution_list
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        self.views = None
+        for buffer in self.buffers:
+            buffer.close()
+            buffer.unlink()
+        self.buffers = []
+        self.capacity = 0
+        self.problem = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,187 @@
+import atexit
+import importlib
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import traceback
+from collections import OrderedDict
+from time import time
+
+
+def _worker_loop(tasks, results, model_dir: str):
+    """
+    Body of a warm worker: imports 000_main_algoritmo (and with it numpy, pandas, scipy, pymongo and
+    jmetal) once, reports how long it took and then runs main for every task it receives, keeping its
+    Mongo connection and a cache of problems between tasks. The output of every task (also the one of
+    the processes it starts) goes to the log file of the task.
+
+    A SIGTERM while a task runs stops that task (raising SystemExit in main) but not the worker; while
+    it waits for a task, it stops the worker.
+    """
+    start = time()
+    # La salida de cada tarea va a su archivo de log línea a línea, para poder seguirla mientras se ejecuta
+    sys.stdout.reconfigure(line_buffering=True)
+    if model_dir not in sys.path:
+        sys.path.insert(0, model_dir)
+    main_module = importlib.import_module("000_main_algoritmo")
+    results.put(("ready", os.getpid(), time() - start))
+
+    problem_cache = OrderedDict()
+
+    def stop(signum, frame):
+        raise SystemExit(-signum)
+
+    signal.signal(signal.SIGTERM, stop)
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        job_id, argv, log_path, progress_path, stop_path = task
+
+        exit_code = 0
+        with open(log_path, "a") as log:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            saved_stdout, saved_stderr = os.dup(1), os.dup(2)
+            os.dup2(log.fileno(), 1)
+            os.dup2(log.fileno(), 2)
+            try:
+                main_module.main(argv, problem_cache=problem_cache, progress_path=progress_path, stop_path=stop_path)
+            except SystemExit as e:
+                exit_code = e.code if isinstance(e.code, int) else int(e.code is not None)
+            except BaseException:
+                traceback.print_exc()
+                exit_code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os.dup2(saved_stdout, 1)
+                os.dup2(saved_stderr, 2)
+                os.close(saved_stdout)
+                os.close(saved_stderr)
+
+        if exit_code != 0:
+            # Un problema de una ejecución interrumpida puede haberse quedado a medias
+            problem_cache.clear()
+        results.put(("done", job_id, exit_code))
+
+
+class WarmWorker:
+    """
+    Long-lived process that runs 000_main_algoritmo.main for one task at a time (see _worker_loop).
+    It is started (and its imports loaded) as soon as it is created; if it dies, or does not stop a
+    cancelled task in time, it is killed and started again.
+
+    :param context: multiprocessing context used to start the process
+    :param model_dir: directory of 000_main_algoritmo.py
+    """
+
+    def __init__(self, context, model_dir: str, poll_interval: float = 0.5, stop_timeout: float = 10):
+        self.context = context
+        self.model_dir = model_dir
+        self.poll_interval = poll_interval
+        self.stop_timeout = stop_timeout
+
+        self.process = None
+        self.start()
+
+    def start(self):
+        self.tasks = self.context.Queue()
+        self.results = self.context.Queue()
+        # No daemon: los algoritmos arrancan sus propios procesos (pools de evaluación, islas...)
+        self.process = self.context.Process(target=_worker_loop, args=(self.tasks, self.results, self.model_dir))
+        self.process.start()
+        self.launch_time = time()
+        self.import_time = None
+        self.jobs = 0
+
+    def restart(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.start()
+
+    def run(self, job_id: str, argv: list, log_path: str, progress_path: str, stop_path: str = None,
+            cancelled=lambda: False):
+        """
+        Runs a task in the worker and waits for it, stopping it if cancelled() becomes true.
+
+        :return: (exit code, True if it was the first task of the worker, i.e. a cold start)
+        """
+        if not self.process.is_alive():
+            self.restart()
+        cold = self.jobs == 0
+        self.jobs += 1
+        self.tasks.put((job_id, argv, log_path, progress_path, stop_path))
+
+        stop_time = None
+        while True:
+            try:
+                message = self.results.get(timeout=self.poll_interval)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    exit_code = self.process.exitcode
+                    print(f"El worker {self.process.pid} ha terminado inesperadamente ({exit_code})")
+                    self.restart()
+                    return exit_code, cold
+                if stop_time is None and cancelled():
+                    stop_time = time()
+                    os.kill(self.process.pid, signal.SIGTERM)
+                elif stop_time is not None and time() - stop_time > self.stop_timeout:
+                    self.restart()
+                    return -signal.SIGKILL, cold
+                continue
+
+            if message[0] == "ready":
+                self.import_time = message[2]
+                print(f"Worker {message[1]} listo, importaciones en {self.import_time:.2f} s "
+                      f"(arrancado hace {time() - self.launch_time:.2f} s)")
+            elif message[1] == job_id:
+                return message[2], cold
+
+    def close(self):
+        if self.process is not None and self.process.is_alive():
+            self.tasks.put(None)
+            self.process.join(self.stop_timeout)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join()
+
+
+class WarmWorkerPool:
+    """
+    Pool of size warm workers, started when it is created, so the imports of the model are already
+    loaded when the first tasks arrive. Every task takes an idle worker (waiting for one if all of
+    them are busy), so it can be used from several threads.
+
+    :param size: number of workers
+    :param model_dir: directory of 000_main_algoritmo.py
+    """
+
+    def __init__(self, size: int, model_dir: str):
+        # spawn y no fork: el proceso que crea el pool tiene hilos y conexiones abiertas
+        context = multiprocessing.get_context("spawn")
+        self.workers = [WarmWorker(context, model_dir) for _ in range(size)]
+        self.idle = queue.Queue()
+        for worker in self.workers:
+            self.idle.put(worker)
+        # Los workers no son daemon, se paran antes de que multiprocessing espere a que terminen
+        atexit.register(self.close)
+
+    def run(self, job_id: str, argv: list, log_path: str, progress_path: str, stop_path: str = None,
+            cancelled=lambda: False):
+        """
+        Runs a task in an idle worker, see WarmWorker.run.
+        """
+        worker = self.idle.get()
+        try:
+            return worker.run(job_id, argv, log_path, progress_path, stop_path, cancelled)
+        finally:
+            self.idle.put(worker)
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
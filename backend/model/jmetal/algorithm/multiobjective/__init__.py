@@ -1,7 +1,7 @@
 from .gde3 import GDE3, DynamicGDE3
 from .hype import HYPE
 from .ibea import IBEA
-from .mocell import MOCell
+from .mocell import MOCell, SynchronousMOCell, AsynchronousMOCell
 from .moead import MOEAD, MOEAD_DRA, MOEADIEpsilon
 from .nsgaii import NSGAII, DistributedNSGAII, DynamicNSGAII
 from .omopso import OMOPSO
@@ -1,4 +1,7 @@
 import copy
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from functools import cmp_to_key
 from typing import TypeVar, List
 
@@ -9,11 +12,11 @@ from jmetal.core.problem import Problem
 from jmetal.operator import BinaryTournamentSelection
 from jmetal.util.archive import BoundedArchive
 from jmetal.util.comparator import Comparator, MultiComparator
-from jmetal.util.density_estimator import CrowdingDistance, DensityEstimator
+from jmetal.util.density_estimator import CrowdingDistance, DensityEstimator, VectorizedCrowdingDistance
 from jmetal.util.evaluator import Evaluator
 from jmetal.util.generator import Generator
 from jmetal.util.neighborhood import Neighborhood
-from jmetal.util.ranking import FastNonDominatedRanking, Ranking
+from jmetal.util.ranking import FastNonDominatedRanking, Ranking, VectorizedNonDominatedRanking
 from jmetal.util.termination_criterion import TerminationCriterion
 
 S = TypeVar('S')
@@ -123,10 +126,10 @@ class MOCell(GeneticAlgorithm[S, R]):
 
             self.current_neighbors.append(new_individual)
 
-            ranking: Ranking = FastNonDominatedRanking()
+            ranking: Ranking = VectorizedNonDominatedRanking()
             ranking.compute_ranking(self.current_neighbors)
 
-            density_estimator: DensityEstimator = CrowdingDistance()
+            density_estimator: DensityEstimator = VectorizedCrowdingDistance()
             for i in range(ranking.get_number_of_subfronts()):
                 density_estimator.compute_density_estimator(ranking.get_subfront(i))
 
@@ -144,3 +147,230 @@ class MOCell(GeneticAlgorithm[S, R]):
 
     def get_name(self) -> str:
         return 'MOCell'
+
+
+class SynchronousMOCell(MOCell[S, R]):
+
+    def __init__(self,
+                 problem: Problem,
+                 population_size: int,
+                 neighborhood: Neighborhood,
+                 archive: BoundedArchive,
+                 mutation: Mutation,
+                 crossover: Crossover,
+                 selection: Selection = BinaryTournamentSelection(
+                     MultiComparator([FastNonDominatedRanking.get_comparator(),
+                                      CrowdingDistance.get_comparator()])),
+                 termination_criterion: TerminationCriterion = store.default_termination_criteria,
+                 population_generator: Generator = store.default_generator,
+                 population_evaluator: Evaluator = store.default_evaluator,
+                 dominance_comparator: Comparator = store.default_comparator):
+        """
+        Generational (synchronous) version of MOCell. Every step breeds one offspring per cell from the
+        neighbourhoods of the current population and the current archive, evaluates the whole offspring
+        generation in a single call to the population evaluator (so a parallel evaluator gets population_size
+        solutions at a time) and then applies the MOCell replacement cell by cell. The neighbourhood of a cell
+        is always taken from the previous generation, as in a synchronous cellular GA.
+
+        The evaluations grow by population_size per step, so the termination criterion is checked once per
+        generation.
+
+        :param problem: The problem to solve.
+        :param population_size: Size of the population.
+        :param mutation: Mutation operator (see :py:mod:`jmetal.operator.mutation`).
+        :param crossover: Crossover operator (see :py:mod:`jmetal.operator.crossover`).
+        :param selection: Selection operator (see :py:mod:`jmetal.operator.selection`).
+        """
+        super(SynchronousMOCell, self).__init__(
+            problem=problem,
+            population_size=population_size,
+            neighborhood=neighborhood,
+            archive=archive,
+            mutation=mutation,
+            crossover=crossover,
+            selection=selection,
+            termination_criterion=termination_criterion,
+            population_generator=population_generator,
+            population_evaluator=population_evaluator,
+            dominance_comparator=dominance_comparator
+        )
+        self.offspring_population_size = population_size
+
+    def step(self):
+        population = self.solutions
+
+        # Breeding: one offspring per cell, with the neighbourhoods of the previous generation
+        offspring_population = []
+        neighborhoods = []
+        for cell in range(self.population_size):
+            self.current_individual = cell
+            mating_population = self.selection(population)
+            neighborhoods.append(self.current_neighbors)
+            offspring_population.extend(self.reproduction(mating_population))
+
+        offspring_population = self.evaluate(offspring_population)
+        self.evaluations += len(offspring_population)
+
+        # Replacement cell by cell; every cell is only written once, so the replacement of a cell still
+        # compares the offspring with the individual of the previous generation
+        next_population = list(population)
+        for cell, offspring in enumerate(offspring_population):
+            self.current_individual = cell
+            self.current_neighbors = neighborhoods[cell]
+            next_population = self.replacement(next_population, [offspring])
+
+        self.current_individual = 0
+        self.solutions = next_population
+
+    def update_progress(self) -> None:
+        # The evaluations are counted in step(), run() calls this method once more after the last step
+        observable_data = self.get_observable_data()
+        self.observable.notify_all(**observable_data)
+
+    def get_name(self) -> str:
+        return 'Synchronous MOCell'
+
+
+class AsynchronousMOCell(MOCell[S, R]):
+
+    def __init__(self,
+                 problem: Problem,
+                 population_size: int,
+                 neighborhood: Neighborhood,
+                 archive: BoundedArchive,
+                 mutation: Mutation,
+                 crossover: Crossover,
+                 selection: Selection = BinaryTournamentSelection(
+                     MultiComparator([FastNonDominatedRanking.get_comparator(),
+                                      CrowdingDistance.get_comparator()])),
+                 termination_criterion: TerminationCriterion = store.default_termination_criteria,
+                 population_generator: Generator = store.default_generator,
+                 dominance_comparator: Comparator = store.default_comparator,
+                 number_of_workers: int = None,
+                 in_flight: int = None):
+        """
+        Asynchronous steady-state version of MOCell, following the pattern of DistributedNSGAII on a local
+        process pool (:py:class:`concurrent.futures.ProcessPoolExecutor`). The cells are bred in the MOCell order,
+        but up to in_flight offspring are being evaluated at the same time; every offspring is integrated into its
+        cell (with the neighbourhood at that moment) and into the archive as soon as its evaluation finishes, and a
+        new offspring is bred and submitted right away, so no worker waits for the slower evaluations of the others.
+
+        The problem is sent to every worker once, when the pool starts (after creating the initial population), and
+        the solutions are evaluated there, so there is no population evaluator. Only the variables of a solution
+        travel to a worker, without its attributes, and only its variables (which the evaluation may repair),
+        objectives and constraints come back: the attributes set by the evaluation are not available in the
+        solutions of the result. The offspring still being evaluated when the termination criterion is met are
+        discarded.
+
+        :param problem: The problem to solve.
+        :param population_size: Size of the population.
+        :param mutation: Mutation operator (see :py:mod:`jmetal.operator.mutation`).
+        :param crossover: Crossover operator (see :py:mod:`jmetal.operator.crossover`).
+        :param selection: Selection operator (see :py:mod:`jmetal.operator.selection`).
+        :param number_of_workers: Worker processes (None = one per core).
+        :param in_flight: Offspring being evaluated at the same time (None = twice the number of workers).
+        """
+        super(AsynchronousMOCell, self).__init__(
+            problem=problem,
+            population_size=population_size,
+            neighborhood=neighborhood,
+            archive=archive,
+            mutation=mutation,
+            crossover=crossover,
+            selection=selection,
+            termination_criterion=termination_criterion,
+            population_generator=population_generator,
+            dominance_comparator=dominance_comparator
+        )
+        self.number_of_workers = number_of_workers or os.cpu_count()
+        self.in_flight = in_flight or 2 * self.number_of_workers
+        self.next_cell = 0
+
+    def breed(self, cell: int) -> S:
+        self.current_individual = cell
+        mating_population = self.selection(self.solutions)
+        return self.reproduction(mating_population)[0]
+
+    def integrate(self, cell: int, offspring: S) -> None:
+        # The neighbourhood of the cell may have changed while the offspring was being evaluated
+        self.current_individual = cell
+        self.current_neighbors = self.neighborhood.get_neighbors(cell, self.solutions)
+        self.current_neighbors.append(self.solutions[cell])
+        self.solutions = self.replacement(self.solutions, [offspring])
+
+    def update_progress(self) -> None:
+        self.evaluations += 1
+        if self.evaluations % self.population_size == 0:
+            observable_data = self.get_observable_data()
+            self.observable.notify_all(**observable_data)
+
+    def run(self):
+        """ Execute the algorithm. """
+        self.start_computing_time = time.time()
+
+        self.solutions = self.create_initial_solutions()
+
+        with ProcessPoolExecutor(max_workers=self.number_of_workers, initializer=_init_evaluation_worker,
+                                 initargs=(self.problem,)) as executor:
+            for solution, result in zip(self.solutions,
+                                        executor.map(_evaluate_in_worker, [_without_attributes(solution)
+                                                                           for solution in self.solutions])):
+                _set_evaluation(solution, result)
+            self.init_progress()
+
+            tasks = {}
+            while len(tasks) < self.in_flight:
+                offspring = self.breed(self.next_cell)
+                tasks[executor.submit(_evaluate_in_worker, _without_attributes(offspring))] = (self.next_cell, offspring)
+                self.next_cell = (self.next_cell + 1) % self.population_size
+
+            while not self.stopping_condition_is_met():
+                done, _ = wait(tasks, return_when=FIRST_COMPLETED)
+                for future in done:
+                    cell, offspring = tasks.pop(future)
+                    self.integrate(cell, _set_evaluation(offspring, future.result()))
+                    self.update_progress()
+
+                    if self.stopping_condition_is_met():
+                        break
+
+                    offspring = self.breed(self.next_cell)
+                    tasks[executor.submit(_evaluate_in_worker, _without_attributes(offspring))] = (self.next_cell, offspring)
+                    self.next_cell = (self.next_cell + 1) % self.population_size
+
+            # At this point, computation is done
+            for future in tasks:
+                future.cancel()
+
+        self.total_computing_time = time.time() - self.start_computing_time
+
+    def get_name(self) -> str:
+        return 'Asynchronous MOCell'
+
+
+_worker_problem = None
+
+
+def _init_evaluation_worker(problem: Problem) -> None:
+    global _worker_problem
+    _worker_problem = problem
+
+
+def _without_attributes(solution: S) -> S:
+    # The attributes (e.g. results cached by the problem for the parents) are not sent to the workers
+    attributes, solution.attributes = solution.attributes, {}
+    stripped = copy.copy(solution)
+    solution.attributes = attributes
+    return stripped
+
+
+def _evaluate_in_worker(solution: S):
+    solution = _worker_problem.evaluate(solution)
+    return solution.variables, solution.objectives, solution.constraints
+
+
+def _set_evaluation(solution: S, result) -> S:
+    # The attributes inherited from the parents do not belong to the evaluated solution
+    solution.variables, solution.objectives, solution.constraints = result
+    solution.attributes = {}
+    return solution
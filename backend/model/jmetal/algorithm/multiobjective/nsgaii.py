@@ -13,9 +13,9 @@ from jmetal.core.algorithm import DynamicAlgorithm, Algorithm
 from jmetal.core.operator import Mutation, Crossover, Selection
 from jmetal.core.problem import Problem, DynamicProblem
 from jmetal.operator import BinaryTournamentSelection
-from jmetal.util.density_estimator import CrowdingDistance
+from jmetal.util.density_estimator import CrowdingDistance, VectorizedCrowdingDistance
 from jmetal.util.evaluator import Evaluator
-from jmetal.util.ranking import FastNonDominatedRanking
+from jmetal.util.ranking import FastNonDominatedRanking, VectorizedNonDominatedRanking
 from jmetal.util.replacement import RankingAndDensityEstimatorReplacement, RemovalPolicyType
 from jmetal.util.comparator import DominanceComparator, Comparator, MultiComparator
 from jmetal.util.termination_criterion import TerminationCriterion
@@ -87,8 +87,8 @@ class NSGAII(GeneticAlgorithm[S, R]):
         :param offspring_population: Offspring population.
         :return: New population after ranking and crowding distance selection is applied.
         """
-        ranking = FastNonDominatedRanking(self.dominance_comparator)
-        density_estimator = CrowdingDistance()
+        ranking = VectorizedNonDominatedRanking(self.dominance_comparator)
+        density_estimator = VectorizedCrowdingDistance()
 
         r = RankingAndDensityEstimatorReplacement(ranking, density_estimator, RemovalPolicyType.ONE_SHOT)
         solutions = r.replace(population, offspring_population)
@@ -270,8 +270,8 @@ class DistributedNSGAII(Algorithm[S, R]):
                 offspring_population = [received_solution]
 
                 # replacement
-                ranking = FastNonDominatedRanking(self.dominance_comparator)
-                density_estimator = CrowdingDistance()
+                ranking = VectorizedNonDominatedRanking(self.dominance_comparator)
+                density_estimator = VectorizedCrowdingDistance()
 
                 r = RankingAndDensityEstimatorReplacement(ranking, density_estimator, RemovalPolicyType.ONE_SHOT)
                 auxiliar_population = r.replace(auxiliar_population, offspring_population)
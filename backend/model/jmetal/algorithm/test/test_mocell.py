@@ -0,0 +1,116 @@
+import unittest
+
+from jmetal.algorithm.multiobjective.mocell import MOCell, SynchronousMOCell, AsynchronousMOCell, _without_attributes
+from jmetal.operator import PolynomialMutation, SBXCrossover
+from jmetal.problem import ZDT1
+from jmetal.util.archive import CrowdingDistanceArchive
+from jmetal.util.evaluator import SequentialEvaluator
+from jmetal.util.neighborhood import C9
+from jmetal.util.solution import get_non_dominated_solutions
+from jmetal.util.termination_criterion import StoppingByEvaluations
+
+
+class RecordingEvaluator(SequentialEvaluator):
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def evaluate(self, solution_list, problem):
+        self.batch_sizes.append(len(solution_list))
+        return super(RecordingEvaluator, self).evaluate(solution_list, problem)
+
+
+class SynchronousMOCellTestCases(unittest.TestCase):
+
+    def setUp(self):
+        self.problem = ZDT1(number_of_variables=10)
+        self.evaluator = RecordingEvaluator()
+
+    def __algorithm(self, algorithm_class, max_evaluations):
+        return algorithm_class(
+            problem=self.problem,
+            population_size=16,
+            neighborhood=C9(4, 4),
+            archive=CrowdingDistanceArchive(16),
+            mutation=PolynomialMutation(probability=1.0 / self.problem.number_of_variables, distribution_index=20),
+            crossover=SBXCrossover(probability=1.0, distribution_index=20),
+            termination_criterion=StoppingByEvaluations(max_evaluations=max_evaluations),
+            population_evaluator=self.evaluator
+        )
+
+    def test_should_evaluate_a_whole_generation_in_every_call(self):
+        algorithm = self.__algorithm(SynchronousMOCell, 160)
+        algorithm.run()
+
+        self.assertEqual([16] * 10, self.evaluator.batch_sizes)
+        self.assertEqual(160, algorithm.evaluations)
+        self.assertEqual(16, len(algorithm.solutions))
+
+    def test_should_steady_state_mocell_evaluate_one_solution_per_call(self):
+        algorithm = self.__algorithm(MOCell, 48)
+        algorithm.run()
+
+        self.assertEqual([16] + [1] * 32, self.evaluator.batch_sizes)
+
+    def test_should_get_result_return_a_non_dominated_archive(self):
+        algorithm = self.__algorithm(SynchronousMOCell, 320)
+        algorithm.run()
+        front = algorithm.get_result()
+
+        self.assertTrue(0 < len(front) <= 16)
+        self.assertEqual(len(front), len(get_non_dominated_solutions(front)))
+
+
+class AsynchronousMOCellTestCases(unittest.TestCase):
+
+    def setUp(self):
+        self.problem = ZDT1(number_of_variables=10)
+
+    def __algorithm(self, max_evaluations, number_of_workers, in_flight):
+        return AsynchronousMOCell(
+            problem=self.problem,
+            population_size=16,
+            neighborhood=C9(4, 4),
+            archive=CrowdingDistanceArchive(16),
+            mutation=PolynomialMutation(probability=1.0 / self.problem.number_of_variables, distribution_index=20),
+            crossover=SBXCrossover(probability=1.0, distribution_index=20),
+            termination_criterion=StoppingByEvaluations(max_evaluations=max_evaluations),
+            number_of_workers=number_of_workers,
+            in_flight=in_flight
+        )
+
+    def test_should_keep_the_given_number_of_offspring_in_flight(self):
+        algorithm = self.__algorithm(160, 2, None)
+
+        self.assertEqual(2, algorithm.number_of_workers)
+        self.assertEqual(4, algorithm.in_flight)
+
+    def test_should_stop_after_the_maximum_number_of_evaluations(self):
+        algorithm = self.__algorithm(160, 2, 5)
+        algorithm.run()
+
+        self.assertEqual(160, algorithm.evaluations)
+        self.assertEqual(16, len(algorithm.solutions))
+        self.assertTrue(all(len(solution.objectives) == 2 for solution in algorithm.solutions))
+
+    def test_should_send_the_solutions_to_the_workers_without_their_attributes(self):
+        solution = self.problem.create_solution()
+        solution.attributes["cache"] = list(range(1000))
+
+        stripped = _without_attributes(solution)
+
+        self.assertEqual({}, stripped.attributes)
+        self.assertEqual(solution.variables, stripped.variables)
+        self.assertEqual(list(range(1000)), solution.attributes["cache"])
+
+    def test_should_get_result_return_a_non_dominated_archive(self):
+        algorithm = self.__algorithm(320, 2, 3)
+        algorithm.run()
+        front = algorithm.get_result()
+
+        self.assertTrue(0 < len(front) <= 16)
+        self.assertEqual(len(front), len(get_non_dominated_solutions(front)))
+
+
+if __name__ == '__main__':
+    unittest.main()
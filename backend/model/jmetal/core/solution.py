@@ -1,6 +1,8 @@
 from abc import ABC
 from typing import List, Generic, TypeVar
 
+import numpy as np
+
 from jmetal.util.ckecking import Check
 
 BitSet = List[bool]
@@ -36,16 +38,31 @@ class BinarySolution(Solution[BitSet]):
         super(BinarySolution, self).__init__(number_of_variables, number_of_objectives, number_of_constraints)
 
     def __copy__(self):
-        new_solution = BinarySolution(
-            self.number_of_variables,
-            self.number_of_objectives)
+        # Without the constructor, which builds number_of_variables empty lists that are replaced anyway
+        new_solution = BinarySolution.__new__(BinarySolution)
+        new_solution.number_of_variables = self.number_of_variables
+        new_solution.number_of_objectives = self.number_of_objectives
+        new_solution.number_of_constraints = self.number_of_constraints
         new_solution.objectives = self.objectives[:]
-        new_solution.variables = self.variables[:]
+        new_solution.constraints = self.constraints[:]
+        # A NumPy bit array is copied in one operation, a list of bits or bitsets one level down
+        if isinstance(self.variables, np.ndarray):
+            new_solution.variables = self.variables.copy()
+        else:
+            new_solution.variables = [variable[:] if isinstance(variable, list) else variable
+                                      for variable in self.variables]
 
         new_solution.attributes = self.attributes.copy()
 
         return new_solution
 
+    def __eq__(self, solution) -> bool:
+        if isinstance(solution, self.__class__):
+            if isinstance(self.variables, np.ndarray) or isinstance(solution.variables, np.ndarray):
+                return np.array_equal(self.variables, solution.variables)
+            return self.variables == solution.variables
+        return False
+
     def get_total_number_of_bits(self) -> int:
         total = 0
         for var in self.variables:
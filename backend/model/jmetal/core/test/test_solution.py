@@ -1,6 +1,8 @@
 import copy
 import unittest
 
+import numpy as np
+
 from jmetal.core.solution import BinarySolution, FloatSolution, IntegerSolution, Solution, CompositeSolution
 from jmetal.util.ckecking import InvalidConditionException
 
@@ -44,6 +46,31 @@ class BinarySolutionTestCase(unittest.TestCase):
         self.assertEqual(5, solution.get_total_number_of_bits())
 
 
+    def test_should_copy_work_properly_with_a_numpy_array(self) -> None:
+        solution = BinarySolution(number_of_variables=4, number_of_objectives=2)
+        solution.variables = np.array([True, False, True, True])
+        solution.objectives = [1.0, 2.0]
+
+        new_solution = copy.copy(solution)
+        new_solution.variables[0] = False
+
+        self.assertEqual([True, False, True, True], solution.variables.tolist())
+        self.assertEqual([False, False, True, True], new_solution.variables.tolist())
+        self.assertEqual(solution.objectives, new_solution.objectives)
+        self.assertIsNot(solution.objectives, new_solution.objectives)
+
+    def test_should_solutions_with_the_same_numpy_array_be_equal(self) -> None:
+        solution1 = BinarySolution(number_of_variables=3, number_of_objectives=2)
+        solution1.variables = np.array([True, False, True])
+        solution2 = BinarySolution(number_of_variables=3, number_of_objectives=2)
+        solution2.variables = np.array([True, False, True])
+        solution3 = BinarySolution(number_of_variables=3, number_of_objectives=2)
+        solution3.variables = np.array([True, True, True])
+
+        self.assertEqual(solution1, solution2)
+        self.assertNotEqual(solution1, solution3)
+
+
 class FloatSolutionTestCase(unittest.TestCase):
 
     def test_should_constructor_create_a_non_null_object(self) -> None:
@@ -372,7 +372,7 @@ class TPXCrossover(Crossover[BinarySolution, BinarySolution]):
 
         # print(parents[0])
         # print(parents[1])
-        offspring = [copy.deepcopy(parents[0]), copy.deepcopy(parents[1])]
+        offspring = [copy.copy(parents[0]), copy.copy(parents[1])]
         rand = random.random()
 
         if rand <= self.probability:
@@ -386,11 +386,10 @@ class TPXCrossover(Crossover[BinarySolution, BinarySolution]):
             points = [variable_to_cut1, variable_to_cut2]
             points.sort()
 
-            # 3. Apply the crossover to the variable
-            for i in range(points[0] + 1, points[1] + 1):
-                swap = offspring[0].variables[i]
-                offspring[0].variables[i] = offspring[1].variables[i]
-                offspring[1].variables[i] = swap
+            # 3. Apply the crossover to the variable (slice assignment, lists or NumPy arrays)
+            swap = offspring[0].variables[points[0] + 1:points[1] + 1].copy()
+            offspring[0].variables[points[0] + 1:points[1] + 1] = offspring[1].variables[points[0] + 1:points[1] + 1]
+            offspring[1].variables[points[0] + 1:points[1] + 1] = swap
 
             # Get best parent solution
             dominance_comparator = DominanceComparator()
@@ -486,11 +485,10 @@ class IntegerTPXCrossover(Crossover[IntegerSolution, IntegerSolution]):
             points = [variable_to_cut1, variable_to_cut2]
             points.sort()
 
-            # 3. Apply the crossover to the variable
-            for i in range(points[0] + 1, points[1] + 1):
-                swap = offspring[0].variables[i]
-                offspring[0].variables[i] = offspring[1].variables[i]
-                offspring[1].variables[i] = swap
+            # 3. Apply the crossover to the variable (slice assignment, lists or NumPy arrays)
+            swap = offspring[0].variables[points[0] + 1:points[1] + 1].copy()
+            offspring[0].variables[points[0] + 1:points[1] + 1] = offspring[1].variables[points[0] + 1:points[1] + 1]
+            offspring[1].variables[points[0] + 1:points[1] + 1] = swap
 
             # Get best parent solution
             dominance_comparator = DominanceComparator()
@@ -1,4 +1,8 @@
+import math
 import random
+from typing import List
+
+import numpy as np
 
 from jmetal.core.operator import Mutation
 from jmetal.core.solution import BinarySolution, Solution, FloatSolution, IntegerSolution, PermutationSolution, \
@@ -26,6 +30,25 @@ class NullMutation(Mutation[Solution]):
         return 'Null mutation'
 
 
+def bit_flip_positions(number_of_bits: int, probability: float) -> List[int]:
+    """ Positions of the bits flipped by a bit flip mutation, every bit with the given probability. The gaps
+    between flips are drawn from a geometric distribution, so one random number is used per flipped bit
+    instead of one per bit.
+    """
+    if probability <= 0.0 or number_of_bits == 0:
+        return []
+    if probability >= 1.0:
+        return list(range(number_of_bits))
+
+    positions = []
+    log_no_flip = math.log1p(-probability)
+    position = int(math.log(1.0 - random.random()) / log_no_flip)
+    while position < number_of_bits:
+        positions.append(position)
+        position += 1 + int(math.log(1.0 - random.random()) / log_no_flip)
+    return positions
+
+
 class BitFlipMutation(Mutation[BinarySolution]):
 
     def __init__(self, probability: float):
@@ -34,11 +57,19 @@ class BitFlipMutation(Mutation[BinarySolution]):
     def execute(self, solution: BinarySolution) -> BinarySolution:
         Check.that(type(solution) is BinarySolution, "Solution type invalid")
 
-        # for i in range(solution.number_of_variables):
-        for j in range(len(solution.variables)):
-            rand = random.random()
-            if rand <= self.probability:
-                solution.variables[j] = True if solution.variables[j] is False else False
+        variables = solution.variables
+        if isinstance(variables, np.ndarray):
+            # Bits in a NumPy array: all the flips in one operation
+            positions = bit_flip_positions(variables.size, self.probability)
+            variables[np.asarray(positions, dtype=np.intp)] ^= True
+        elif len(variables) > 0 and isinstance(variables[0], list):
+            # One bitset per variable
+            for bitset in variables:
+                for j in bit_flip_positions(len(bitset), self.probability):
+                    bitset[j] = not bitset[j]
+        else:
+            for j in bit_flip_positions(len(variables), self.probability):
+                variables[j] = not variables[j]
 
         return solution
 
@@ -2,10 +2,12 @@ import unittest
 from typing import List
 from unittest import mock
 
+import numpy as np
+
 from jmetal.core.operator import Crossover
 from jmetal.core.solution import BinarySolution, PermutationSolution, FloatSolution, CompositeSolution, IntegerSolution
 from jmetal.operator.crossover import NullCrossover, SPXCrossover, CXCrossover, PMXCrossover, SBXCrossover, \
-    CompositeCrossover, IntegerSBXCrossover
+    CompositeCrossover, IntegerSBXCrossover, TPXCrossover
 from jmetal.util.ckecking import NoneParameterException, EmptyCollectionException, InvalidConditionException
 
 
@@ -129,6 +131,53 @@ class SinglePointTestCases(unittest.TestCase):
         self.assertEqual([True, False, True, True, True, True], offspring[1].variables[2])
 
 
+
+class TwoPointTestCases(unittest.TestCase):
+
+    def test_should_constructor_create_a_valid_operator(self):
+        operator = TPXCrossover(0.5)
+        self.assertEqual(0.5, operator.probability)
+
+    def test_should_the_parents_remain_unchanged_if_the_probability_is_zero(self):
+        operator = TPXCrossover(0.0)
+        solution1 = BinarySolution(number_of_variables=6, number_of_objectives=2)
+        solution1.variables = np.array([True, False, False, True, True, False])
+        solution2 = BinarySolution(number_of_variables=6, number_of_objectives=2)
+        solution2.variables = np.array([False, True, False, False, True, True])
+
+        offspring = operator.execute([solution1, solution2])
+        self.assertEqual([True, False, False, True, True, False], offspring[0].variables.tolist())
+        self.assertEqual([False, True, False, False, True, True], offspring[1].variables.tolist())
+
+    @mock.patch('random.randrange')
+    def test_should_the_segment_between_the_points_be_swapped_in_numpy_arrays(self, random_call):
+        operator = TPXCrossover(1.0)
+        solution1 = BinarySolution(number_of_variables=6, number_of_objectives=2)
+        solution1.variables = np.array([True, False, False, True, True, False])
+        solution2 = BinarySolution(number_of_variables=6, number_of_objectives=2)
+        solution2.variables = np.array([False, True, True, False, False, True])
+
+        random_call.side_effect = [4, 1]
+        offspring = operator.execute([solution1, solution2])
+        self.assertEqual([True, False, True, False, False, False], offspring[0].variables.tolist())
+        self.assertEqual([False, True, False, True, True, True], offspring[1].variables.tolist())
+        self.assertEqual([True, False, False, True, True, False], solution1.variables.tolist())
+        self.assertEqual([False, True, True, False, False, True], solution2.variables.tolist())
+
+    @mock.patch('random.randrange')
+    def test_should_the_segment_between_the_points_be_swapped_in_lists(self, random_call):
+        operator = TPXCrossover(1.0)
+        solution1 = BinarySolution(number_of_variables=6, number_of_objectives=2)
+        solution1.variables = [True, False, False, True, True, False]
+        solution2 = BinarySolution(number_of_variables=6, number_of_objectives=2)
+        solution2.variables = [False, True, True, False, False, True]
+
+        random_call.side_effect = [1, 4]
+        offspring = operator.execute([solution1, solution2])
+        self.assertEqual([True, False, True, False, False, False], offspring[0].variables)
+        self.assertEqual([False, True, False, True, True, True], offspring[1].variables)
+
+
 class PMXTestCases(unittest.TestCase):
 
     def test_should_constructor_raises_an_exception_is_probability_is_negative(self) -> None:
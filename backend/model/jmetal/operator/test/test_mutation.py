@@ -1,10 +1,12 @@
 import unittest
 from typing import List
 
+import numpy as np
+
 from jmetal.core.operator import Mutation
 from jmetal.core.solution import BinarySolution, FloatSolution, IntegerSolution, CompositeSolution
 from jmetal.operator.mutation import BitFlipMutation, UniformMutation, SimpleRandomMutation, PolynomialMutation, \
-    IntegerPolynomialMutation, CompositeMutation
+    IntegerPolynomialMutation, CompositeMutation, bit_flip_positions
 from jmetal.util.ckecking import NoneParameterException, EmptyCollectionException, InvalidConditionException
 
 
@@ -113,6 +115,34 @@ class BitFlipTestCases(unittest.TestCase):
         self.assertEqual([True, False, False, True, True, False], mutated_solution.variables[1])
 
 
+    def test_should_the_solution_change_all_the_bits_of_a_numpy_array_if_the_probability_is_one(self):
+        operator = BitFlipMutation(1.0)
+        solution = BinarySolution(number_of_variables=6, number_of_objectives=1)
+        solution.variables = np.array([True, True, False, False, True, False])
+
+        mutated_solution = operator.execute(solution)
+        self.assertEqual([False, False, True, True, False, True], mutated_solution.variables.tolist())
+
+    def test_should_the_numpy_array_remain_unchanged_if_the_probability_is_zero(self):
+        operator = BitFlipMutation(0.0)
+        solution = BinarySolution(number_of_variables=6, number_of_objectives=1)
+        solution.variables = np.array([True, True, False, False, True, False])
+
+        mutated_solution = operator.execute(solution)
+        self.assertEqual([True, True, False, False, True, False], mutated_solution.variables.tolist())
+
+    def test_should_bit_flip_positions_be_sorted_and_in_range(self):
+        positions = bit_flip_positions(1000, 0.1)
+
+        self.assertEqual(sorted(set(positions)), positions)
+        self.assertTrue(all(0 <= position < 1000 for position in positions))
+
+    def test_should_bit_flip_positions_flip_every_bit_with_the_given_probability(self):
+        flips = sum(len(bit_flip_positions(1000, 0.05)) for _ in range(200))
+
+        self.assertAlmostEqual(0.05, flips / (1000 * 200), delta=0.005)
+
+
 class UniformMutationTestCases(unittest.TestCase):
 
     def test_should_constructor_raises_an_exception_is_probability_is_negative(self) -> None:
@@ -1,11 +1,13 @@
 import copy
+import heapq
 import random
+from bisect import bisect_left, bisect_right
 from abc import ABC, abstractmethod
 from threading import Lock
 from typing import TypeVar, Generic, List
 
 from jmetal.util.comparator import Comparator, DominanceComparator, SolutionAttributeComparator
-from jmetal.util.density_estimator import DensityEstimator, CrowdingDistance
+from jmetal.util.density_estimator import DensityEstimator, VectorizedCrowdingDistance
 
 S = TypeVar('S')
 
@@ -125,7 +127,122 @@ class CrowdingDistanceArchive(BoundedArchive[S]):
         super(CrowdingDistanceArchive, self).__init__(
             maximum_size=maximum_size,
             comparator=SolutionAttributeComparator("crowding_distance", lowest_is_best=False),
-            density_estimator=CrowdingDistance())
+            density_estimator=VectorizedCrowdingDistance())
+
+
+class BiObjectiveCrowdingDistanceArchive(BoundedArchive[S]):
+    """ Crowding distance archive for problems with exactly two objectives and without constraints.
+
+    The members are kept sorted by the first objective (so the second one is decreasing), which
+    allows to insert or reject a solution with a binary search, to remove the solutions it dominates
+    as a contiguous slice and to update the crowding distance of its neighbours only. The member with
+    the lowest crowding distance is found with a heap with lazy deletion; the crowding distances are
+    only recomputed for the whole archive when an extreme of the front changes.
+
+    It can be used instead of :class:`CrowdingDistanceArchive`, with the same crowding distances.
+    """
+
+    def __init__(self,
+                 maximum_size: int):
+        super(BiObjectiveCrowdingDistanceArchive, self).__init__(
+            maximum_size=maximum_size,
+            comparator=SolutionAttributeComparator("crowding_distance", lowest_is_best=False),
+            density_estimator=VectorizedCrowdingDistance())
+        self.__keys: List[float] = []
+        self.__heap = []
+        self.__heap_entry = {}
+        self.__counter = 0
+        self.__ranges = (0.0, 0.0)
+
+    def compute_density_estimator(self):
+        self.__ranges = self.__objective_ranges()
+        for index in range(len(self.solution_list)):
+            self.__update_crowding_distance(index)
+        self.__rebuild_heap()
+
+    def add(self, solution: S) -> bool:
+        first, second = solution.objectives[0], solution.objectives[1]
+        keys = self.__keys
+
+        # The member with the largest first objective not above the new one has the lowest second
+        # objective among them, so it dominates or contains the solution if any member does
+        previous = bisect_right(keys, first) - 1
+        if previous >= 0 and self.solution_list[previous].objectives[1] <= second:
+            return False
+
+        # The solutions dominated by the new one are the contiguous run after its insertion point
+        position = bisect_left(keys, first)
+        end = position
+        while end < len(keys) and self.solution_list[end].objectives[1] >= second:
+            self.__heap_entry.pop(id(self.solution_list[end]), None)
+            end += 1
+        self.solution_list[position:end] = [solution]
+        keys[position:end] = [first]
+
+        self.__update_neighbourhood(position - 1, position + 2)
+
+        if self.size() > self.maximum_size:
+            index = self.__pop_worst_index()
+            del self.solution_list[index]
+            del keys[index]
+            self.__update_neighbourhood(index - 1, index + 1)
+
+        return True
+
+    def __objective_ranges(self):
+        if len(self.solution_list) == 0:
+            return 0.0, 0.0
+        first, last = self.solution_list[0].objectives, self.solution_list[-1].objectives
+        return last[0] - first[0], first[1] - last[1]
+
+    def __update_neighbourhood(self, start: int, end: int):
+        ranges = self.__objective_ranges()
+        if ranges != self.__ranges or len(self.solution_list) <= 3:
+            # The normalization of every crowding distance depends on the extremes
+            self.compute_density_estimator()
+            return
+
+        for index in range(max(start, 0), min(end, len(self.solution_list))):
+            self.__update_crowding_distance(index)
+            self.__push(self.solution_list[index])
+
+        if len(self.__heap) > 4 * len(self.solution_list) + 16:
+            self.__rebuild_heap()
+
+    def __update_crowding_distance(self, index: int):
+        solution_list = self.solution_list
+        if index == 0 or index == len(solution_list) - 1:
+            solution_list[index].attributes['crowding_distance'] = float('inf')
+            return
+
+        distance = 0.0
+        previous, following = solution_list[index - 1].objectives, solution_list[index + 1].objectives
+        for objective_range, gap in zip(self.__ranges, (following[0] - previous[0], previous[1] - following[1])):
+            distance += gap / objective_range if objective_range != 0 else gap
+        solution_list[index].attributes['crowding_distance'] = distance
+
+    def __push(self, solution: S):
+        self.__counter += 1
+        self.__heap_entry[id(solution)] = self.__counter
+        heapq.heappush(self.__heap, (solution.attributes['crowding_distance'], solution.objectives[0],
+                                     self.__counter, solution))
+
+    def __rebuild_heap(self):
+        self.__heap = []
+        self.__heap_entry = {}
+        for solution in self.solution_list:
+            self.__counter += 1
+            self.__heap_entry[id(solution)] = self.__counter
+            self.__heap.append((solution.attributes['crowding_distance'], solution.objectives[0],
+                                self.__counter, solution))
+        heapq.heapify(self.__heap)
+
+    def __pop_worst_index(self) -> int:
+        while True:
+            _, first, counter, solution = heapq.heappop(self.__heap)
+            if self.__heap_entry.get(id(solution)) == counter:
+                del self.__heap_entry[id(solution)]
+                return bisect_left(self.__keys, first)
 
 
 class ArchiveWithReferencePoint(BoundedArchive[S]):
@@ -220,4 +337,4 @@ class CrowdingDistanceArchiveWithReferencePoint(ArchiveWithReferencePoint[S]):
             maximum_size=maximum_size,
             reference_point=reference_point,
             comparator=SolutionAttributeComparator("crowding_distance", lowest_is_best=False),
-            density_estimator=CrowdingDistance())
+            density_estimator=VectorizedCrowdingDistance())
@@ -97,6 +97,57 @@ class CrowdingDistance(DensityEstimator[List[S]]):
         return SolutionAttributeComparator("crowding_distance", lowest_is_best=False)
 
 
+def crowding_distances(objectives: numpy.ndarray) -> numpy.ndarray:
+    """ Crowding distance of every row of an (N x M) objective matrix, with the same values as
+    :class:`CrowdingDistance`: the solutions at the extremes of any objective get an infinite distance and the other
+    ones the sum of the normalized gaps between their neighbours in every objective.
+
+    :param objectives: Objective matrix, one row per solution.
+    :return: Array with the crowding distance of every solution.
+    """
+    objectives = numpy.asarray(objectives, dtype=float)
+    size = objectives.shape[0]
+    if size <= 2:
+        return numpy.full(size, float("inf"))
+
+    distances = numpy.zeros(size)
+    # Every objective sorts the order of the previous one, as the stable sorts of CrowdingDistance do
+    order = numpy.arange(size)
+    for i in range(objectives.shape[1]):
+        order = order[numpy.argsort(objectives[order, i], kind='stable')]
+        values = objectives[order, i]
+        distances[order[0]] = float("inf")
+        distances[order[-1]] = float("inf")
+
+        gaps = values[2:] - values[:-2]
+        objective_range = values[-1] - values[0]
+        if objective_range != 0:
+            gaps = gaps / objective_range
+        distances[order[1:-1]] += gaps
+
+    return distances
+
+
+class VectorizedCrowdingDistance(CrowdingDistance[List[S]]):
+    """This class implements the crowding distance of NSGA-II computed with :func:`crowding_distances` on the
+    objective matrix of the solution list.
+    """
+
+    def compute_density_estimator(self, front: List[S]):
+        """This function performs the computation of the crowding density estimation over the solution list.
+
+        :param front: The list of solutions.
+        """
+        if len(front) <= 2:
+            for solution in front:
+                solution.attributes['crowding_distance'] = float("inf")
+            return
+
+        distances = crowding_distances([solution.objectives for solution in front])
+        for solution, distance in zip(front, distances.tolist()):
+            solution.attributes['crowding_distance'] = distance
+
+
 class KNearestNeighborDensityEstimator(DensityEstimator[List[S]]):
     """This class implements a density estimator based on the distance to the k-th nearest solution.
     """
@@ -55,6 +55,21 @@ class CoevolvedSequentialEvaluator(Evaluator[S]):
         return solution_list
 
 
+class BatchEvaluator(Evaluator[S]):
+    """ Evaluates the whole list in a single call to the problem's `evaluate_solution_list` method (e.g. a
+    vectorized evaluation), falling back to one by one evaluation for problems that do not implement it. """
+
+    def evaluate(self, solution_list: List[S], problem: Problem) -> List[S]:
+        evaluate_solution_list = getattr(problem, 'evaluate_solution_list', None)
+        if evaluate_solution_list is not None:
+            evaluate_solution_list(solution_list)
+        else:
+            for solution in solution_list:
+                Evaluator.evaluate_solution(solution, problem)
+
+        return solution_list
+
+
 class MapEvaluator(Evaluator[S]):
 
     def __init__(self, processes: int = None):
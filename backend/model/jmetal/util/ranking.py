@@ -1,7 +1,11 @@
 from abc import ABC, abstractmethod
+from bisect import bisect_right
 from typing import TypeVar, List
 
-from jmetal.util.comparator import DominanceComparator, Comparator, SolutionAttributeComparator
+import numpy
+
+from jmetal.util.comparator import DominanceComparator, Comparator, SolutionAttributeComparator, \
+    OverallConstraintViolationComparator
 
 S = TypeVar('S')
 
@@ -105,6 +109,129 @@ class FastNonDominatedRanking(Ranking[List[S]]):
         return SolutionAttributeComparator('dominance_ranking')
 
 
+def non_dominated_ranks(objectives: numpy.ndarray, violation: numpy.ndarray = None) -> numpy.ndarray:
+    """ Non-dominated rank of every row of an (N x M) objective matrix (all the objectives are minimized).
+
+    A solution with a larger (closer to zero) overall constraint violation degree dominates the ones with a smaller
+    one, and with the same degree the Pareto dominance applies, as in :class:`DominanceComparator`. The two-objective
+    case is solved with an O(N log N) sweep and the general one with a boolean dominance matrix.
+
+    :param objectives: Objective matrix, one row per solution.
+    :param violation: Overall constraint violation degree of every solution (None if there are no constraints).
+    :return: Array with the rank of every solution, 0 for the non-dominated ones.
+    """
+    objectives = numpy.asarray(objectives, dtype=float)
+    size = objectives.shape[0]
+    ranks = numpy.zeros(size, dtype=int)
+    if size == 0:
+        return ranks
+
+    if violation is None or not numpy.any(violation < 0):
+        groups = [numpy.arange(size)]
+    else:
+        # The solutions with the same violation degree are ranked among them, from the least violated group
+        violation = numpy.asarray(violation, dtype=float)
+        groups = [numpy.flatnonzero(violation == degree) for degree in numpy.unique(violation)[::-1]]
+
+    offset = 0
+    for group in groups:
+        if objectives.shape[1] == 2:
+            group_ranks = _bi_objective_ranks(objectives[group])
+        else:
+            group_ranks = _dominance_matrix_ranks(objectives[group])
+        ranks[group] = group_ranks + offset
+        offset += group_ranks.max() + 1
+
+    return ranks
+
+
+def _bi_objective_ranks(objectives: numpy.ndarray) -> numpy.ndarray:
+    # Sweep in lexicographic order: a solution can only be dominated by the previous ones, and the last solution
+    # added to a front has the lowest second objective of the front, so it is the one to check
+    order = numpy.lexsort((objectives[:, 1], objectives[:, 0]))
+    ranks = numpy.empty(len(objectives), dtype=int)
+    last_first = []
+    last_second = []
+    for index in order.tolist():
+        first, second = objectives[index, 0], objectives[index, 1]
+        # The fronts dominating the solution are a prefix of the fronts
+        front = bisect_right(last_second, second)
+        if front > 0 and last_second[front - 1] == second and last_first[front - 1] == first:
+            front -= 1
+        if front == len(last_second):
+            last_first.append(first)
+            last_second.append(second)
+        else:
+            last_first[front] = first
+            last_second[front] = second
+        ranks[index] = front
+    return ranks
+
+
+def _dominance_matrix_ranks(objectives: numpy.ndarray) -> numpy.ndarray:
+    # dominates[i, j] is True when solution i dominates solution j
+    not_worse = numpy.all(objectives[:, None, :] <= objectives[None, :, :], axis=2)
+    better = numpy.any(objectives[:, None, :] < objectives[None, :, :], axis=2)
+    dominates = not_worse & better
+
+    ranks = numpy.full(len(objectives), -1, dtype=int)
+    dominating_count = dominates.sum(axis=0)
+    rank = 0
+    while True:
+        front = (dominating_count == 0) & (ranks < 0)
+        if not front.any():
+            break
+        ranks[front] = rank
+        dominating_count -= dominates[front].sum(axis=0)
+        rank += 1
+    return ranks
+
+
+class VectorizedNonDominatedRanking(FastNonDominatedRanking[List[S]]):
+    """ Non-dominated ranking of NSGA-II computed with :func:`non_dominated_ranks` on the objective matrix of the
+    solutions. It gives the same ranks as :class:`FastNonDominatedRanking`, which is used instead when the comparator
+    is not a :class:`DominanceComparator` with the default constraint comparator. """
+
+    def __init__(self, comparator: Comparator = DominanceComparator()):
+        super(VectorizedNonDominatedRanking, self).__init__(comparator)
+
+    def compute_ranking(self, solutions: List[S], k: int = None):
+        """ Compute ranking of solutions.
+
+        :param solutions: Solution list.
+        :param k: Number of individuals.
+        """
+        if type(self.comparator) is not DominanceComparator or \
+                type(self.comparator.constraint_comparator) is not OverallConstraintViolationComparator:
+            return super(VectorizedNonDominatedRanking, self).compute_ranking(solutions, k)
+
+        if len(solutions) == 0:
+            self.ranked_sublists = []
+            return self.ranked_sublists
+
+        objectives = numpy.array([solution.objectives for solution in solutions], dtype=float)
+        violation = None
+        if any(solution.constraints for solution in solutions):
+            violation = numpy.array([sum(value for value in solution.constraints if value < 0)
+                                     for solution in solutions], dtype=float)
+        ranks = non_dominated_ranks(objectives, violation)
+
+        self.ranked_sublists = [[] for _ in range(ranks.max() + 1)]
+        for solution, rank in zip(solutions, ranks.tolist()):
+            solution.attributes['dominance_ranking'] = rank
+            self.ranked_sublists[rank].append(solution)
+
+        if k:
+            count = 0
+            for i, front in enumerate(self.ranked_sublists):
+                count += len(front)
+                if count >= k:
+                    self.ranked_sublists = self.ranked_sublists[:i + 1]
+                    break
+
+        return self.ranked_sublists
+
+
 class StrengthRanking(Ranking[List[S]]):
     """ Class implementing a ranking scheme based on the strength ranking used in SPEA2. """
 
@@ -63,6 +63,9 @@ def print_function_values_to_file(solutions, filename: str):
         for solution in solutions:
             for function_value in solution.objectives:
                 of.write(str(function_value) + ' ')
+            # Per-section traces of the solution, one list per row, after the objectives
+            for trace in solution.attributes.get('traces', ()):
+                of.write(str(trace.tolist()) + ' ')
             of.write('\n')
 
 def print_variables_to_screen(solutions):
@@ -1,7 +1,10 @@
 import unittest
+from random import Random
 
 from jmetal.core.solution import Solution
-from jmetal.util.archive import NonDominatedSolutionsArchive, BoundedArchive, CrowdingDistanceArchive, Archive
+from jmetal.util.archive import NonDominatedSolutionsArchive, BoundedArchive, CrowdingDistanceArchive, Archive, \
+    BiObjectiveCrowdingDistanceArchive
+from jmetal.util.density_estimator import CrowdingDistance
 
 
 class ArchiveTestCases(unittest.TestCase):
@@ -346,5 +349,91 @@ class CrowdingDistanceArchiveTestCases(unittest.TestCase):
         self.assertTrue(solution2.attributes["crowding_distance"] < float("inf"))
 
 
+class BiObjectiveCrowdingDistanceArchiveTestCases(unittest.TestCase):
+
+    def setUp(self):
+        self.archive = BiObjectiveCrowdingDistanceArchive[Solution](4)
+
+    def __solution(self, objectives):
+        solution = Solution(2, 2)
+        solution.objectives = objectives
+        return solution
+
+    def test_should_constructor_set_the_max_size(self):
+        self.assertEqual(4, self.archive.maximum_size)
+        self.assertEqual(0, self.archive.size())
+
+    def test_should_add_keep_the_solutions_sorted_by_the_first_objective(self):
+        solution1 = self.__solution([2.0, 1.0])
+        solution2 = self.__solution([0.0, 3.0])
+        solution3 = self.__solution([1.0, 2.0])
+
+        self.assertTrue(self.archive.add(solution1))
+        self.assertTrue(self.archive.add(solution2))
+        self.assertTrue(self.archive.add(solution3))
+
+        self.assertEqual([[0.0, 3.0], [1.0, 2.0], [2.0, 1.0]],
+                         [solution.objectives for solution in self.archive.solution_list])
+
+    def test_should_add_reject_dominated_and_repeated_solutions(self):
+        self.archive.add(self.__solution([0.0, 3.0]))
+        self.archive.add(self.__solution([1.0, 2.0]))
+
+        self.assertFalse(self.archive.add(self.__solution([1.0, 2.5])))
+        self.assertFalse(self.archive.add(self.__solution([1.0, 2.0])))
+        self.assertFalse(self.archive.add(self.__solution([0.0, 3.0])))
+        self.assertEqual(2, self.archive.size())
+
+    def test_should_add_remove_the_solutions_dominated_by_the_new_one(self):
+        solution1 = self.__solution([0.0, 4.0])
+        solution2 = self.__solution([1.0, 3.0])
+        solution3 = self.__solution([2.0, 2.5])
+        solution4 = self.__solution([3.0, 0.0])
+        for solution in (solution1, solution2, solution3, solution4):
+            self.archive.add(solution)
+
+        solution5 = self.__solution([1.0, 2.0])
+
+        self.assertTrue(self.archive.add(solution5))
+        self.assertEqual([[0.0, 4.0], [1.0, 2.0], [3.0, 0.0]],
+                         [solution.objectives for solution in self.archive.solution_list])
+
+    def test_should_add_remove_the_solution_with_the_lowest_crowding_distance(self):
+        solution1 = self.__solution([0.0, 4.0])
+        solution2 = self.__solution([1.0, 3.0])
+        solution3 = self.__solution([1.2, 2.8])
+        solution4 = self.__solution([3.0, 1.0])
+        solution5 = self.__solution([4.0, 0.0])
+        for solution in (solution1, solution2, solution3, solution4, solution5):
+            self.archive.add(solution)
+
+        self.assertEqual([[0.0, 4.0], [1.2, 2.8], [3.0, 1.0], [4.0, 0.0]],
+                         [solution.objectives for solution in self.archive.solution_list])
+
+    def test_should_crowding_distances_be_equal_to_the_crowding_distance_estimator(self):
+        archive = BiObjectiveCrowdingDistanceArchive(10)
+        random = Random(1)
+        for _ in range(200):
+            archive.add(self.__solution([random.random(), random.random()]))
+
+        copies = [self.__solution(list(solution.objectives)) for solution in archive.solution_list]
+        CrowdingDistance().compute_density_estimator(copies)
+
+        for solution, solution_copy in zip(archive.solution_list, copies):
+            self.assertAlmostEqual(solution_copy.attributes["crowding_distance"],
+                                   solution.attributes["crowding_distance"])
+
+    def test_should_add_accept_the_same_solutions_as_the_non_dominated_archive(self):
+        archive = BiObjectiveCrowdingDistanceArchive(1000)
+        non_dominated_archive = NonDominatedSolutionsArchive()
+        random = Random(2)
+        for _ in range(300):
+            solution = self.__solution([random.randint(0, 20), random.randint(0, 20)])
+            self.assertEqual(non_dominated_archive.add(solution), archive.add(solution))
+
+        self.assertEqual(sorted(solution.objectives for solution in non_dominated_archive.solution_list),
+                         [solution.objectives for solution in archive.solution_list])
+
+
 if __name__ == '__main__':
     unittest.main()
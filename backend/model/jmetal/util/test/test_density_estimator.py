@@ -1,8 +1,10 @@
 import unittest
 from math import sqrt
+from random import Random
 
 from jmetal.core.solution import Solution
-from jmetal.util.density_estimator import CrowdingDistance, KNearestNeighborDensityEstimator
+from jmetal.util.density_estimator import CrowdingDistance, KNearestNeighborDensityEstimator, \
+    VectorizedCrowdingDistance, crowding_distances
 
 
 class CrowdingDistanceTestCases(unittest.TestCase):
@@ -88,6 +90,32 @@ class CrowdingDistanceTestCases(unittest.TestCase):
         self.assertGreater(value_from_solution3, value_from_solution4)
 
 
+class VectorizedCrowdingDistanceTestCases(CrowdingDistanceTestCases):
+
+    def setUp(self):
+        self.crowding = VectorizedCrowdingDistance()
+
+    def test_should_crowding_distances_normalize_the_gaps_of_every_objective(self):
+        distances = crowding_distances([[0.0, 4.0], [1.0, 2.0], [4.0, 0.0]])
+
+        self.assertEqual([float("inf"), 1.0 + 1.0, float("inf")], distances.tolist())
+
+    def test_should_compute_density_estimator_give_the_same_values_as_the_crowding_distance(self):
+        random = Random(1)
+        solutions = []
+        for _ in range(50):
+            solution = Solution(2, 3)
+            solution.objectives = [random.randint(0, 10) for _ in range(3)]
+            solutions.append(solution)
+
+        CrowdingDistance().compute_density_estimator(solutions)
+        expected = [solution.attributes['crowding_distance'] for solution in solutions]
+        self.crowding.compute_density_estimator(solutions)
+
+        for value, solution in zip(expected, solutions):
+            self.assertAlmostEqual(value, solution.attributes['crowding_distance'])
+
+
 class KNearestNeighborDensityEstimatorTest(unittest.TestCase):
 
     def setUp(self):
@@ -2,7 +2,7 @@ import unittest
 
 from jmetal.core.problem import FloatProblem
 from jmetal.core.solution import FloatSolution
-from jmetal.util.evaluator import SequentialEvaluator, MapEvaluator
+from jmetal.util.evaluator import SequentialEvaluator, MapEvaluator, BatchEvaluator
 
 
 class MockedProblem(FloatProblem):
@@ -29,6 +29,24 @@ class MockedProblem(FloatProblem):
         pass
 
 
+class MockedBatchProblem(MockedProblem):
+
+    def __init__(self, number_of_variables: int = 3):
+        super(MockedBatchProblem, self).__init__(number_of_variables)
+        self.number_of_batch_calls = 0
+
+    def evaluate(self, solution: FloatSolution):
+        raise Exception('The solutions should be evaluated in batch')
+
+    def evaluate_solution_list(self, solution_list):
+        self.number_of_batch_calls += 1
+        for solution in solution_list:
+            solution.objectives[0] = 3.4
+            solution.objectives[1] = 4.5
+
+        return solution_list
+
+
 class SequentialEvaluatorTestCases(unittest.TestCase):
 
     def setUp(self):
@@ -83,5 +101,35 @@ class ParallelEvaluatorTestCases(unittest.TestCase):
             self.assertEqual(2.3, problem_list[i].objectives[1])
 
 
+class BatchEvaluatorTestCases(unittest.TestCase):
+
+    def setUp(self):
+        self.evaluator = BatchEvaluator()
+
+    def test_should_constructor_create_a_non_null_object(self):
+        self.assertIsNotNone(self.evaluator)
+
+    def test_should_evaluate_the_whole_list_in_a_single_call(self):
+        problem = MockedBatchProblem()
+        problem_list = [problem.create_solution() for _ in range(10)]
+
+        self.evaluator.evaluate(problem_list, problem)
+
+        self.assertEqual(1, problem.number_of_batch_calls)
+        for i in range(10):
+            self.assertEqual(3.4, problem_list[i].objectives[0])
+            self.assertEqual(4.5, problem_list[i].objectives[1])
+
+    def test_should_evaluate_one_by_one_if_the_problem_has_no_batch_evaluation(self):
+        problem = MockedProblem()
+        problem_list = [problem.create_solution() for _ in range(10)]
+
+        self.evaluator.evaluate(problem_list, problem)
+
+        for i in range(10):
+            self.assertEqual(1.2, problem_list[i].objectives[0])
+            self.assertEqual(2.3, problem_list[i].objectives[1])
+
+
 if __name__ == "__main__":
     unittest.main()
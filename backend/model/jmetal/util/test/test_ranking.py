@@ -1,7 +1,11 @@
 import unittest
+from random import Random
+
+import numpy
 
 from jmetal.core.solution import Solution
-from jmetal.util.ranking import FastNonDominatedRanking, StrengthRanking, Ranking
+from jmetal.util.ranking import FastNonDominatedRanking, StrengthRanking, Ranking, VectorizedNonDominatedRanking, \
+    non_dominated_ranks
 
 
 class FastNonDominatedRankingTestCases(unittest.TestCase):
@@ -160,6 +164,38 @@ class FastNonDominatedRankingTestCases(unittest.TestCase):
         self.assertEqual(solution2, ranking[1][0])
 
 
+class VectorizedNonDominatedRankingTestCases(FastNonDominatedRankingTestCases):
+
+    def setUp(self):
+        self.ranking = VectorizedNonDominatedRanking()
+
+    def test_should_non_dominated_ranks_work_properly_with_two_objectives(self):
+        objectives = numpy.array([[1.0, 4.0], [2.0, 3.0], [2.0, 3.0], [3.0, 3.0], [2.0, 5.0], [0.0, 6.0]])
+
+        self.assertEqual([0, 0, 0, 1, 1, 0], non_dominated_ranks(objectives).tolist())
+
+    def test_should_non_dominated_ranks_rank_the_least_violated_solutions_first(self):
+        objectives = numpy.array([[1.0, 1.0], [2.0, 2.0], [3.0, 3.0]])
+        violation = numpy.array([-1.0, 0.0, -2.0])
+
+        self.assertEqual([1, 0, 2], non_dominated_ranks(objectives, violation).tolist())
+
+    def test_should_compute_ranking_give_the_same_ranks_as_the_fast_non_dominated_ranking(self):
+        random = Random(1)
+        for number_of_objectives in (2, 3):
+            solutions = []
+            for _ in range(60):
+                solution = Solution(2, number_of_objectives)
+                solution.objectives = [random.randint(0, 6) for _ in range(number_of_objectives)]
+                solutions.append(solution)
+
+            FastNonDominatedRanking().compute_ranking(solutions)
+            expected = [solution.attributes['dominance_ranking'] for solution in solutions]
+            self.ranking.compute_ranking(solutions)
+
+            self.assertEqual(expected, [solution.attributes['dominance_ranking'] for solution in solutions])
+
+
 class StrengthRankingTestCases(unittest.TestCase):
 
     def setUp(self):
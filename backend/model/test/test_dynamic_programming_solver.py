@@ -0,0 +1,47 @@
+import unittest
+
+from DynamicProgrammingSolver import DynamicProgrammingSolver, non_dominated_labels, thin_labels
+from HybridTruckProblem_Demo import HybridTruckProblem
+from Truck import Truck
+from test.test_hybrid_truck_problem import synthetic_route
+
+
+class DynamicProgrammingSolverTestCases(unittest.TestCase):
+
+    def setUp(self):
+        # Un único tramo entre paradas de 150 secciones
+        self.route = synthetic_route(number_of_sections=150, stop_every=151)
+        self.problem = HybridTruckProblem(self.route, Truck(1, self.route, charge=8))
+
+    def test_should_non_dominated_labels_keep_the_labels_with_more_battery(self):
+        labels = [(2.0, 1.0, 5.0), (2.0, 1.0, 6.0), (1.0, 1.0, 7.0), (1.0, 2.0, 6.0), (2.0, 1.0, 6.0)]
+
+        self.assertEqual([(2.0, 1.0, 6.0), (1.0, 1.0, 7.0)], non_dominated_labels(labels))
+
+    def test_should_thin_labels_keep_the_extremes_of_every_objective(self):
+        labels = [(3.0, 3.0, 0.0), (2.5, 2.5, 0.5), (2.0, 2.0, 1.0), (1.0, 1.0, 3.0), (0.0, 0.0, 2.0)]
+
+        self.assertEqual([labels[0], labels[3], labels[4]], thin_labels(labels, 3))
+
+    def test_should_a_long_leg_keep_a_bounded_number_of_labels(self):
+        solver = DynamicProgrammingSolver(self.problem)
+
+        front = solver.leg_front(0, len(self.route.sections))
+
+        # Como mucho labels_per_state etiquetas en cada intervalo de SOC, sin depender de la velocidad
+        self.assertTrue(solver.labels <= len(self.route.sections) * (solver.soc_buckets + 1) * solver.labels_per_state)
+        self.assertTrue(len(front) > 0)
+
+    def test_should_the_leg_front_points_be_feasible_with_their_objectives(self):
+        solver = DynamicProgrammingSolver(self.problem)
+
+        for green_km, emissions, modes in solver.leg_front(0, len(self.route.sections)):
+            l_emisiones, l_greenKm, _, _, _, invalid = self.problem.evaluate_leg(modes, 0, len(modes))
+
+            self.assertFalse(invalid)
+            self.assertAlmostEqual(sum(l_greenKm), green_km, places=9)
+            self.assertAlmostEqual(sum(l_emisiones), emissions, places=9)
+
+
+if __name__ == '__main__':
+    unittest.main()
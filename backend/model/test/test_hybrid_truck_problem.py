@@ -0,0 +1,172 @@
+import copy
+import math
+import random
+import unittest
+
+import numpy as np
+
+from HybridTruckProblem_Demo import HybridTruckProblem, TRACE_ROWS
+from jmetal.core.solution import BinarySolution
+from Route import Route
+from Section import Section
+from Truck import Truck
+
+
+def synthetic_route(number_of_sections: int = 40, stop_every: int = 8, seed: int = 3) -> Route:
+    rng = random.Random(seed)
+    sections = []
+    for index in range(number_of_sections):
+        slope_percent = rng.choice([-6.0, -3.5, -1.0, 0.0, 1.5, 4.0])
+        speed = rng.uniform(6, 20)
+        distance = rng.uniform(0.05, 0.6)
+        seconds = distance * 1000 / speed
+        stop_start = 1 if index % stop_every == 0 else 0
+        sections.append(Section(index, speed, math.atan(slope_percent / 100), slope_percent, distance, seconds,
+                                speed / seconds if stop_start else 0, stop_start))
+    return Route(1, sections)
+
+
+def new_solution(problem: HybridTruckProblem, variables) -> BinarySolution:
+    solution = BinarySolution(number_of_variables=problem.number_of_variables,
+                              number_of_objectives=problem.number_of_objectives)
+    solution.variables = np.array(variables, dtype=bool)
+    return solution
+
+
+class HybridTruckProblemRepairTestCases(unittest.TestCase):
+
+    def setUp(self):
+        route = synthetic_route()
+        self.problem = HybridTruckProblem(route, Truck(1, route, charge=1), slope_percent_limit=-2)
+        # La reparación ordena los tramos por la potencia que calcula la heurística
+        self.problem.heuristic_seeds()
+        random.seed(1)
+
+    def test_should_slope_percent_limit_leave_the_steep_descents_out_of_the_variables(self):
+        forced = sum(1 for section in self.problem.route.sections if section.slope_percent <= -2)
+
+        self.assertTrue(forced > 0)
+        self.assertEqual(len(self.problem.route.sections) - forced, self.problem.number_of_variables)
+        self.assertEqual(self.problem.number_of_variables, len(self.problem.create_solution().variables))
+
+    def test_should_repaired_solutions_have_one_trace_per_section(self):
+        for _ in range(10):
+            solution = new_solution(self.problem, [True] * (self.problem.number_of_variables - 3) +
+                                    [random.random() < 0.5 for _ in range(3)])
+            self.problem.evaluate(solution)
+
+            traces = solution.attributes["traces"]
+            self.assertEqual((len(TRACE_ROWS), len(self.problem.route.sections)), traces.shape)
+            self.assertTrue(traces[TRACE_ROWS.index("SOC")].min() >= 0)
+            self.assertAlmostEqual(-solution.objectives[0], float(traces[TRACE_ROWS.index("greenKm")].sum()), places=4)
+
+    def test_should_batch_evaluation_repair_with_one_trace_per_section(self):
+        solutions = [new_solution(self.problem, [random.random() < 0.9 for _ in range(self.problem.number_of_variables)])
+                     for _ in range(10)]
+        self.problem.evaluate_solution_list(solutions)
+
+        for solution in solutions:
+            self.assertEqual((len(TRACE_ROWS), len(self.problem.route.sections)), solution.attributes["traces"].shape)
+            self.assertTrue(solution.attributes["traces"][TRACE_ROWS.index("SOC")].min() >= 0)
+
+
+class IncrementalEvaluationTestCases(unittest.TestCase):
+    """
+    The incremental paths (leg_cache and leg memo, repair and heuristic seeds with an
+    IncrementalRouteState) must give exactly the results of a full evaluation with a fresh problem.
+    The batch evaluation simulates the sections with section_power_batch, whose energies can differ
+    from the scalar simulation in the last bits, so it only has to match within rounding.
+    """
+
+    # (battery charge, slope_percent_limit): loose battery, tight battery, tight battery with forced sections
+    CONFIGURATIONS = ((90, -800), (1, -800), (1, -2))
+
+    def setUp(self):
+        self.route = synthetic_route()
+
+    def __problem(self, charge, slope_percent_limit, route=None, **options) -> HybridTruckProblem:
+        route = route or self.route
+        problem = HybridTruckProblem(route, Truck(1, route, charge=charge),
+                                     slope_percent_limit=slope_percent_limit, **options)
+        problem.heuristic_seeds()
+        return problem
+
+    def __assert_same_as_full_evaluation(self, solution, variables, charge, slope_percent_limit, route=None,
+                                         exact=True):
+        reference = self.__problem(charge, slope_percent_limit, route, leg_memo_size=0).evaluate(new_solution(
+            self.__problem(charge, slope_percent_limit, route), variables))
+
+        self.assertEqual(reference.variables.tolist(), np.asarray(solution.variables, dtype=bool).tolist())
+        if exact:
+            self.assertEqual(reference.objectives, solution.objectives)
+            self.assertTrue(np.array_equal(reference.attributes["traces"], solution.attributes["traces"]))
+        else:
+            self.assertTrue(np.allclose(reference.objectives, solution.objectives, rtol=1e-12, atol=0))
+            # Las trazas son float32: una diferencia en el último bit de float64 puede cambiar el redondeo
+            self.assertTrue(np.allclose(reference.attributes["traces"], solution.attributes["traces"], rtol=1e-6, atol=1e-6))
+
+    def test_should_incremental_evaluation_match_a_full_evaluation(self):
+        for charge, slope_percent_limit in self.CONFIGURATIONS:
+            with self.subTest(charge=charge, slope_percent_limit=slope_percent_limit):
+                random.seed(2)
+                problem = self.__problem(charge, slope_percent_limit)
+                parent = problem.evaluate(new_solution(problem, [random.random() < 0.5
+                                                                 for _ in range(problem.number_of_variables)]))
+                for _ in range(20):
+                    # Copia con los resultados por tramo del padre (leg_cache), como la de los operadores
+                    offspring = copy.deepcopy(parent)
+                    for variable in random.sample(range(problem.number_of_variables), 3):
+                        offspring.variables[variable] = not offspring.variables[variable]
+                    variables = offspring.variables.copy()
+
+                    problem.evaluate(offspring)
+
+                    self.__assert_same_as_full_evaluation(offspring, variables, charge, slope_percent_limit)
+                    parent = offspring
+
+    def test_should_batch_evaluation_match_a_full_evaluation(self):
+        # Además de la ruta de siempre, rutas más largas en las que section_power_batch difiere en el último bit
+        cases = [(self.route, charge, slope_percent_limit) for charge, slope_percent_limit in self.CONFIGURATIONS] + \
+                [(synthetic_route(300, 25, seed), 90, -800) for seed in (0, 5, 7)]
+        for route, charge, slope_percent_limit in cases:
+            with self.subTest(sections=len(route.sections), charge=charge, slope_percent_limit=slope_percent_limit):
+                random.seed(3)
+                problem = self.__problem(charge, slope_percent_limit, route)
+                solutions = [new_solution(problem, [random.random() < 0.7 for _ in range(problem.number_of_variables)])
+                             for _ in range(15)]
+                variables = [solution.variables.copy() for solution in solutions]
+
+                problem.evaluate_solution_list(solutions)
+
+                for solution, solution_variables in zip(solutions, variables):
+                    self.__assert_same_as_full_evaluation(solution, solution_variables, charge, slope_percent_limit,
+                                                          route, exact=False)
+
+    def test_should_repaired_solutions_be_feasible_in_a_full_simulation(self):
+        for charge, slope_percent_limit in self.CONFIGURATIONS[1:]:
+            with self.subTest(charge=charge, slope_percent_limit=slope_percent_limit):
+                problem = self.__problem(charge, slope_percent_limit)
+                solution = problem.evaluate(new_solution(problem, [True] * problem.number_of_variables))
+
+                # Simulación de toda la ruta de una vez, sin dividirla en tramos entre paradas
+                _, remaining_charges, emissions = self.__problem(charge, slope_percent_limit).evaluate_single(solution)
+
+                self.assertTrue(min(remaining_charges) >= 0)
+                self.assertEqual(np.float32(remaining_charges).tolist(), solution.attributes["traces"][TRACE_ROWS.index("SOC")].tolist())
+                self.assertEqual(sum(emissions), solution.objectives[1])
+
+    def test_should_heuristic_seeds_match_a_full_evaluation(self):
+        for charge, slope_percent_limit in self.CONFIGURATIONS:
+            with self.subTest(charge=charge, slope_percent_limit=slope_percent_limit):
+                problem = self.__problem(charge, slope_percent_limit)
+                for valid_solution, variables, emissions, green_kms, _ in problem.heuristic_seeds().values():
+                    self.assertTrue(valid_solution)
+                    reference = self.__problem(charge, slope_percent_limit, leg_memo_size=0).evaluate(
+                        new_solution(problem, variables))
+
+                    self.assertEqual(list(variables), reference.variables.tolist())
+                    self.assertEqual([-green_kms, emissions], reference.objectives)
+
+
+if __name__ == '__main__':
+    unittest.main()
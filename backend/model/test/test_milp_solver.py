@@ -0,0 +1,73 @@
+import itertools
+import unittest
+
+import numpy as np
+
+from HybridTruckProblem_Demo import HybridTruckProblem, TRACE_ROWS
+from MilpSolver import MilpSolver
+from OptimizationResult import OptimizationResult
+from Truck import Truck
+from test.test_hybrid_truck_problem import synthetic_route, new_solution
+
+
+class MilpSolverTestCases(unittest.TestCase):
+
+    # (battery charge, slope_percent_limit): tight battery, tight battery with forced sections
+    CONFIGURATIONS = ((1, -800), (1, -2))
+
+    def setUp(self):
+        # Ruta corta, para poder enumerar todas las soluciones
+        self.route = synthetic_route(number_of_sections=12, stop_every=6)
+
+    def __problem(self, charge, slope_percent_limit) -> HybridTruckProblem:
+        return HybridTruckProblem(self.route, Truck(1, self.route, charge=charge), slope_percent_limit=slope_percent_limit)
+
+    def __feasible_objectives(self, problem):
+        objectives = []
+        for variables in itertools.product((False, True), repeat=problem.number_of_variables):
+            solution = problem.evaluate(new_solution(problem, variables))
+            # Las soluciones que la reparación ha cambiado no son factibles tal cual
+            if solution.variables.tolist() == list(variables) and solution.attributes["traces"][TRACE_ROWS.index("SOC")].min() >= 0:
+                objectives.append(solution.objectives)
+        return objectives
+
+    def test_should_the_model_have_one_mode_soc_and_product_per_section(self):
+        solver = MilpSolver(self.__problem(1, -2))
+
+        objective, _, green_km_row, constraints, bounds, integrality = solver._model()
+
+        sections = len(self.route.sections)
+        self.assertEqual((3 * sections,), objective.shape)
+        self.assertEqual((5 * sections, 3 * sections), constraints.A.shape)
+        self.assertEqual(sections, int(integrality.sum()))
+        self.assertAlmostEqual(sum(section.distance for section in self.route.sections), green_km_row.sum(), places=9)
+        # Las bajadas pronunciadas se fijan en eléctrico
+        forced = [section.slope_percent <= -2 for section in self.route.sections]
+        self.assertEqual(forced, (bounds.lb[:sections] == 1).tolist())
+
+    def test_should_the_solutions_be_feasible_and_not_dominated_by_any_other(self):
+        for charge, slope_percent_limit in self.CONFIGURATIONS:
+            with self.subTest(charge=charge, slope_percent_limit=slope_percent_limit):
+                problem = self.__problem(charge, slope_percent_limit)
+                solver = MilpSolver(problem, points=5)
+                solver.run()
+                feasible = self.__feasible_objectives(self.__problem(charge, slope_percent_limit))
+
+                self.assertTrue(len(solver.get_result()) > 0)
+                for solution in solver.get_result():
+                    self.assertTrue(solution.attributes["traces"][TRACE_ROWS.index("SOC")].min() >= 0)
+                    self.assertFalse(any(other[0] <= solution.objectives[0] and other[1] <= solution.objectives[1]
+                                         and other != solution.objectives for other in feasible))
+
+    def test_should_the_result_keep_the_optimality_gap(self):
+        solver = MilpSolver(self.__problem(1, -800), points=3)
+        solver.run()
+
+        result = OptimizationResult.from_algorithm(solver)
+
+        self.assertEqual(solver.mip_gap, result.optimality_gap)
+        self.assertTrue(0 <= result.optimality_gap <= solver.mip_rel_gap)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import random
+import unittest
+
+import numpy as np
+
+from HybridTruckProblem_Demo import HybridTruckProblem
+from RoutePoolEvaluator import RoutePoolEvaluator
+from Truck import Truck
+from jmetal.util.evaluator import BatchEvaluator
+from test.test_hybrid_truck_problem import synthetic_route, new_solution
+
+
+class RoutePoolEvaluatorTestCases(unittest.TestCase):
+
+    def setUp(self):
+        # Batería justa y bajadas forzadas en eléctrico, para que haya soluciones reparadas
+        route = synthetic_route()
+        self.problem = HybridTruckProblem(route, Truck(1, route, charge=1), slope_percent_limit=-2)
+        self.problem.heuristic_seeds()
+        random.seed(4)
+
+    def __solutions(self, size):
+        return [new_solution(self.problem, [random.random() < 0.8 for _ in range(self.problem.number_of_variables)])
+                for _ in range(size)]
+
+    def test_should_the_pool_evaluation_match_the_batch_evaluator(self):
+        solutions = self.__solutions(12)
+        references = [new_solution(self.problem, solution.variables.copy()) for solution in solutions]
+        initial_variables = [solution.variables.copy() for solution in solutions]
+
+        BatchEvaluator().evaluate(references, self.problem)
+        with RoutePoolEvaluator(2, quiet=True) as evaluator:
+            evaluator.evaluate(solutions, self.problem)
+
+        self.assertTrue(any(not np.array_equal(variables, reference.variables)
+                            for variables, reference in zip(initial_variables, references)))
+        for solution, reference in zip(solutions, references):
+            self.assertEqual(reference.variables.tolist(), np.asarray(solution.variables, dtype=bool).tolist())
+            self.assertEqual(reference.objectives, solution.objectives)
+            self.assertTrue(np.array_equal(reference.attributes["traces"], solution.attributes["traces"]))
+
+    def test_should_the_pool_grow_its_buffers_for_larger_lists(self):
+        with RoutePoolEvaluator(2, quiet=True) as evaluator:
+            evaluator.evaluate(self.__solutions(3), self.problem)
+            solutions = evaluator.evaluate(self.__solutions(10), self.problem)
+
+            self.assertTrue(evaluator.capacity >= 10)
+            self.assertEqual(10, len(solutions))
+            for solution in solutions:
+                self.assertEqual(len(self.problem.route.sections), solution.attributes["traces"].shape[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
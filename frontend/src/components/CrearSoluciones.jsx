@@ -29,6 +29,7 @@ const CrearSoluciones = () => {
   const [mostrarModal, setMostrarModal] = useState(false);
   const [mensajeEstado, setMensajeEstado] = useState("");
   const [cargando, setCargando] = useState(false);
+  const [trabajoActivo, setTrabajoActivo] = useState(null);
   const [paginaActual, setPaginaActual] = useState(1);
   const rutasPorPagina = 10;
   const [vehiculos, setVehiculos] = useState([]);
@@ -148,7 +149,7 @@ const CrearSoluciones = () => {
         await axios.post(`${BACKEND_API_URL}/generar_csv_ruta/${idRuta}`);
       }
 
-      await axios.post(`${BACKEND_API_URL}/ejecutar_algoritmo`, {
+      const { data: { id_trabajo } } = await axios.post(`${BACKEND_API_URL}/ejecutar_algoritmo`, {
         maxEvaluations: config.maxEvaluations,
         populationSize: config.populationSize,
         offspringSize: config.offspringSize,
@@ -161,6 +162,19 @@ const CrearSoluciones = () => {
         vehiculo_id: vehiculoSeleccionado, // <-- Enviamos el ID del vehículo
       });
 
+      // El algoritmo se ejecuta en segundo plano, se consulta su progreso hasta que termina
+      setTrabajoActivo(id_trabajo);
+      const estado = await esperarTrabajo(id_trabajo, rutaSeleccionada.Nombre);
+
+      if (estado === "cancelado") {
+        setMensajeEstado("⚠️ Execution cancelled.");
+        return;
+      }
+      if (estado !== "completado") {
+        setMensajeEstado("❌ An error occurred generating solutions.");
+        return;
+      }
+
       setMensajeEstado("✅ Solutions generated successfully.");
 
       const response = await axios.get(`${BACKEND_API_URL}/rutas_con_soluciones`);
@@ -172,6 +186,58 @@ const CrearSoluciones = () => {
       setMensajeEstado("❌ An error occurred generating solutions.");
     } finally {
       setCargando(false);
+      setTrabajoActivo(null);
+    }
+  };
+
+  const mostrarProgreso = (progreso, nombreRuta) => {
+    if (progreso.estado === "en_cola") {
+      setMensajeEstado(`🔄 Waiting for a free worker for route "${nombreRuta}"...`);
+      return;
+    }
+    const avance = progreso.porcentaje !== null ? ` ${progreso.porcentaje}% (${progreso.evaluaciones}/${progreso.max_evaluaciones} evaluations)` : "";
+    const frente = progreso.archivo ? `, ${progreso.archivo} solutions in the front` : "";
+    setMensajeEstado(`🔄 Generating solutions for route "${nombreRuta}"...${avance}${frente}`);
+  };
+
+  const esperarTrabajo = (idTrabajo, nombreRuta) => new Promise((resolve) => {
+    // El backend envía el progreso de cada generación por Server-Sent Events hasta que el trabajo termina
+    const eventos = new EventSource(`${BACKEND_API_URL}/trabajos/${idTrabajo}/eventos`);
+    eventos.onmessage = (evento) => {
+      const progreso = JSON.parse(evento.data);
+      if (["completado", "fallido", "cancelado"].includes(progreso.estado)) {
+        eventos.close();
+        resolve(progreso.estado);
+        return;
+      }
+      mostrarProgreso(progreso, nombreRuta);
+    };
+    eventos.onerror = () => {
+      // Si se corta la conexión se sigue consultando el progreso
+      eventos.close();
+      resolve(consultarTrabajo(idTrabajo, nombreRuta));
+    };
+  });
+
+  const consultarTrabajo = async (idTrabajo, nombreRuta) => {
+    while (true) {
+      await new Promise((resolve) => setTimeout(resolve, 2000));
+      const { data: progreso } = await axios.get(`${BACKEND_API_URL}/trabajos/${idTrabajo}/progreso`);
+
+      if (["completado", "fallido", "cancelado"].includes(progreso.estado)) {
+        return progreso.estado;
+      }
+      mostrarProgreso(progreso, nombreRuta);
+    }
+  };
+
+  const detenerTrabajo = async () => {
+    if (!trabajoActivo) return;
+    try {
+      // El algoritmo para en la siguiente generación y guarda las soluciones que lleva
+      await axios.post(`${BACKEND_API_URL}/trabajos/${trabajoActivo}/detener`);
+    } catch (error) {
+      console.error("❌ Error al detener el trabajo:", error);
     }
   };
 
@@ -575,6 +641,11 @@ const CrearSoluciones = () => {
             <Button variant="outline-secondary" onClick={cerrarModal}>
               Cancel
             </Button>
+            {cargando && trabajoActivo && (
+              <Button variant="outline-danger" onClick={detenerTrabajo}>
+                Stop and keep front
+              </Button>
+            )}
             <Button variant="primary" onClick={ejecutarAlgoritmo} disabled={cargando}>
               {cargando ? (
                 <>